@@ -0,0 +1,203 @@
+"""平衡性扫描：敌人 × 玩家等级 × 装备组合
+
+把整张网格拆成若干工作块分发到进程池，每个网格单元用 (种子, 单元序号)
+派生独立的随机数流，结果与进程数、完成顺序无关，可以复现。
+每完成一块就把结果写入 CSV 或 JSON Lines，扫描中途也能查看已有结果。
+
+用法（在项目根目录运行）：
+    python balance_sweep.py --levels 1-10 --battles 5000 -o sweep.csv
+    python balance_sweep.py --enemies 强盗 石巨人 --loadouts single --format jsonl
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+import constants as cs
+import load_datas
+import simulator
+from character import Character
+
+EQUIP_SLOTS = ("weapon", "armor", "helmet", "accessory")
+
+COLUMNS = (
+    "enemy", "level", "loadout", "battles", "win_rate", "wins", "losses", "timeouts",
+    "mean_rounds_to_kill", "mean_rounds", "mean_hp_left", "expected_exp", "expected_gold",
+)
+
+# ----- 网格 -----
+
+def parse_levels(text):
+    """'1-5,8,10' -> [1, 2, 3, 4, 5, 8, 10]"""
+    levels = set()
+    for part in text.split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            levels.update(range(int(lo), int(hi) + 1))
+        elif part:
+            levels.add(int(part))
+    return sorted(levels)
+
+def build_loadouts(equipments, mode="product"):
+    """装备组合，每个组合是装备名的元组
+
+    none: 只有空手一种
+    single: 空手，加上每件装备单独穿戴
+    product: 每个部位从（不穿, 该部位任一装备）中选一件的全部组合
+    """
+    if mode == "none":
+        return [()]
+    if mode == "single":
+        return [()] + [(e.name,) for e in equipments]
+
+    by_slot = {}
+    for equip in equipments:
+        by_slot.setdefault(equip.equip_type, []).append(equip.name)
+    slots = [s for s in EQUIP_SLOTS if s in by_slot] + [s for s in by_slot if s not in EQUIP_SLOTS]
+    choices = [[None] + by_slot[slot] for slot in slots]
+    return [tuple(name for name in combo if name) for combo in itertools.product(*choices)]
+
+def build_grid(enemy_names, levels, loadouts):
+    """网格单元列表：(单元序号, 敌人名, 等级, 装备组合)"""
+    cells = itertools.product(enemy_names, levels, loadouts)
+    return [(idx, enemy, level, loadout) for idx, (enemy, level, loadout) in enumerate(cells)]
+
+def chunked(cells, chunk_size):
+    for start in range(0, len(cells), chunk_size):
+        yield cells[start:start + chunk_size]
+
+# ----- 工作进程 -----
+
+_worker = {}
+
+def _init_worker(equipments_path, battles, seed, options):
+    _worker["equip_map"] = {e.name: e for e in load_datas.load_equipment_from_toml(equipments_path)}
+    _worker["battles"] = battles
+    _worker["seed"] = seed
+    _worker["options"] = options
+
+def make_player(level, loadout, equip_map):
+    """按新游戏的初始角色升到指定等级并穿上装备，满血满蓝"""
+    player = Character("冒险者", 100, 30, 10, 5, level=1, exp=0, game_skills_ref=cs.ALL_SKILLS)
+    player.skills.extend(cs.ALL_SKILLS[:2])
+    player.advance_levels(level - 1, details=False)
+    for name in loadout:
+        player.equip(equip_map[name])
+    player.hp = player.max_hp
+    player.mp = player.max_mp
+    return player
+
+def run_cell(cell):
+    idx, enemy_name, level, loadout = cell
+    player = make_player(level, loadout, _worker["equip_map"])
+    rng = np.random.default_rng([_worker["seed"], idx])
+    result = simulator.simulate(player, cs.game_data["enemy_map"][enemy_name],
+                                n=_worker["battles"], rng=rng, **_worker["options"])
+    result.update(level=level, loadout="+".join(loadout) or "-")
+    return idx, result
+
+def run_chunk(chunk):
+    return [run_cell(cell) for cell in chunk]
+
+# ----- 输出 -----
+
+class CsvSink:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=COLUMNS + ("drop_rates",), extrasaction="ignore")
+        self.writer.writeheader()
+        self.stream = stream
+
+    def write(self, idx, result):
+        row = dict(result, drop_rates=json.dumps(result["drop_rates"], ensure_ascii=False))
+        self.writer.writerow(row)
+        self.stream.flush()
+
+class JsonLinesSink:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, idx, result):
+        row = {key: result[key] for key in COLUMNS}
+        row["drop_rates"] = result["drop_rates"]
+        row["cell"] = idx
+        self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+SINKS = {"csv": CsvSink, "jsonl": JsonLinesSink}
+
+# ----- 入口 -----
+
+def sweep(cells, sink, equipments_path, battles, seed, options, workers=None, chunk_size=8, progress=None):
+    """把网格分块交给进程池，按完成顺序写入 sink，返回完成的单元数"""
+    done = 0
+    initargs = (equipments_path, battles, seed, options)
+    if workers == 1:
+        _init_worker(*initargs)
+        results = map(run_chunk, chunked(cells, chunk_size))
+        pool = None
+    else:
+        pool = Pool(workers, initializer=_init_worker, initargs=initargs)
+        results = pool.imap_unordered(run_chunk, chunked(cells, chunk_size))
+    try:
+        for chunk_results in results:
+            for idx, result in chunk_results:
+                sink.write(idx, result)
+            done += len(chunk_results)
+            if progress:
+                progress(done, len(cells))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return done
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="敌人 × 等级 × 装备组合的平衡性扫描")
+    parser.add_argument("--enemies", nargs="*", help="只扫描这些敌人（默认全部）")
+    parser.add_argument("--levels", default="1-10", help="玩家等级，如 1-10 或 1,3,5（默认 1-10）")
+    parser.add_argument("--loadouts", choices=("product", "single", "none"), default="product",
+                        help="装备组合方式（默认 product：每个部位任选一件或不穿）")
+    parser.add_argument("--equipments", default="Data/equipments.toml", help="装备数据文件")
+    parser.add_argument("--battles", type=int, default=2000, help="每个网格单元模拟的战斗场数")
+    parser.add_argument("--policy", choices=("basic", "greedy"), default="greedy", help="玩家出招策略")
+    parser.add_argument("--max-rounds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数，1 表示不开进程池）")
+    parser.add_argument("--chunk-size", type=int, default=8, help="每个工作块包含的网格单元数")
+    parser.add_argument("--format", choices=tuple(SINKS), default="csv")
+    parser.add_argument("-o", "--output", help="输出文件（默认标准输出）")
+    args = parser.parse_args(argv)
+
+    enemy_names = args.enemies or [e.name for e in cs.ALL_ENEMIES]
+    unknown = [name for name in enemy_names if name not in cs.game_data["enemy_map"]]
+    if unknown:
+        parser.error(f"未知敌人: {', '.join(unknown)}")
+
+    equipments = load_datas.load_equipment_from_toml(args.equipments)
+    cells = build_grid(enemy_names, parse_levels(args.levels), build_loadouts(equipments, args.loadouts))
+    options = {"player_policy": args.policy, "max_rounds": args.max_rounds}
+
+    stream = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} 个单元", end="", file=sys.stderr, flush=True)
+
+    try:
+        sink = SINKS[args.format](stream)
+        sweep(cells, sink, args.equipments, args.battles, args.seed, options,
+              workers=args.workers, chunk_size=args.chunk_size, progress=progress)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    workers = args.workers or os.cpu_count()
+    print(f"\n完成 {len(cells)} 个单元，{workers} 个进程，用时 {time.perf_counter() - start:.1f} 秒", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
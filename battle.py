@@ -0,0 +1,390 @@
+import random
+from collections import Counter
+
+from enemies import EnemyPool
+from enemy_ai import SearchLog
+from status_effects import STATUS_EFFECT_TYPES, StatusEffect, effect_for_skill
+
+class BattleEngine:
+    """不依赖 pygame 的战斗逻辑
+
+    负责回合结算、技能与物品效果、状态效果、敌人行动和战利品。
+    RPGGame 通过它驱动战斗并负责界面状态切换；测试、工具和服务端
+    可以直接创建 BattleEngine，以 CPU 全速运行战斗。
+
+    一场战斗可以有一组敌人：enemies 为全部敌人（含已倒下的），enemy 为玩家
+    当前的目标，目标倒下后自动换成下一个存活的敌人。范围技能（target 为
+    "all_enemies"）在一次遍历中结算整组的伤害、状态效果与倒下。
+
+    outcome: None（进行中）、"victory"、"defeat"、"escaped"
+    """
+    def __init__(self, player=None, on_message=None, rng=None, ai_rng=None, enemy_pool=None):
+        self.player = player
+        self.enemies = []
+        self.enemy = None
+        self.turn = "player"
+        self.turn_count = 0
+        self.outcome = None
+        self.rewards = {"exp": 0, "gold": 0, "items": []}
+        self.on_message = on_message or (lambda message: None)
+        self.rng = rng or random          # 随机装备、逃跑、掉落
+        self.ai_rng = ai_rng or self.rng  # 敌人出招
+        self.enemy_pool = enemy_pool or EnemyPool()
+        self.search_log = SearchLog()     # 首领搜索的决策记录，录像用
+
+    # ----- 战斗开始与结束 -----
+
+    def start(self, enemy_templates):
+        """以敌人模板（或模板列表，即一组敌人）开始一场战斗，返回玩家的初始目标
+
+        敌人实例从对象池取得，战斗结束后归还。
+        """
+        self.end()
+        if not isinstance(enemy_templates, (list, tuple)):
+            enemy_templates = [enemy_templates]
+        self.enemies = [self.enemy_pool.acquire(template) for template in enemy_templates]
+        self.enemy = self.enemies[0]
+        self.turn = "player"
+        self.turn_count = 0
+        self.outcome = None
+        self.rewards = {"exp": 0, "gold": 0, "items": []}
+
+        if len(self.enemies) == 1:
+            self.on_message(f"遭遇敌人: {self.enemy.name} (等级 {self.enemy.level})!")
+        else:
+            self._number_duplicates()
+            counts = Counter(template.name for template in enemy_templates)
+            names = "、".join(name if n == 1 else f"{name} ×{n}" for name, n in counts.items())
+            self.on_message(f"遭遇敌人: {names} (共 {len(self.enemies)} 个)!")
+        for enemy in self.enemies:
+            self.try_equip_enemy(enemy)
+        return self.enemy
+
+    def _number_duplicates(self):
+        """同名敌人加上编号（哥布林1、哥布林2），便于在日志和列表中区分"""
+        counts = Counter(enemy.name for enemy in self.enemies)
+        seen = Counter()
+        for enemy in self.enemies:
+            if counts[enemy.name] > 1:
+                seen[enemy.name] += 1
+                enemy.name = f"{enemy.name}{seen[enemy.name]}"
+
+    def end(self):
+        for enemy in self.enemies:
+            self.enemy_pool.release(enemy)
+        self.enemies = []
+        self.enemy = None
+
+    def living_enemies(self):
+        return [enemy for enemy in self.enemies if enemy.hp > 0]
+
+    def select_target(self, index):
+        """玩家选择目标，返回是否成功（只能选存活的敌人）"""
+        if 0 <= index < len(self.enemies) and self.enemies[index].hp > 0:
+            self.enemy = self.enemies[index]
+            return True
+        return False
+
+    def _retarget(self):
+        """目标倒下后换成第一个存活的敌人"""
+        if self.enemy is None or self.enemy.hp <= 0:
+            living = self.living_enemies()
+            if living:
+                self.enemy = living[0]
+
+    def _fallen_message(self, fallen):
+        """一组敌人中有成员倒下时的消息（单个敌人的战斗由胜利消息代替）"""
+        if not fallen or len(self.enemies) == 1:
+            return []
+        names = "、".join(enemy.name for enemy in fallen[:3])
+        if len(fallen) > 3:
+            return [f"{names} 等 {len(fallen)} 个敌人倒下了！"]
+        return [f"{names} 倒下了！"]
+
+    def try_equip_enemy(self, enemy):
+        for entry in getattr(enemy, "potential_equips", []):
+            if self.rng.random() < entry.get("chance", 0.2):
+                equip = entry["equip_obj"]
+                enemy.equip(equip)
+                enemy.gold_reward += equip.price
+                enemy.exp_reward += 25 * enemy.level
+                enemy.hp = enemy.max_hp
+                enemy.mp = enemy.max_mp
+                self.on_message(f"{enemy.name} 装备了 {equip.name}！")
+
+    def victory(self):
+        """全部敌人倒下：经验与金币按整组合计，掉落按成员依次判定"""
+        enemies = self.enemies
+        if len(enemies) == 1:
+            self.on_message(f"你击败了 {enemies[0].name}！")
+        else:
+            self.on_message(f"你击败了全部 {len(enemies)} 个敌人！")
+
+        rng = self.rng
+        self.rewards = {
+            "exp": sum(enemy.exp_reward for enemy in enemies),
+            "gold": sum(enemy.gold_reward for enemy in enemies),
+            "items": [drop["item_obj"] for enemy in enemies for drop in enemy.drop_table
+                      if rng.random() < drop["chance"]],
+        }
+        self.outcome = "victory"
+
+    def defeat(self):
+        self.outcome = "defeat"
+
+    def collect_rewards(self):
+        """把经验与物品交给玩家，返回 (金币, 消息列表)；金币由调用方入账"""
+        rewards = self.rewards
+        msgs = []
+
+        if rewards["exp"]:
+            leveled_up, times, level_up_infos = self.player.gain_exp(rewards["exp"])
+            msgs.append(f"获得了 {rewards['exp']} 经验值。")
+            if leveled_up:
+                for i, info in enumerate(level_up_infos):
+                    msgs.append(f"恭喜！你升到了 {self.player.level - len(level_up_infos) + i + 1} 级！")
+                    msgs.append(f"  生命上限 +{info['hp_increase']}, 法力上限 +{info['mp_increase']}")
+                    msgs.append(f"  攻击 +{info['attack_increase']}, 防御 +{info['defense_increase']}")
+                    msgs.extend([f"  学会了新技能: {s}!" for s in info["learned_skills"]])
+
+        if rewards["gold"]:
+            msgs.append(f"获得了 {rewards['gold']} 金币。")
+
+        # 同一物品合并为一条消息（一组敌人可能掉落很多件）
+        for item, quantity in Counter(rewards["items"]).items():
+            self.player.add_item_to_inventory(item, quantity)
+            msgs.append(f"获得了物品: {item.name}!" if quantity == 1 else f"获得了物品: {item.name} ×{quantity}!")
+
+        return rewards["gold"], msgs
+
+    # ----- 技能与物品效果 -----
+
+    def create_status_effect(self, skill, caster=None):
+        return effect_for_skill(skill, caster)
+
+    def apply_skill_effect(self, caster, target, skill):
+        messages = []
+
+        if caster.mp < skill.mp_cost:
+            return [f"{caster.name} 法力不足，无法使用 {skill.name}!"], False
+
+        caster.use_mp(skill.mp_cost)
+        messages.append(f"{caster.name} 使用了 {skill.name}!")
+
+        # 技能类型处理
+        if skill.skill_type in {"damage", "lifesteal"}:
+            damage = int(caster.attack * skill.damage_multiplier)
+            dealt = target.take_damage(damage)
+            messages.append(f"{target.name} 受到 {dealt} 点伤害。")
+            if skill.skill_type == "lifesteal":
+                healed = caster.heal(int(dealt * skill.effect_value))
+                messages.append(f"{caster.name} 吸取了 {healed} 点生命！")
+
+        elif skill.skill_type == "heal":
+            healed = caster.heal(skill.effect_value)
+            messages.append(f"{caster.name} 恢复了 {healed} 点生命。")
+
+        elif skill.skill_type == "buff_self":
+            effect = self.create_status_effect(skill)
+            caster.add_status_effect(effect)
+            messages.append(f"{caster.name} 获得了 {effect.name} 效果！")
+
+        elif skill.skill_type == "debuff_enemy":
+            effect = self.create_status_effect(skill)
+            target.add_status_effect(effect)
+            messages.append(f"{target.name} 受到 {effect.name} 效果！")
+
+        # 附加状态效果（如燃烧）
+        if skill.status_effect_name and skill.skill_type in ("damage", "debuff_enemy"):
+            effect = self.create_status_effect(skill, caster)
+            target.add_status_effect(effect)
+            messages.append(f"{target.name} 陷入了 {effect.name} 状态！")
+
+        if target is not self.player and target.hp <= 0:
+            messages.extend(self._fallen_message([target]))
+        return messages, True
+
+    def apply_area_skill(self, caster, targets, skill):
+        """范围技能：一次遍历结算所有目标的伤害与状态效果，倒下的敌人合并为一条消息
+
+        只有一个目标时与单体技能完全相同。
+        """
+        if len(targets) == 1:
+            return self.apply_skill_effect(caster, targets[0], skill)
+        if caster.mp < skill.mp_cost:
+            return [f"{caster.name} 法力不足，无法使用 {skill.name}!"], False
+
+        caster.use_mp(skill.mp_cost)
+        messages = [f"{caster.name} 使用了 {skill.name}!"]
+        kind = skill.skill_type
+
+        if kind in {"damage", "lifesteal"}:
+            damage = int(caster.attack * skill.damage_multiplier)
+            total = 0
+            for target in targets:
+                total += target.take_damage(damage)
+            messages.append(f"{len(targets)} 个敌人共受到 {total} 点伤害。")
+            if kind == "lifesteal":
+                healed = caster.heal(int(total * skill.effect_value))
+                messages.append(f"{caster.name} 吸取了 {healed} 点生命！")
+
+        elif kind == "heal":
+            healed = caster.heal(skill.effect_value)
+            messages.append(f"{caster.name} 恢复了 {healed} 点生命。")
+
+        elif kind == "buff_self":
+            effect = self.create_status_effect(skill)
+            caster.add_status_effect(effect)
+            messages.append(f"{caster.name} 获得了 {effect.name} 效果！")
+
+        survivors = [target for target in targets if target.hp > 0]
+        effects = []
+        if kind == "debuff_enemy":
+            effects.append(self.create_status_effect(skill))
+        if skill.status_effect_name and kind in ("damage", "debuff_enemy"):
+            effects.append(self.create_status_effect(skill, caster))
+        for effect in effects:  # 同一个效果模板加给每个存活的目标
+            for target in survivors:
+                target.add_status_effect(effect)
+            if survivors:
+                messages.append(f"{len(survivors)} 个敌人陷入了 {effect.name} 状态！")
+
+        if len(survivors) < len(targets):
+            messages.extend(self._fallen_message([target for target in targets if target.hp <= 0]))
+        return messages, True
+
+    def apply_item_effect(self, item, target):
+        messages = []
+        used = False
+
+        effect_type = item.item_type
+        val = item.effect_value
+
+        if effect_type == "heal_hp":
+            healed = target.heal(val)
+            messages.append(f"{target.name} 恢复了 {healed} 点生命值！")
+            used = True
+        elif effect_type == "heal_mp":
+            restored = target.restore_mp(val)
+            messages.append(f"{target.name} 恢复了 {restored} 点法力值！")
+            used = True
+        elif effect_type in ("buff_attack", "buff_defense"):
+            status = StatusEffect(f"{item.name}",
+                                  "attack_buff" if "attack" in effect_type else "defense_buff",
+                                  val, item.duration, item.description)
+            target.add_status_effect(status)
+            messages.append(f"{target.name} 的{item.name}效果已激活！")
+            used = True
+        elif effect_type == "damage_enemy" and target is not None and target is self.enemy:
+            damage = target.take_damage(val)
+            messages.append(f"{target.name} 受到 {damage} 点伤害！")
+            if target.hp <= 0:
+                messages.extend(self._fallen_message([target]))
+            used = True
+
+        return used, messages
+
+    # ----- 回合流程 -----
+
+    def _emit(self, messages):
+        for msg in messages:
+            self.on_message(msg)
+
+    def after_player_action(self):
+        """玩家行动成功后：敌人全部倒下则胜利，否则轮到敌人"""
+        if not any(enemy.hp > 0 for enemy in self.enemies):
+            self.victory()
+        else:
+            self._retarget()
+            self.turn = "enemy"
+
+    def player_use_skill(self, skill):
+        """玩家使用技能，返回是否成功行动"""
+        if self.outcome or self.turn != "player":
+            return False
+        if skill.target == "all_enemies":
+            msgs, success = self.apply_area_skill(self.player, self.living_enemies(), skill)
+        else:
+            msgs, success = self.apply_skill_effect(self.player, self.enemy, skill)
+        self._emit(msgs)
+        if success:
+            self.after_player_action()
+        return success
+
+    def enemy_turn(self):
+        """敌人回合：存活的敌人依次结算状态效果并行动，最后结算玩家状态效果"""
+        player = self.player
+        if self.outcome or self.turn != "enemy":
+            return
+        living = self.living_enemies()
+        if not living:
+            return
+
+        fallen = []
+        for enemy in living:
+            self._emit(enemy.update_status_effects_at_turn_start())
+            if not enemy.is_alive():
+                fallen.append(enemy)
+                continue
+            skill = enemy.choose_action(player, self.ai_rng, self.search_log)
+            msgs, _ = self.apply_skill_effect(enemy, player, skill)
+            self._emit(msgs)
+            if not player.is_alive():
+                break
+
+        if len(fallen) == len(living):
+            self.victory()
+            return
+        self._emit(self._fallen_message(fallen))
+        self._retarget()
+
+        self.turn_count += 1
+        if not player.is_alive():
+            self.defeat()
+        else:
+            self.turn = "player"
+            self._emit(player.update_status_effects_at_turn_start())
+            if not player.is_alive():
+                self.defeat()
+
+    def ponder(self, budget_ms):
+        """轮到敌人但尚未行动时，让敌人的策略利用等待时间预先思考；返回是否还想继续思考
+
+        一组敌人按行动顺序，把时间交给第一个还想继续思考的成员。
+        """
+        if self.outcome or self.turn != "enemy":
+            return False
+        for enemy in self.living_enemies():
+            if enemy.ponder(self.player, budget_ms):
+                return True
+        return False
+
+    def attempt_escape(self):
+        """尝试逃跑，失败则轮到敌人；返回是否成功"""
+        if self.outcome:
+            return False
+        if self.rng.random() < 0.75:
+            self.on_message("你成功逃离了战斗！")
+            self.outcome = "escaped"
+            return True
+        self.on_message("逃跑失败！")
+        self.turn = "enemy"
+        return False
+
+    def run(self, choose_player_skill=None, max_turns=500):
+        """无界面地把战斗打到结束，返回 outcome（超出回合上限返回 None）
+
+        choose_player_skill(engine) 返回玩家本回合使用的技能，默认总是普通攻击；
+        两者都用不出（如法力不足）时玩家跳过本回合。每次行动都计入上限。
+        """
+        choose_player_skill = choose_player_skill or (lambda engine: engine.player.skills[0])
+        for _ in range(max_turns * 2):
+            if self.outcome is not None or self.turn_count >= max_turns:
+                break
+            if self.turn == "player":
+                if not (self.player_use_skill(choose_player_skill(self))
+                        or self.player_use_skill(self.player.skills[0])):
+                    self.turn = "enemy"
+            else:
+                self.enemy_turn()
+        return self.outcome
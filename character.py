@@ -1,33 +1,16 @@
 import random
 
-class StatusEffect:
-    def __init__(self, name, effect_type, value, duration, description):
-        self.name = name
-        self.effect_type = effect_type  # 'attack_buff', 'damage_over_time', 等
-        self.value = value
-        self.duration = duration
-        self.description = description
-        self.turns_remaining = duration
-
-    def apply_effect_on_turn(self, character):
-        """应用每回合的持续效果"""
-        if self.effect_type == 'damage_over_time':
-            character.hp = max(0, character.hp - self.value)
-            return f"{character.name} 受到 {self.name} 效果，损失 {self.value} 点生命值！"
-        elif self.effect_type == 'heal_over_time':
-            old_hp = character.hp
-            character.heal(self.value)
-            return f"{character.name} 受到 {self.name} 效果，恢复 {character.hp - old_hp} 点生命值！"
-        return ""
-
-    def tick(self):
-        """减少持续回合数，返回是否应移除效果"""
-        if self.duration == -1:  # 永久效果，直到被驱散
-            return False
-        self.turns_remaining -= 1
-        return self.turns_remaining < 0
+import debug
+import enemy_ai
+import progression
+from inventory import Inventory
+from status_effects import StatusEffect, StatusEffects
 
 class Character:
+    __slots__ = ('name', 'hp', 'mp', 'base_max_hp', 'base_max_mp', 'base_attack', 'base_defense',
+                 'level', 'exp', 'exp_to_next_level', 'skills', 'inventory', 'status_effects',
+                 'equipment', 'game_skills_ref', 'stats_version', '_stat_cache')
+
     def __init__(self, name, max_hp, max_mp, attack, defense, level=1, exp=0, game_skills_ref=None):
         self.name = name
         self.hp = max_hp
@@ -40,41 +23,57 @@ class Character:
         self.exp = exp
         self.exp_to_next_level = self.calculate_exp_to_next_level()
         self.skills = []
-        self.inventory = []
-        self.status_effects = []
+        self.inventory = Inventory()
+        self.status_effects = StatusEffects()
         self.equipment = dict.fromkeys(['weapon', 'armor', 'helmet', 'accessory'])
         self.game_skills_ref = game_skills_ref
+        self.stats_version = 0
+        self._stat_cache = {}
+
+    def invalidate_stats(self):
+        """装备、状态效果或基础属性变化后调用，使派生属性缓存失效"""
+        self.stats_version += 1
+        self._stat_cache.clear()
 
     def calculate_exp_to_next_level(self):
-        return int(self.level * 100 * (1 + (self.level - 1) * 0.1))
+        return progression.exp_to_next_level(self.level)
 
     def _calculate_with_equipment_and_effects(self, base, equip_attr, effect_type_pos, effect_type_neg=None):
         total = base
         for item in self.equipment.values():
             if item:
                 total += getattr(item, equip_attr, 0)
-        for effect in self.status_effects:
-            if effect.effect_type == effect_type_pos:
-                total += effect.value
-            elif effect_type_neg and effect.effect_type == effect_type_neg:
-                total -= effect.value
+        total += self.status_effects.total(effect_type_pos)
+        if effect_type_neg:
+            total -= self.status_effects.total(effect_type_neg)
         return max(0, total)
 
+    def _cached_stat(self, key, base, equip_attr, effect_type_pos, effect_type_neg=None):
+        value = self._stat_cache.get(key)
+        if value is None:
+            value = self._calculate_with_equipment_and_effects(base, equip_attr, effect_type_pos, effect_type_neg)
+            self._stat_cache[key] = value
+        elif debug.CHECK_STAT_CACHE:
+            expected = self._calculate_with_equipment_and_effects(base, equip_attr, effect_type_pos, effect_type_neg)
+            if value != expected:
+                raise RuntimeError(f"{self.name} 的 {key} 缓存失效未触发: 缓存 {value}, 实际 {expected}")
+        return value
+
     @property
     def max_hp(self):
-        return self._calculate_with_equipment_and_effects(self.base_max_hp, 'hp_bonus', 'hp_buff')
+        return self._cached_stat('max_hp', self.base_max_hp, 'hp_bonus', 'hp_buff')
 
     @property
     def max_mp(self):
-        return self._calculate_with_equipment_and_effects(self.base_max_mp, 'mp_bonus', 'mp_buff')
+        return self._cached_stat('max_mp', self.base_max_mp, 'mp_bonus', 'mp_buff')
 
     @property
     def attack(self):
-        return self._calculate_with_equipment_and_effects(self.base_attack, 'attack_bonus', 'attack_buff', 'attack_debuff')
+        return self._cached_stat('attack', self.base_attack, 'attack_bonus', 'attack_buff', 'attack_debuff')
 
     @property
     def defense(self):
-        return self._calculate_with_equipment_and_effects(self.base_defense, 'defense_bonus', 'defense_buff', 'defense_debuff')
+        return self._cached_stat('defense', self.base_defense, 'defense_bonus', 'defense_buff', 'defense_debuff')
 
     def take_damage(self, damage):
         actual = max(1, damage - self.defense)
@@ -100,81 +99,72 @@ class Character:
     def is_alive(self):
         return self.hp > 0
 
-    def gain_exp(self, exp_amount):
+    def gain_exp(self, exp_amount, details=True):
+        """获得经验，一次性跨越所有能升的等级
+
+        返回 (是否升级, 升了几级, 每级的升级信息)；details=False 时不生成升级信息（模拟用）。
+        """
         if not self.is_alive():
             return False, 0, []
 
         self.exp += exp_amount
-        leveled_up = 0
-        all_level_ups = []
-
-        while self.exp >= self.exp_to_next_level:
-            self.exp -= self.exp_to_next_level
-            info = self.level_up()
-            all_level_ups.append(info)
-            leveled_up += 1
+        if self.exp < self.exp_to_next_level:
+            return False, 0, []
 
-        return leveled_up > 0, leveled_up, all_level_ups
+        target, self.exp = progression.level_after_exp(self.level, self.exp)
+        levels = target - self.level
+        return True, levels, self.advance_levels(levels, details)
 
     def level_up(self):
-        self.level += 1
-        old_stats = {
-            'hp': self.base_max_hp,
-            'mp': self.base_max_mp,
-            'atk': self.base_attack,
-            'def': self.base_defense
-        }
-
-        self.base_max_hp += int(self.base_max_hp * 0.05) + 10 + self.level
-        self.base_max_mp += int(self.base_max_mp * 0.05) + 5 + self.level // 2
-        self.base_attack += 2 + self.level // 4
-        self.base_defense += 1 + self.level // 5
+        return self.advance_levels(1)[0]
+
+    def advance_levels(self, levels, details=True):
+        """连升 levels 级：属性按预计算的成长曲线一步到位，技能按解锁索引学习"""
+        start = self.level
+        end = start + levels
+        hp_curve = progression.HP_CURVES.curve(self.base_max_hp, start, levels)
+        mp_curve = progression.MP_CURVES.curve(self.base_max_mp, start, levels)
+
+        unlocks = progression.skill_unlock_index(self.game_skills_ref) if self.game_skills_ref else {}
+        known = set(self.skills)
+        infos = []
+        for k in range(1, levels + 1):
+            level = start + k
+            learned = []
+            for skill in unlocks.get(level, ()):
+                if skill not in known:
+                    known.add(skill)
+                    self.skills.append(skill)
+                    learned.append(skill.name)
+            if details:
+                infos.append({
+                    'hp_increase': hp_curve[k] - hp_curve[k - 1],
+                    'mp_increase': mp_curve[k] - mp_curve[k - 1],
+                    'attack_increase': progression.ATTACK_GAINS.func(level),
+                    'defense_increase': progression.DEFENSE_GAINS.func(level),
+                    'learned_skills': learned
+                })
+
+        self.level = end
+        self.base_max_hp = hp_curve[levels]
+        self.base_max_mp = mp_curve[levels]
+        self.base_attack += progression.ATTACK_GAINS.total(start, end)
+        self.base_defense += progression.DEFENSE_GAINS.total(start, end)
+        self.invalidate_stats()
 
         self.hp = self.max_hp
         self.mp = self.max_mp
         self.exp_to_next_level = self.calculate_exp_to_next_level()
-
-        learned = []
-        if self.game_skills_ref:
-            for skill in self.game_skills_ref:
-                if skill.required_level == self.level and skill not in self.skills:
-                    self.skills.append(skill)
-                    learned.append(skill.name)
-
-        return {
-            'hp_increase': self.base_max_hp - old_stats['hp'],
-            'mp_increase': self.base_max_mp - old_stats['mp'],
-            'attack_increase': self.base_attack - old_stats['atk'],
-            'defense_increase': self.base_defense - old_stats['def'],
-            'learned_skills': learned
-        }
+        return infos
 
     def add_status_effect(self, effect_template):
-        existing = next((e for e in self.status_effects if e.name == effect_template.name), None)
-        if existing:
-            existing.turns_remaining = effect_template.duration
-        else:
-            new_effect = StatusEffect(
-                effect_template.name,
-                effect_template.effect_type,
-                effect_template.value,
-                effect_template.duration,
-                effect_template.description
-            )
-            self.status_effects.append(new_effect)
+        if self.status_effects.add(effect_template):
+            self.invalidate_stats()
 
     def update_status_effects_at_turn_start(self):
-        messages = []
-        to_remove = []
-        for effect in self.status_effects:
-            msg = effect.apply_effect_on_turn(self)
-            if msg:
-                messages.append(msg)
-            if effect.duration != -1 and effect.tick():
-                to_remove.append(effect)
-                messages.append(f"{self.name}的 {effect.name} 效果结束了。")
-
-        self.status_effects = [e for e in self.status_effects if e not in to_remove]
+        messages, removed = self.status_effects.start_turn(self)
+        if removed:
+            self.invalidate_stats()
 
         if self.hp <= 0 and self.is_alive():
             self.hp = 0
@@ -182,10 +172,15 @@ class Character:
 
         return messages
 
+    def clear_status_effects(self):
+        self.status_effects.clear()
+        self.invalidate_stats()
+
     def equip(self, item):
         slot = item.equip_type
         old_item = self.unequip(slot)[0] if self.equipment.get(slot) else None
         self.equipment[slot] = item
+        self.invalidate_stats()
         if item in self.inventory:
             self.inventory.remove(item)
         self.hp = min(self.hp, self.max_hp)
@@ -196,6 +191,7 @@ class Character:
         item = self.equipment.get(slot)
         if item:
             self.equipment[slot] = None
+            self.invalidate_stats()
             self.add_item_to_inventory(item)
             self.hp = min(self.hp, self.max_hp)
             self.mp = min(self.mp, self.max_mp)
@@ -203,20 +199,16 @@ class Character:
         return None, "该部位没有装备。"
 
     def add_item_to_inventory(self, item, quantity=1):
-        self.inventory.extend([item] * quantity)
-        self.inventory.sort(key=lambda x: x.name)
+        self.inventory.add(item, quantity)
 
     def remove_item_from_inventory(self, item, quantity=1):
-        removed = 0
-        for i in range(len(self.inventory) - 1, -1, -1):
-            if self.inventory[i] is item:
-                del self.inventory[i]
-                removed += 1
-                if removed >= quantity:
-                    break
+        return self.inventory.remove(item, quantity)
 
 class Enemy(Character):
-    def __init__(self, name, max_hp, max_mp, attack, defense, level, exp_reward, gold_reward, skills_refs=None, drop_table=None, description="", potential_equips=None):
+    """战斗中的敌人实例；技能、掉落表等不可变数据与模板共享引用（见 enemies.EnemyTemplate）"""
+    __slots__ = ('exp_reward', 'gold_reward', 'drop_table', 'description', 'potential_equips', 'ai', 'ai_state', 'template')
+
+    def __init__(self, name, max_hp, max_mp, attack, defense, level, exp_reward, gold_reward, skills_refs=None, drop_table=None, description="", potential_equips=None, ai="random"):
         super().__init__(name, max_hp, max_mp, attack, defense, level)
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
@@ -224,22 +216,49 @@ class Enemy(Character):
         self.drop_table = drop_table or []
         self.description = description
         self.potential_equips = potential_equips or []
+        self.ai = ai  # 出招策略名，见 enemy_ai.POLICIES
+        self.ai_state = None  # 策略为该实例保存的状态（如首领的置换表）
+        self.template = None
+
+    def reset(self, template):
+        """按模板重置为满状态（对象池复用实例时调用）"""
+        if template is not self.template:
+            self.ai_state = None  # 同一模板的实例跨战斗保留搜索状态
+        self.template = template
+        self.name = template.name
+        self.level = template.level
+        self.base_max_hp = template.base_max_hp
+        self.base_max_mp = template.base_max_mp
+        self.base_attack = template.base_attack
+        self.base_defense = template.base_defense
+        self.exp_reward = template.exp_reward
+        self.gold_reward = template.gold_reward
+        self.skills = template.skills
+        self.drop_table = template.drop_table
+        self.description = template.description
+        self.potential_equips = template.potential_equips
+        self.ai = template.ai
+        for slot in self.equipment:
+            self.equipment[slot] = None
+        if self.inventory:
+            self.inventory.clear()
+        self.status_effects.clear()
+        self.invalidate_stats()
+        self.hp = self.base_max_hp
+        self.mp = self.base_max_mp
 
-    def choose_action(self, target_player):
-        from data import Skill
-        if self.hp < self.max_hp * 0.3:
-            healing = [s for s in self.skills if s.skill_type == "heal" and s.target == "self" and self.mp >= s.mp_cost]
-            if healing:
-                return random.choice(healing)
-
-        offensives = [s for s in self.skills if s.skill_type != "heal" and self.mp >= s.mp_cost]
-        if offensives and random.random() < 0.7:
-            return random.choice(offensives)
+    def choose_action(self, target_player, rng=random, log=None):
+        """log 为 enemy_ai.SearchLog，记录需要在录像中复现的搜索决策"""
+        return enemy_ai.POLICIES[self.ai].choose(self, target_player, rng, log)
 
-        return next((s for s in self.skills if s.mp_cost == 0), Skill("猛击", 1.2, 0, "敌人胡乱攻击", "damage"))
+    def ponder(self, target_player, budget_ms):
+        """等待行动时预先思考，返回是否还想继续思考"""
+        return enemy_ai.POLICIES[self.ai].ponder(self, target_player, budget_ms)
 
     def clone(self):
-        new_enemy = Enemy(
+        if self.template is not None:
+            return self.template.spawn()
+        return Enemy(
             name=self.name,
             max_hp=self.base_max_hp,
             max_mp=self.base_max_mp,
@@ -248,9 +267,9 @@ class Enemy(Character):
             level=self.level,
             exp_reward=self.exp_reward,
             gold_reward=self.gold_reward,
-            skills_refs=self.skills[:],
-            drop_table=self.drop_table[:],
+            skills_refs=self.skills,  # 只读数据，共享引用
+            drop_table=self.drop_table,
             description=self.description,
-            potential_equips=self.potential_equips[:]
+            potential_equips=self.potential_equips,
+            ai=self.ai,
         )
-        return new_enemy
@@ -1,13 +1,62 @@
+import json
+import os
+
 import pygame
 
 SCREEN_WIDTH, SCREEN_HEIGHT = 960, 720
 
-pygame.font.init()
+# 系统字体名 -> 字体文件路径的缓存文件；查找系统字体要扫描全部字体，很慢
+FONT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".font_cache.json")
+_font_paths = None
+
+def resolve_font_path(name):
+    """与 pygame.font.SysFont 相同的查找，结果写入 FONT_CACHE_PATH，之后启动直接读取
+
+    找不到时返回 None（使用 pygame 默认字体）。删除缓存文件即可重新查找。
+    """
+    global _font_paths
+    if _font_paths is None:
+        try:
+            with open(FONT_CACHE_PATH, encoding="utf-8") as f:
+                _font_paths = json.load(f)
+        except (OSError, ValueError):
+            _font_paths = {}
+
+    path = _font_paths.get(name, "")
+    if path is None or (path and os.path.exists(path)):
+        return path
+
+    path = _font_paths[name] = pygame.font.match_font(name)
+    try:
+        with open(FONT_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(_font_paths, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+    return path
+
+class LazyFont:
+    """第一次使用时才创建的字体，导入本模块不会初始化 pygame.font 或查找系统字体"""
+    __slots__ = ('_name', '_size', '_font')  # 不能用 name/size，会遮住 Font 的同名属性与方法
+
+    def __init__(self, name, size):
+        self._name = name
+        self._size = size
+        self._font = None
+
+    def resolve(self):
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._font = pygame.font.Font(resolve_font_path(self._name), self._size)
+        return self._font
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
 
-FONT_SMALL = pygame.font.SysFont('notosansscblack', 16)
-FONT_MEDIUM = pygame.font.SysFont('notosansscblack', 22)
-FONT_LARGE = pygame.font.SysFont('notosansscblack', 28)
-FONT_TITLE = pygame.font.SysFont('notosansscblack', 38)
+FONT_SMALL = LazyFont('notosansscblack', 16)
+FONT_MEDIUM = LazyFont('notosansscblack', 22)
+FONT_LARGE = LazyFont('notosansscblack', 28)
+FONT_TITLE = LazyFont('notosansscblack', 38)
 
 # 通用颜色定义
 KURO             = "#080808" # 黑
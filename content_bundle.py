@@ -0,0 +1,260 @@
+"""内容编译器：校验 Data/*.toml，写出预解析的二进制内容包
+
+内容包（Data/content.bundle）用 marshal 保存每个源文件解析、补全缺省值之后的
+构造参数，以及编译时源文件的修改时间和大小。load_datas 的加载函数发现内容包
+与源文件一致时直接读取，跳过 TOML 解析；源文件改动过、内容包缺失或格式版本
+不符时退回解析 TOML。
+
+用法（在项目根目录运行）：
+    python content_bundle.py            # 校验并编译 Data/
+    python content_bundle.py --check    # 只校验，不写文件
+"""
+import marshal
+import os
+import sys
+
+BUNDLE_NAME = "content.bundle"
+BUNDLE_VERSION = 2  # 记录的字段变化时递增，旧内容包随之失效
+
+# 源文件名 -> 记录种类（见 load_datas.RECORD_BUILDERS）
+SOURCES = {
+    "skills.toml": "skills",
+    "items.toml": "items",
+    "equipments.toml": "equipments",
+    "enemies.toml": "enemies",
+    "locations.toml": "locations",
+    "shops.toml": "shops",
+}
+
+SKILL_TYPES = {"damage", "lifesteal", "heal", "buff_self", "debuff_enemy"}
+ITEM_TYPES = {"heal_hp", "heal_mp", "buff_attack", "buff_defense", "cure_status", "damage_enemy"}
+EQUIP_TYPES = {"weapon", "armor", "helmet", "accessory"}
+TARGETS = {None, "self", "enemy", "all_enemies"}
+AI_POLICIES = {"random", "lookahead"}  # 见 enemy_ai.POLICIES
+
+class ContentError(ValueError):
+    """内容数据校验失败"""
+
+# ----- 读取 -----
+
+_loaded = {}  # 内容包路径 -> (文件签名, 内容)
+
+def bundle_path(data_dir):
+    return os.path.join(data_dir, BUNDLE_NAME)
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+def _read_bundle(path):
+    try:
+        signature = _signature(path)
+    except OSError:
+        return None
+    cached = _loaded.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    try:
+        with open(path, "rb") as f:
+            bundle = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(bundle, dict) or bundle.get("version") != BUNDLE_VERSION:
+        return None
+    _loaded[path] = (signature, bundle)
+    return bundle
+
+def load_records(source_path, kind):
+    """内容包中 source_path 的构造参数；内容包缺失、过期或不含该文件时返回 None"""
+    bundle = _read_bundle(bundle_path(os.path.dirname(source_path)))
+    if bundle is None:
+        return None
+    entry = bundle["sources"].get(os.path.basename(source_path))
+    if entry is None or entry["kind"] != kind:
+        return None
+    try:
+        if tuple(entry["signature"]) != _signature(source_path):
+            return None
+    except OSError:
+        return None
+    return entry["records"]
+
+def is_fresh(data_dir="Data"):
+    """内容包是否覆盖了全部源文件且都未改动"""
+    for name, kind in SOURCES.items():
+        source = os.path.join(data_dir, name)
+        if os.path.exists(source) and load_records(source, kind) is None:
+            return False
+    return True
+
+# ----- 编译 -----
+
+def _plain(value):
+    """把 toml 返回的字典/列表子类转换为 marshal 支持的内置类型"""
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+def _check(errors, source, i, record, field, allowed):
+    if record.get(field) not in allowed:
+        errors.append(f"{source} 第 {i + 1} 条 {record.get('name')!r}: {field} = {record.get(field)!r} 无效")
+
+def _check_numbers(errors, source, i, record, fields):
+    for field in fields:
+        value = record.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            errors.append(f"{source} 第 {i + 1} 条 {record.get('name')!r}: {field} 应为数字")
+
+def _check_group_size(errors, source, i, record):
+    size = record.get("group_size", [1, 1])
+    if not (isinstance(size, list) and len(size) == 2
+            and all(isinstance(n, int) and not isinstance(n, bool) for n in size) and 1 <= size[0] <= size[1]):
+        errors.append(f"{source} 第 {i + 1} 条 {record.get('name')!r}: group_size = {size!r} 应为 [最少, 最多]")
+
+# 记录种类 -> 名称空间；物品与装备同在背包中，名称也不能重复（商店、掉落和背包都按名称引用）
+NAMESPACES = {
+    "skills": "skills",
+    "items": "goods",
+    "equipments": "goods",
+    "enemies": "enemies",
+    "locations": "locations",
+    "shops": "shops",
+}
+
+def _check_refs(errors, source, i, record, field, names, namespace, kinds=None):
+    """record[field] 中按名称的引用必须存在（kinds 限定被引用条目的种类）"""
+    value = record.get(field)
+    refs = value if isinstance(value, list) else [value]
+    for ref in refs:
+        name = ref["item"] if isinstance(ref, dict) else ref
+        if name is None:
+            continue
+        target = names.get((namespace, name))
+        if target is None or (kinds and target[1] not in kinds):
+            errors.append(f"{source} 第 {i + 1} 条 {record.get('name')!r}: {field} 引用了不存在的 {name!r}")
+
+def validate(records_by_source):
+    """校验全部记录，返回错误信息列表
+
+    检查字段取值和数值类型、同一名称空间内名称唯一，以及敌人、地点、商店
+    对技能、物品、装备、敌人、商店的名称引用都能解析。
+    """
+    errors = []
+    names = {}  # (名称空间, 名称) -> (首次出现的位置, 记录种类)
+    for source, (kind, records) in records_by_source.items():
+        for i, r in enumerate(records):
+            if kind == "skills":
+                _check(errors, source, i, r, "skill_type", SKILL_TYPES)
+                _check(errors, source, i, r, "target", TARGETS)
+                _check_numbers(errors, source, i, r, ("damage_multiplier", "mp_cost", "effect_value",
+                                                      "required_level", "effect_duration"))
+            elif kind == "items":
+                _check(errors, source, i, r, "item_type", ITEM_TYPES)
+                _check(errors, source, i, r, "target", TARGETS)
+                _check_numbers(errors, source, i, r, ("effect_value", "price", "duration"))
+            elif kind == "equipments":
+                _check(errors, source, i, r, "equip_type", EQUIP_TYPES)
+                _check_numbers(errors, source, i, r, ("attack_bonus", "defense_bonus", "hp_bonus",
+                                                      "mp_bonus", "price"))
+            elif kind == "enemies":
+                _check(errors, source, i, r, "ai", AI_POLICIES)
+                _check_numbers(errors, source, i, r, ("max_hp", "max_mp", "attack", "defense", "level",
+                                                      "exp_reward", "gold_reward"))
+            elif kind == "locations":
+                _check_numbers(errors, source, i, r, ("elite_chance",))
+                _check_group_size(errors, source, i, r)
+            elif kind == "shops":
+                _check_numbers(errors, source, i, r, ("sell_modifier",))
+
+            key = (NAMESPACES[kind], r["name"])
+            if key in names:
+                errors.append(f"{source} 第 {i + 1} 条: 名称 {r['name']!r} 与 {names[key][0]} 重复")
+            else:
+                names[key] = (f"{source} 第 {i + 1} 条", kind)
+
+    # 名称全部登记后再检查引用
+    for source, (kind, records) in records_by_source.items():
+        for i, r in enumerate(records):
+            if kind == "enemies":
+                _check_refs(errors, source, i, r, "skills", names, "skills")
+                _check_refs(errors, source, i, r, "drops", names, "goods")
+                _check_refs(errors, source, i, r, "equips", names, "goods", kinds=("equipments",))
+            elif kind == "locations":
+                _check_refs(errors, source, i, r, "enemies", names, "enemies")
+                _check_refs(errors, source, i, r, "shop", names, "shops")
+            elif kind == "shops":
+                _check_refs(errors, source, i, r, "items", names, "goods", kinds=("items",))
+                _check_refs(errors, source, i, r, "equipments", names, "goods", kinds=("equipments",))
+    return errors
+
+def compile_bundle(data_dir="Data", write=True):
+    """解析并校验 data_dir 下的源文件，写出内容包；校验失败时抛出 ContentError"""
+    import toml
+    import load_datas
+
+    records_by_source = {}
+    signatures = {}
+    for name, kind in SOURCES.items():
+        source = os.path.join(data_dir, name)
+        if not os.path.exists(source):
+            continue
+        signatures[name] = _signature(source)
+        try:
+            records = load_datas.RECORD_BUILDERS[kind](_plain(toml.load(source)))
+        except toml.TomlDecodeError as e:
+            raise ContentError(f"{source}: {e}") from e
+        except KeyError as e:
+            raise ContentError(f"{source}: 缺少字段 {e}") from e
+        records_by_source[name] = (kind, records)
+
+    errors = validate(records_by_source)
+    if errors:
+        raise ContentError("内容校验失败:\n" + "\n".join(errors))
+
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "sources": {
+            name: {"kind": kind, "signature": list(signatures[name]), "records": records}
+            for name, (kind, records) in records_by_source.items()
+        },
+    }
+    if write:
+        path = bundle_path(data_dir)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            marshal.dump(bundle, f)
+        os.replace(tmp, path)
+    return bundle
+
+def ensure_bundle(data_dir="Data"):
+    """内容包过期时重新编译；目录不可写时保持原样（加载时会退回解析 TOML）"""
+    if is_fresh(data_dir):
+        return False
+    try:
+        compile_bundle(data_dir)
+    except OSError:
+        return False
+    return True
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="校验并编译游戏内容")
+    parser.add_argument("data_dir", nargs="?", default="Data")
+    parser.add_argument("--check", action="store_true", help="只校验，不写内容包")
+    args = parser.parse_args(argv)
+
+    try:
+        bundle = compile_bundle(args.data_dir, write=not args.check)
+    except ContentError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for name, entry in bundle["sources"].items():
+        print(f"{name}: {len(entry['records'])} 条")
+    if not args.check:
+        print(f"已写入 {bundle_path(args.data_dir)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
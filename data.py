@@ -1,15 +1,42 @@
 
+# 内容对象基类：使用 __slots__ 节省内存，构造完成后只读（可在多个角色之间安全共享）
+class FrozenContent:
+    __slots__ = ()
+
+    def _init_fields(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 是只读内容对象，不能修改属性 {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} 是只读内容对象，不能删除属性 {name}")
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        self._init_fields(**state)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
 # 装备类
-class Equipment:
+class Equipment(FrozenContent):
+    __slots__ = ('name', 'equip_type', 'attack_bonus', 'defense_bonus', 'hp_bonus', 'mp_bonus', 'description', 'price')
+
     def __init__(self, name, equip_type, attack_bonus, defense_bonus, hp_bonus, mp_bonus, description, price=0):
-        self.name = name
-        self.equip_type = equip_type  # 'weapon', 'armor', 'helmet', 'accessory'
-        self.attack_bonus = attack_bonus
-        self.defense_bonus = defense_bonus
-        self.hp_bonus = hp_bonus
-        self.mp_bonus = mp_bonus
-        self.description = description
-        self.price = price
+        self._init_fields(
+            name=name,
+            equip_type=equip_type,  # 'weapon', 'armor', 'helmet', 'accessory'
+            attack_bonus=attack_bonus,
+            defense_bonus=defense_bonus,
+            hp_bonus=hp_bonus,
+            mp_bonus=mp_bonus,
+            description=description,
+            price=price,
+        )
 
     def __str__(self):
         bonuses = [
@@ -22,30 +49,39 @@ class Equipment:
         return f"{self.name} ({bonus_str})" if bonus_str else self.name
 
 # 技能类
-class Skill:
+class Skill(FrozenContent):
+    __slots__ = ('name', 'damage_multiplier', 'mp_cost', 'description', 'skill_type', 'effect_value',
+                 'required_level', 'target', 'status_effect_name', 'effect_duration')
+
     def __init__(self, name, damage_multiplier, mp_cost, description, skill_type="damage",
                  effect_value=0, required_level=1, target="enemy", status_effect=None, effect_duration=0):
-        self.name = name
-        self.damage_multiplier = damage_multiplier
-        self.mp_cost = mp_cost
-        self.description = description
-        self.skill_type = skill_type  # 'damage', 'heal', 'buff_self', 等
-        self.effect_value = effect_value
-        self.required_level = required_level
-        self.target = target  # 'enemy', 'self', 'all_enemies'
-        self.status_effect_name = status_effect
-        self.effect_duration = effect_duration
+        self._init_fields(
+            name=name,
+            damage_multiplier=damage_multiplier,
+            mp_cost=mp_cost,
+            description=description,
+            skill_type=skill_type,  # 'damage', 'heal', 'buff_self', 等
+            effect_value=effect_value,
+            required_level=required_level,
+            target=target,  # 'enemy', 'self', 'all_enemies'
+            status_effect_name=status_effect,
+            effect_duration=effect_duration,
+        )
 
 # 物品类
-class Item:
+class Item(FrozenContent):
+    __slots__ = ('name', 'item_type', 'effect_value', 'description', 'price', 'duration', 'target')
+
     def __init__(self, name, item_type, effect_value, description, price=0, duration=0, target="self"):
-        self.name = name
-        self.item_type = item_type  # 'heal_hp', 'buff_attack', 等
-        self.effect_value = effect_value
-        self.description = description
-        self.price = price
-        self.duration = duration
-        self.target = target
+        self._init_fields(
+            name=name,
+            item_type=item_type,  # 'heal_hp', 'buff_attack', 等
+            effect_value=effect_value,
+            description=description,
+            price=price,
+            duration=duration,
+            target=target,
+        )
 
 class Shop:
     def __init__(self, name, items_for_sale=None, equipments_for_sale=None, sell_modifier=0.5):
@@ -1,6 +1,9 @@
 import os
 
 DEBUG = False
+CHECK_STAT_CACHE = False  # 每次读取派生属性时与重新计算的结果比对
+PROFILE_HUD = False       # 启动时即打开帧耗时 HUD（也可在主菜单点 DEBUG 或按 F3 开关）
+RECORD_REPLAY = False     # 把本次会话的输入录制到 replays/ 下，可用 replay.py 无界面回放
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -0,0 +1,53 @@
+import pygame
+
+class DirtyRectTracker:
+    """记录每帧绘制的区域，与上一帧对比得出需要刷新的矩形
+
+    界面绘制时对每个控件调用 record(矩形, 签名)，签名描述该区域画了什么
+    （文字、颜色、悬停状态等）。帧末 end_frame() 返回签名发生变化的矩形：
+    新出现、消失或内容改变的区域都会被刷新。
+
+    保留模式的界面（见 widgets.Screen）自己知道重画了哪些区域，用 add()
+    直接登记，这些矩形只在本帧刷新，不参与前后帧的对比。
+    """
+    def __init__(self, screen_rect, max_rects=48):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.max_rects = max_rects
+        self.full_redraw = True
+        self._previous = {}
+        self._current = {}
+        self._added = []
+
+    def record(self, rect, signature):
+        key = (rect[0], rect[1], rect[2], rect[3])
+        entry = self._current.get(key)
+        if entry is None:
+            self._current[key] = [signature]
+        else:
+            entry.append(signature)
+
+    def add(self, rect):
+        """直接登记本帧需要刷新的矩形"""
+        self._added.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        """下一帧整屏刷新（状态切换、窗口重绘等）"""
+        self.full_redraw = True
+
+    def end_frame(self):
+        """结束一帧，返回需要 display.update 的矩形列表；返回 None 表示整屏刷新"""
+        previous, current = self._previous, self._current
+        self._previous, self._current = current, {}
+        added, self._added = self._added, []
+
+        if self.full_redraw:
+            self.full_redraw = False
+            return None
+
+        dirty = [
+            pygame.Rect(key) for key in current.keys() | previous.keys()
+            if current.get(key) != previous.get(key)
+        ] + added
+        if len(dirty) > self.max_rects:
+            return None
+        return [rect.clip(self.screen_rect) for rect in dirty]
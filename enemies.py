@@ -0,0 +1,139 @@
+"""敌人模板（享元）与战斗用敌人实例的对象池
+
+EnemyTemplate 是只读的内容对象，技能、掉落表、可能穿戴的装备都是共享的元组；
+registry 中登记的敌人就是模板。每场战斗从 EnemyPool 取一个 Enemy 实例，
+实例只保存生命、法力、装备、状态效果等可变状态，其余字段直接引用模板；
+战斗结束后实例回到池中，下一场战斗按新模板重置后复用。
+
+精英、按等级缩放等派生模板由 EnemyTemplate.variant 生成，并按参数缓存在
+原模板上，同一种变体只生成一次。
+"""
+from character import Enemy
+from data import FrozenContent
+
+# 等级缩放：每差一级，各项按比例增减
+LEVEL_SCALING = {
+    "hp": 0.12,
+    "mp": 0.08,
+    "attack": 0.08,
+    "defense": 0.08,
+    "reward": 0.15,
+}
+
+# 精英：名称前缀与各项倍率
+ELITE_PREFIX = "精英"
+ELITE_SCALING = {
+    "hp": 1.5,
+    "mp": 1.2,
+    "attack": 1.2,
+    "defense": 1.2,
+    "reward": 2.0,
+}
+
+class EnemyTemplate(FrozenContent):
+    __slots__ = ('name', 'base_max_hp', 'base_max_mp', 'base_attack', 'base_defense', 'level',
+                 'exp_reward', 'gold_reward', 'skills', 'drop_table', 'description', 'potential_equips',
+                 'ai', 'elite', '_variants')
+
+    def __init__(self, name, max_hp, max_mp, attack, defense, level, exp_reward, gold_reward,
+                 skills_refs=(), drop_table=(), description="", potential_equips=(), ai="random", elite=False):
+        self._init_fields(
+            name=name,
+            base_max_hp=max_hp,
+            base_max_mp=max_mp,
+            base_attack=attack,
+            base_defense=defense,
+            level=level,
+            exp_reward=exp_reward,
+            gold_reward=gold_reward,
+            skills=tuple(skills_refs),
+            drop_table=tuple(drop_table),  # ({"item_obj": 物品, "chance": 概率}, ...)
+            description=description,
+            potential_equips=tuple(potential_equips),  # ({"equip_obj": 装备, "chance": 概率}, ...)
+            ai=ai,
+            elite=elite,
+            _variants={},
+        )
+
+    # 与未穿装备、没有状态效果的 Enemy 相同的属性名，模拟器等可以直接读取
+    @property
+    def max_hp(self):
+        return self.base_max_hp
+
+    @property
+    def max_mp(self):
+        return self.base_max_mp
+
+    @property
+    def attack(self):
+        return self.base_attack
+
+    @property
+    def defense(self):
+        return self.base_defense
+
+    def spawn(self):
+        """不经对象池，直接生成一个满状态的实例"""
+        enemy = Enemy(self.name, self.base_max_hp, self.base_max_mp, self.base_attack, self.base_defense,
+                      self.level, self.exp_reward, self.gold_reward)
+        enemy.reset(self)
+        return enemy
+
+    def clone(self):
+        return self.spawn()
+
+    def variant(self, level=None, elite=False):
+        """派生模板：缩放到 level 级和/或精英化；按参数缓存，参数与本模板相同时返回自身"""
+        if level is None:
+            level = self.level
+        if level == self.level and elite == self.elite:
+            return self
+        key = (level, elite)
+        variant = self._variants.get(key)
+        if variant is None:
+            variant = self._variants[key] = self._scaled(level, elite)
+        return variant
+
+    def _scaled(self, level, elite):
+        diff = level - self.level
+        factors = {stat: max(0.2, 1 + rate * diff) for stat, rate in LEVEL_SCALING.items()}
+        if elite and not self.elite:
+            for stat, rate in ELITE_SCALING.items():
+                factors[stat] *= rate
+
+        def scale(value, stat, minimum=0):
+            return max(minimum, round(value * factors[stat]))
+
+        return EnemyTemplate(
+            ELITE_PREFIX + self.name if elite and not self.elite else self.name,
+            scale(self.base_max_hp, "hp", 1), scale(self.base_max_mp, "mp"),
+            scale(self.base_attack, "attack"), scale(self.base_defense, "defense"),
+            level, scale(self.exp_reward, "reward"), scale(self.gold_reward, "reward"),
+            self.skills, self.drop_table, self.description, self.potential_equips,
+            ai=self.ai, elite=elite or self.elite,
+        )
+
+class EnemyPool:
+    """战斗用 Enemy 实例的对象池
+
+    acquire 按模板取一个满状态的实例，release 归还；池中最多保留 limit 个空闲实例。
+    传给 acquire 的若是 Enemy 实例（旧用法，把 Enemy 当模板），退回 clone。
+    """
+    def __init__(self, limit=8):
+        self.limit = limit
+        self._free = []
+        self.created = 0  # 累计新建的实例数
+
+    def acquire(self, template):
+        if not isinstance(template, EnemyTemplate):
+            return template.clone()
+        if self._free:
+            enemy = self._free.pop()
+            enemy.reset(template)
+            return enemy
+        self.created += 1
+        return template.spawn()
+
+    def release(self, enemy):
+        if enemy.template is not None and len(self._free) < self.limit:
+            self._free.append(enemy)
@@ -0,0 +1,376 @@
+"""敌人出招策略
+
+Enemy.choose_action 把出招交给策略对象，敌人在 enemies.toml 中用 ai = "..." 指定：
+    random     默认策略（原先的规则）：残血时优先自我治疗，否则 70% 概率随机用一个
+               攻击/辅助技能，再否则用不耗法力的技能
+    lookahead  首领用的期望极大搜索（expectimax）：敌人取期望最优的技能，玩家视为
+               在能用的技能中等概率出招，向前推演若干回合
+
+策略对象提供：
+    choose(enemy, player, rng, log=None)
+                                    返回本回合使用的技能；log 为 SearchLog（可选）
+    ponder(enemy, player, budget)   敌人回合开始前的等待期间预先思考 budget 毫秒，
+                                    返回是否还想继续思考（默认策略不需要）
+"""
+import time
+
+from data import Skill
+from status_effects import effect_for_skill
+
+# 没有能用的技能时的兜底攻击
+FALLBACK_SKILL = Skill("猛击", 1.2, 0, "敌人胡乱攻击", "damage")
+
+class RandomPolicy:
+    def __init__(self):
+        self._partitions = {}  # 技能元组 -> (自我治疗技能, 其他技能, 兜底技能)
+
+    def _partition(self, skills):
+        key = tuple(skills)
+        entry = self._partitions.get(key)
+        if entry is None:
+            healing = [s for s in skills if s.skill_type == "heal" and s.target == "self"]
+            offensives = [s for s in skills if s.skill_type != "heal"]
+            fallback = next((s for s in skills if s.mp_cost == 0), FALLBACK_SKILL)
+            entry = self._partitions[key] = (healing, offensives, fallback)
+        return entry
+
+    def choose(self, enemy, player, rng, log=None):
+        healing, offensives, fallback = self._partition(enemy.skills)
+        mp = enemy.mp
+        if enemy.hp < enemy.max_hp * 0.3:
+            usable = [s for s in healing if mp >= s.mp_cost]
+            if usable:
+                return rng.choice(usable)
+
+        usable = [s for s in offensives if mp >= s.mp_cost]
+        if usable and rng.random() < 0.7:
+            return rng.choice(usable)
+        return fallback
+
+    def ponder(self, enemy, player, budget_ms):
+        return False
+
+# ----- 期望极大搜索 -----
+
+# 推演用的战斗状态：每一方为 (生命, 法力, 状态效果)，
+# 状态效果为 ((名称, 类型, 数值, 剩余回合), ...)，永久效果的剩余回合为 None。
+# 状态只含会随回合变化的量，可以直接作为置换表的键。
+
+KIND_DAMAGE, KIND_LIFESTEAL, KIND_HEAL, KIND_OTHER = range(4)
+_KINDS = {"damage": KIND_DAMAGE, "lifesteal": KIND_LIFESTEAL, "heal": KIND_HEAL}
+
+WIN = 1000.0  # 击倒玩家；越早击倒分越高
+
+class _OutOfTime(Exception):
+    pass
+
+class _Move:
+    """技能在推演中的效果（与 BattleEngine.apply_skill_effect 的结算规则一致）"""
+    __slots__ = ('skill', 'mp_cost', 'kind', 'mult', 'value', 'self_effects', 'target_effects', 'caster_effect')
+
+    def __init__(self, skill):
+        self.skill = skill
+        self.mp_cost = skill.mp_cost or 0
+        self.kind = _KINDS.get(skill.skill_type, KIND_OTHER)
+        self.mult = skill.damage_multiplier or 0
+        self.value = skill.effect_value or 0
+        self.self_effects = ()
+        self.target_effects = ()
+        self.caster_effect = None  # 附带状态的数值取决于施放者攻击力，推演时按当时的攻击力计算
+        if skill.skill_type == "buff_self":
+            self.self_effects = (_spec(effect_for_skill(skill)),)
+        elif skill.skill_type == "debuff_enemy":
+            self.target_effects = (_spec(effect_for_skill(skill)),)
+        if skill.status_effect_name and skill.skill_type in ("damage", "debuff_enemy"):
+            self.caster_effect = _spec(effect_for_skill(skill))
+
+def _spec(effect):
+    return effect.name, effect.effect_type, effect.value, effect.duration
+
+class _Side:
+    """一方在推演中不变的参数：不计状态效果的攻防与生命上限，以及可用技能"""
+    __slots__ = ('attack', 'defense', 'max_hp', 'moves')
+
+    def __init__(self, character, skills):
+        equips = [e for e in character.equipment.values() if e]
+        self.attack = character.base_attack + sum(e.attack_bonus for e in equips)
+        self.defense = character.base_defense + sum(e.defense_bonus for e in equips)
+        self.max_hp = character.max_hp
+        self.moves = [_Move(skill) for skill in skills]
+
+    def signature(self):
+        return self.attack, self.defense, self.max_hp, tuple(m.skill for m in self.moves)
+
+def battle_state(character):
+    effects = tuple((e.name, e.effect_type, e.value, None if e.duration == -1 else e.turns_remaining)
+                    for e in character.status_effects)
+    return character.hp, character.mp, effects
+
+def _stat(base, effects, positive, negative):
+    total = base
+    for _, kind, value, _ in effects:
+        if kind == positive:
+            total += value
+        elif kind == negative:
+            total -= value
+    return max(0, total)
+
+def _add_effect(effects, spec):
+    name, kind, value, duration = spec
+    for i, (other, other_kind, other_value, remaining) in enumerate(effects):
+        if other == name:  # 同名效果只刷新剩余回合
+            if remaining is None:
+                return effects
+            return effects[:i] + ((name, other_kind, other_value, duration),) + effects[i + 1:]
+    return effects + ((name, kind, value, None if duration == -1 else duration),)
+
+def _turn_start(state, max_hp):
+    """回合开始：结算持续伤害/治疗，剩余回合减一并移除到期效果"""
+    hp, mp, effects = state
+    if not effects:
+        return state
+    kept = []
+    for effect in effects:
+        name, kind, value, remaining = effect
+        if kind == "damage_over_time":
+            hp = max(0, hp - value)
+        elif kind == "heal_over_time":
+            hp = min(max_hp, hp + value)
+        if remaining is None:
+            kept.append(effect)
+        elif remaining > 0:
+            kept.append((name, kind, value, remaining - 1))
+    return hp, mp, tuple(kept)
+
+def _apply(move, caster, target, caster_side, target_side):
+    """caster 对 target 使用 move，返回 (施放者状态, 目标状态)"""
+    hp, mp, effects = caster
+    target_hp, target_mp, target_effects = target
+    mp -= move.mp_cost
+    attack = _stat(caster_side.attack, effects, "attack_buff", "attack_debuff")
+    if move.kind == KIND_DAMAGE or move.kind == KIND_LIFESTEAL:
+        defense = _stat(target_side.defense, target_effects, "defense_buff", "defense_debuff")
+        dealt = max(1, int(attack * move.mult) - defense)
+        target_hp = max(0, target_hp - dealt)
+        if move.kind == KIND_LIFESTEAL:
+            hp = min(caster_side.max_hp, hp + int(dealt * move.value))
+    elif move.kind == KIND_HEAL:
+        hp = min(caster_side.max_hp, hp + move.value)
+    for spec in move.self_effects:
+        effects = _add_effect(effects, spec)
+    for spec in move.target_effects:
+        target_effects = _add_effect(target_effects, spec)
+    if move.caster_effect:
+        name, kind, _, duration = move.caster_effect
+        value = move.value or int(attack * 0.2)
+        target_effects = _add_effect(target_effects, (name, kind, value, duration))
+    return (hp, mp, effects), (target_hp, target_mp, target_effects)
+
+class SearchLog:
+    """首领搜索的决策记录，保证录像回放得到同样的出招
+
+    LookaheadPolicy.choose 每调用一次算一次决策，按顺序编号。搜索总是推演到
+    固定深度，结果只取决于战斗状态；时间上限只是保险，一旦触发、以较浅的深度
+    出招，就把 (决策序号, 完成的深度) 记到 capped 并交给 on_capped（录制时写进
+    录像）。回放时传入录下的 capped 并令 timed=False：这些决策按同样的深度搜索，
+    其余决策照常搜满，与机器快慢无关。
+    """
+    def __init__(self, capped=None, timed=True):
+        self.decisions = 0
+        self.capped = dict(capped or {})  # 决策序号 -> 完成的深度
+        self.timed = timed                # 是否启用时间上限
+        self.on_capped = None
+
+    def next_decision(self):
+        decision = self.decisions
+        self.decisions += 1
+        return decision
+
+    def record(self, decision, depth):
+        self.capped[decision] = depth
+        if self.on_capped:
+            self.on_capped(decision, depth)
+
+class LookaheadPolicy:
+    """带置换表、迭代加深的期望极大搜索（策略本身无状态）
+
+    深度为推演的敌人回合数，每次决策都搜到 max_depth。搜索状态（置换表、当前
+    局面已完成的深度）按敌人实例保存在 Enemy.ai_state 上，见 LookaheadSearch，
+    同一场战斗里的多个首领、先后遇到的不同首领互不干扰。
+
+    time_limit_ms 只是防止卡死的保险：超过时放弃正在搜索的一层，使用上一层的
+    结果，并记入 SearchLog。推演只模拟技能和状态效果，不考虑玩家使用物品；
+    敌人真正的行动仍由 BattleEngine 结算。
+    """
+    def __init__(self, max_depth=3, time_limit_ms=250, table_limit=200_000):
+        self.max_depth = max_depth
+        self.time_limit_ms = time_limit_ms
+        self.table_limit = table_limit
+        self.fallback = RandomPolicy()  # 一层都没搜完时使用
+
+    def search_for(self, enemy):
+        search = enemy.ai_state
+        if search is None:
+            search = enemy.ai_state = LookaheadSearch(self.max_depth, self.table_limit)
+        return search
+
+    # ----- 对外接口 -----
+
+    def choose(self, enemy, player, rng, log=None):
+        search = self.search_for(enemy)
+        search.prepare(enemy, player, battle_state(enemy), battle_state(player))
+        depth, timed, decision = self.max_depth, True, None
+        if log is not None:
+            decision = log.next_decision()
+            depth = log.capped.get(decision, depth)
+            timed = log.timed
+        deadline = time.perf_counter() + self.time_limit_ms / 1000 if timed else None
+        reached = search.deepen(depth, deadline)
+        if reached < depth and log is not None:
+            log.record(decision, reached)
+        move = search.best(reached)
+        if move is None:
+            return self.fallback.choose(enemy, player, rng)
+        return move.skill
+
+    def ponder(self, enemy, player, budget_ms):
+        # 敌人行动前还要结算自身的状态效果，按结算后的状态思考。
+        # 预先思考只是提前填好置换表，不影响最终出招
+        enemy_state = _turn_start(battle_state(enemy), enemy.max_hp)
+        if enemy_state[0] <= 0:
+            return False
+        search = self.search_for(enemy)
+        search.prepare(enemy, player, enemy_state, battle_state(player))
+        return search.deepen(self.max_depth, time.perf_counter() + budget_ms / 1000) < self.max_depth
+
+class LookaheadSearch:
+    """一个敌人的搜索状态
+
+    置换表以 (剩余深度, 敌人状态, 玩家状态) 为键保存精确的期望值，跨回合、
+    跨战斗复用，双方的攻防、生命上限或技能变化时清空。表中只有精确值，
+    因此某一深度的搜索结果与表里已有什么无关，只取决于战斗状态。
+    """
+    def __init__(self, max_depth, table_limit):
+        self.max_depth = max_depth
+        self.table_limit = table_limit
+        self._signature = None
+        self._table = {}
+        self._root = None        # (敌人状态, 玩家状态)
+        self._root_moves = {}    # 对 _root 已完成的深度 -> 该深度的最优技能
+        self.enemy = self.player = None  # 当前对局双方的 _Side
+        self._fallback_move = None
+        self._deadline = None
+        self.nodes = 0  # 累计展开的节点数（调试、基准用）
+
+    @property
+    def depth(self):
+        """对当前局面已完成的搜索深度"""
+        return len(self._root_moves)
+
+    def best(self, depth):
+        return self._root_moves.get(depth)
+
+    def prepare(self, enemy, player, enemy_state, player_state):
+        enemy_side = _Side(enemy, enemy.skills)
+        player_side = _Side(player, player.skills)
+        signature = (enemy_side.signature(), player_side.signature())
+        if signature != self._signature:
+            self._signature = signature
+            self._table = {}
+            self._root = None
+        self.enemy, self.player = enemy_side, player_side
+        zero_cost = any(m.mp_cost == 0 for m in enemy_side.moves)
+        self._fallback_move = None if zero_cost else _Move(FALLBACK_SKILL)
+
+        root = (enemy_state, player_state)
+        if root != self._root:
+            self._root = root
+            self._root_moves = {}
+            for depth in range(1, self.max_depth + 1):  # 同样的局面之前搜索过
+                move = self._table.get(("best", depth, root))
+                if move is None:
+                    break
+                self._root_moves[depth] = move
+
+    def deepen(self, target_depth, deadline=None):
+        """从已完成的深度继续迭代加深到 target_depth；deadline 为时间上限（None 不限），
+        返回完成的深度（不超过 target_depth）"""
+        self._deadline = deadline
+        enemy_state, player_state = self._root
+        moves = self._enemy_moves(enemy_state)
+        if len(moves) == 1:  # 别无选择，不必搜索
+            self._root_moves = dict.fromkeys(range(1, self.max_depth + 1), moves[0])
+            return target_depth
+        try:
+            while self.depth < target_depth:
+                depth = self.depth + 1
+                values = [self._move_value(move, enemy_state, player_state, depth) for move in moves]
+                move = moves[values.index(max(values))]
+                self._root_moves[depth] = move
+                self._table[("best", depth, self._root)] = move
+        except _OutOfTime:
+            pass
+        if len(self._table) > self.table_limit:
+            self._table = {}
+        return min(self.depth, target_depth)
+
+    def _enemy_moves(self, state):
+        moves = [m for m in self.enemy.moves if state[1] >= m.mp_cost]
+        if self._fallback_move and not any(m.mp_cost == 0 for m in moves):
+            moves.append(self._fallback_move)
+        return moves
+
+    def _value(self, enemy_state, player_state, depth):
+        """轮到敌人行动时的期望值"""
+        key = (depth, enemy_state, player_state)
+        value = self._table.get(key)
+        if value is None:
+            value = max(self._move_value(move, enemy_state, player_state, depth)
+                        for move in self._enemy_moves(enemy_state))
+            self._table[key] = value
+        return value
+
+    def _move_value(self, move, enemy_state, player_state, depth):
+        self.nodes += 1
+        if self._deadline is not None and not self.nodes & 63 and time.perf_counter() > self._deadline:
+            raise _OutOfTime
+
+        enemy, player = self.enemy, self.player
+        enemy_state, player_state = _apply(move, enemy_state, player_state, enemy, player)
+        if player_state[0] <= 0:
+            return WIN + depth
+        player_state = _turn_start(player_state, player.max_hp)
+        if player_state[0] <= 0:
+            return WIN + depth
+
+        # 玩家等概率使用任一能用的技能
+        replies = [m for m in player.moves if player_state[1] >= m.mp_cost]
+        if not replies:
+            return self._after_player(enemy_state, player_state, depth)
+        total = 0.0
+        for reply in replies:
+            after_player, after_enemy = _apply(reply, player_state, enemy_state, player, enemy)
+            total += self._after_player(after_enemy, after_player, depth)
+        return total / len(replies)
+
+    def _after_player(self, enemy_state, player_state, depth):
+        enemy = self.enemy
+        if enemy_state[0] <= 0:
+            return -WIN - depth
+        enemy_state = _turn_start(enemy_state, enemy.max_hp)
+        if enemy_state[0] <= 0:
+            return -WIN - depth
+        if depth <= 1:
+            return self._evaluate(enemy_state, player_state)
+        return self._value(enemy_state, player_state, depth - 1)
+
+    def _evaluate(self, enemy_state, player_state):
+        """叶节点估值：双方剩余生命比例之差；敌人剩余法力按等量生命计入，
+        否则搜索到不了的后续回合里治疗技能的价值会被忽略，敌人会过早耗光法力"""
+        return ((enemy_state[0] + enemy_state[1]) / self.enemy.max_hp
+                - player_state[0] / self.player.max_hp)
+
+POLICIES = {
+    "random": RandomPolicy(),
+    "lookahead": LookaheadPolicy(),
+}
@@ -0,0 +1,68 @@
+import pygame
+
+from colors import BTN_GRAY, BTN_GREEN, BTN_ORANGE, BTN_RED_DARK, GINNEZUMI, ONE_DARK, TEXT_LIGHT
+
+class EnemyListSurface:
+    """战斗中一组敌人的紧凑列表（离屏缓存）
+
+    每行一个敌人：目标标记、名称、生命条与数值。只绘制从 offset 开始可见的
+    几行，并记住每一行上次画的内容（名称、生命、生命上限、是否为目标），
+    只重画变化了的行；什么都没变时每帧只需 blit 一次。点击位置按行高直接
+    换算成敌人下标，不必逐行检测。
+    """
+    def __init__(self, ui, width, height, font, background, row_height=24):
+        self.ui = ui
+        self.font = font
+        self.background = background
+        self.row_height = row_height
+        self.rows = height // row_height
+        self.surface = pygame.Surface((width, height))
+        self.surface.fill(background)
+        self.revision = 0   # 缓存面内容每改变一次加一，用作脏矩形签名
+        self._drawn = []    # 每个可见行上次绘制的内容
+
+    def update(self, enemies, offset, target):
+        """使缓存面显示 enemies[offset:] 中可见的行，返回是否有改动"""
+        rows = [(enemy.name, enemy.hp, enemy.max_hp, enemy is target)
+                for enemy in enemies[offset:offset + self.rows]]
+        if rows == self._drawn:
+            return False
+
+        drawn = self._drawn
+        width = self.surface.get_width()
+        for i in range(max(len(rows), len(drawn))):
+            row = rows[i] if i < len(rows) else None
+            if i < len(drawn) and drawn[i] == row:
+                continue
+            top = i * self.row_height
+            self.surface.fill(self.background, (0, top, width, self.row_height))
+            if row is not None:
+                self._draw_row(row, top, width)
+
+        self._drawn = rows
+        self.revision += 1
+        return True
+
+    def _draw_row(self, row, top, width):
+        name, hp, max_hp, is_target = row
+        alive = hp > 0
+        name_color = (BTN_ORANGE if is_target else TEXT_LIGHT) if alive else BTN_GRAY
+        text_top = top + (self.row_height - self.font.get_linesize()) // 2
+
+        label = ("→ " if is_target else "  ") + name
+        self.surface.blit(self.ui.render_text(label, self.font, name_color), (4, text_top))
+
+        bar_x, bar_w, bar_h = width // 2, width // 2 - 90, 8
+        bar_y = top + (self.row_height - bar_h) // 2
+        pygame.draw.rect(self.surface, ONE_DARK, (bar_x, bar_y, bar_w, bar_h))
+        if alive:
+            ratio = min(1, hp / max_hp) if max_hp else 0
+            color = BTN_GREEN if hp > max_hp * 0.3 else BTN_RED_DARK
+            pygame.draw.rect(self.surface, color, (bar_x, bar_y, max(1, int(bar_w * ratio)), bar_h))
+        status = f"{hp}/{max_hp}" if alive else "倒下"
+        self.surface.blit(self.ui.render_text(status, self.font, GINNEZUMI if alive else BTN_GRAY),
+                          (bar_x + bar_w + 8, text_top))
+
+    def index_at(self, y, offset):
+        """缓存面内纵坐标 y 处的敌人下标（可能超出列表长度，由调用方检查）"""
+        return offset + y // self.row_height
@@ -0,0 +1,50 @@
+import pygame
+
+class FrameScheduler:
+    """空闲感知的帧调度器
+
+    有输入、画面有变化或有动画时按固定帧率 tick；画面静止且没有待处理
+    的计时器时阻塞在 pygame.event.wait 上，直到有新事件（或计时器到期）
+    才唤醒，避免在主菜单、探索界面空转消耗 CPU。
+    """
+    def __init__(self, fps=30, linger_frames=2):
+        self.fps = fps
+        self.linger_frames = linger_frames  # 有动静后继续全速运行的帧数
+        self.clock = pygame.time.Clock()
+        self.idle = False
+        self._active_frames = linger_frames
+
+    def keep_awake(self, frames=None):
+        """要求接下来若干帧保持全速（动画、悬停变化等）"""
+        self._active_frames = max(self._active_frames, frames or self.linger_frames)
+
+    def next_events(self, wake_in_ms=None):
+        """等待下一帧并返回本帧要处理的事件
+
+        wake_in_ms: 最迟多少毫秒后必须唤醒（如敌人行动计时器），None 表示无计时器。
+        """
+        if self._active_frames > 0 or (wake_in_ms is not None and wake_in_ms <= 0):
+            self.idle = False
+            self._active_frames = max(0, self._active_frames - 1)
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            self.idle = True
+            # timeout 为 0 时 event.wait 会一直阻塞到有事件为止
+            first = pygame.event.wait(wake_in_ms or 0)
+            events = pygame.event.get()
+            if first.type != pygame.NOEVENT:
+                events.insert(0, first)
+            self.clock.tick()  # 重置计时，不额外等待
+
+        if events:
+            self.keep_awake()
+        return events
+
+    def frame_done(self, changed):
+        """一帧绘制结束；画面有变化时保持唤醒，以便处理后续的连锁变化"""
+        if changed:
+            self.keep_awake()
+
+    def get_fps(self):
+        return self.clock.get_fps()
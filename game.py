@@ -2,42 +2,58 @@ import debug
 
 import pygame
 import sys
-import random
 from pygame.locals import *
 
 import constants as cs
-from character import StatusEffect, Character
-from game_ui import GameUI, screen
+from character import Character
+from battle import BattleEngine
+from game_ui import GameUI
+from frame_scheduler import FrameScheduler
+from profiler import FrameProfiler
+from message_log import MessageLog
+from rng import RandomStreams
+import savegame
 from colors import *
 from constants import GameState
 
-# 初始化 pygame
-pygame.init()
-pygame.display.set_caption("RPG 文字冒险游戏")
-
 class RPGGame:
-    def __init__(self):
+    def __init__(self, seed=None):
+        pygame.init()
         self.state = GameState.MAIN_MENU
         self.player = None
-        self.current_enemy = None
+        self.rng = RandomStreams(seed)
+        self.battle = BattleEngine(on_message=self.add_message, rng=self.rng.battle, ai_rng=self.rng.enemy_ai)
         self.current_location_idx = 0
         self.current_shop_idx = None
+        self.content = None
+        self.load_error = None
+        self.autosave_path = savegame.AUTOSAVE_PATH  # 同时刷新 has_autosave
+        self.recorder = None  # replay.ReplayRecorder，录制时逐帧记录输入
 
         self.gold = 0
-        self.battle_turn = "player"
         self.shop_tab = "buy"
-        self.message_log = []
+        self.message_log = MessageLog(capacity=100)
         self.scroll_offset_message_log = 0
 
         self.scroll_offset_inventory = 0
         self.scroll_offset_shop = 0
         self.scroll_offset_skills = 0
         self.scroll_offset_equipment = 0
+        self.scroll_offset_enemy_list = 0
         self.item_page_inv = 0
         self.item_page_shop = 0
         self.items_per_page = 5
 
-        self.battle_rewards = {"exp": 0, "gold": 0, "items": []}
+        self.use_dirty_rects = True  # 仅刷新变化区域；关闭则每帧整屏 flip
+        self.scheduler = FrameScheduler(fps=30)
+        self.mouse_pos = (0, 0)
+        self.clicked_this_frame = False
+        self.scroll_up = False
+        self.scroll_down = False
+        self.enemy_action_timer = 0
+        self.enemy_action_delay = 1000
+        self.ai_ponder_ms = 8  # 等待敌人行动期间，每帧留给敌人 AI 预先思考的时间
+        self.last_state = None
 
         self.all_skills = []
         self.all_items = []
@@ -45,23 +61,62 @@ class RPGGame:
         self.all_locations = []
         self.all_shops = []
 
-        self.load_game_data()
         self.setup_initial_player_conditions()
 
         self.ui = GameUI(self)
+        self.profiler = FrameProfiler()
+        if debug.PROFILE_HUD:
+            self.profiler.enable(self.ui, self)
+
+    # 战斗相关状态由 BattleEngine 持有，这里保留原有属性名供界面使用
+    @property
+    def current_enemy(self):
+        return self.battle.enemy
+
+    @current_enemy.setter
+    def current_enemy(self, enemy):
+        self.battle.enemy = enemy
+
+    @property
+    def current_enemies(self):
+        return self.battle.enemies
+
+    @property
+    def battle_turn(self):
+        return self.battle.turn
+
+    @battle_turn.setter
+    def battle_turn(self, turn):
+        self.battle.turn = turn
+
+    @property
+    def battle_rewards(self):
+        return self.battle.rewards
+
+    # 主菜单每帧都要知道有没有存档，只在换存档路径、存档、读档后检查一次文件
+    @property
+    def autosave_path(self):
+        return self._autosave_path
+
+    @autosave_path.setter
+    def autosave_path(self, path):
+        self._autosave_path = path
+        self._refresh_has_autosave()
+
+    def _refresh_has_autosave(self):
+        self.has_autosave = bool(self._autosave_path) and savegame.exists(self._autosave_path)
 
     def setup_initial_player_conditions(self):
         # This will be called by start_new_game
-        self.current_enemy = None
-        pass
+        self.battle.end()
 
     def add_message(self, message):
         self.message_log.append(message)
-        if len(self.message_log) > 100:
-            self.message_log.pop(0)
         self.scroll_offset_message_log = max(0, len(self.message_log))
 
     def load_game_data(self):
+        """取用游戏内容；内容本身在 constants 中首次访问时才解析"""
+        self.content = cs.CONTENT
         self.all_skills = cs.ALL_SKILLS
         self.all_items = cs.ALL_ITEMS
         self.all_equipments = cs.ALL_EQUIPMENTS
@@ -70,10 +125,12 @@ class RPGGame:
         self.all_shops = cs.ALL_SHOPS
 
     def start_new_game(self):
+        self.load_game_data()
         self.setup_initial_player_conditions()
 
         self.player = Character("冒险者", 100, 30, 10, 5, level=1, exp=0, game_skills_ref=self.all_skills)
         self.player.skills.extend(self.all_skills[:2])  # 添加普通攻击与强力一击
+        self.battle.player = self.player
 
         # 初始物品与装备
         for item, qty in [(self.all_items[0], 3), (self.all_items[2], 1)]:
@@ -84,7 +141,8 @@ class RPGGame:
 
         self.gold = 100
         self.current_location_idx = 0
-        self.message_log = ["欢迎来到 RPG 文字冒险游戏!", msg_equip, "你的旅程从这里开始。"]
+        self.message_log.clear()
+        self.message_log.extend(["欢迎来到 RPG 文字冒险游戏!", msg_equip, "你的旅程从这里开始。"])
         self.state = GameState.EXPLORING
 
         # 滚动偏移初始化
@@ -99,6 +157,36 @@ class RPGGame:
             for equip in cs.game_data["equipments"]:
                 self.player.add_item_to_inventory(equip)
 
+    def save_game(self, path=None):
+        path = path or self.autosave_path
+        if not path:
+            return False
+        try:
+            savegame.save(self, path)
+        except OSError as e:
+            self.add_message(f"存档失败: {e}")
+            return False
+        finally:
+            self._refresh_has_autosave()
+        return True
+
+    def load_game(self, path=None):
+        self.load_game_data()
+        try:
+            savegame.load(self, path or self.autosave_path)
+        except (OSError, savegame.SaveError) as e:
+            self.load_error = f"读取存档失败: {e}"
+            self._refresh_has_autosave()  # 存档可能已被删除
+            return False
+
+        self.load_error = None
+        self.setup_initial_player_conditions()
+        self.scroll_offset_inventory = self.scroll_offset_shop = 0
+        self.item_page_inv = self.item_page_shop = 0
+        self.add_message("读取了存档。")
+        self.state = GameState.EXPLORING
+        return True
+
     def get_current_location(self):
         return self.all_locations[self.current_location_idx]
 
@@ -108,92 +196,43 @@ class RPGGame:
             self.add_message("这里似乎很安全，没有敌人。")
             return
 
-        enemy_name = random.choice(loc_data["enemies"])
-        self.current_enemy = self.enemy_map[enemy_name].clone()
-        enemy = self.current_enemy
-
-        self.add_message(f"遭遇敌人: {enemy.name} (等级 {enemy.level})!")
-        self._enemy_try_equip(enemy)
-
+        rng = self.rng.encounter
+        low, high = loc_data.get("group_size", (1, 1))
+        count = rng.randint(low, high) if high > low else low
+        elite_chance = loc_data.get("elite_chance", 0)
+        templates = []
+        for _ in range(count):
+            template = self.enemy_map[rng.choice(loc_data["enemies"])]
+            if elite_chance and rng.random() < elite_chance:
+                template = template.variant(elite=True)
+            templates.append(template)
+        self.battle.start(templates)
+        self.scroll_offset_enemy_list = 0
         self.state = GameState.BATTLE
-        self.battle_turn = "player"
-        self.battle_rewards = {"exp": 0, "gold": 0, "items": []}
-
-    def _enemy_try_equip(self, enemy):
-        for entry in getattr(enemy, "potential_equips", []):
-            if random.random() < entry.get("chance", 0.2):
-                equip = entry["equip_obj"]
-                enemy.equip(equip)
-                enemy.gold_reward += equip.price
-                enemy.exp_reward += 25 * enemy.level
-                enemy.hp = enemy.max_hp
-                enemy.mp = enemy.max_mp
-                self.add_message(f"{enemy.name} 装备了 {equip.name}！")
-
-    def _create_status_effect(self, skill, caster=None):
-        name = skill.status_effect_name or skill.name
-        effect_type = {
-            "燃烧": "damage_over_time",
-            "破甲": "defense_debuff",
-            "冰冻": "attack_debuff"
-        }.get(name, "attack_debuff" if "攻击" in skill.name else "defense_debuff")
-
-        value = skill.effect_value or int(caster.attack * 0.2) if caster else 5
-        return StatusEffect(name, effect_type, value, skill.effect_duration, f"{name}效果")
-
-    def _apply_skill_effect(self, caster, target, skill):
-        messages = []
-
-        if caster.mp < skill.mp_cost:
-            return [f"{caster.name} 法力不足，无法使用 {skill.name}!"], False
-
-        caster.use_mp(skill.mp_cost)
-        messages.append(f"{caster.name} 使用了 {skill.name}!")
-
-        # 技能类型处理
-        if skill.skill_type in {"damage", "lifesteal"}:
-            damage = int(caster.attack * skill.damage_multiplier)
-            dealt = target.take_damage(damage)
-            messages.append(f"{target.name} 受到 {dealt} 点伤害。")
-            if skill.skill_type == "lifesteal":
-                healed = caster.heal(int(dealt * skill.effect_value))
-                messages.append(f"{caster.name} 吸取了 {healed} 点生命！")
-
-        elif skill.skill_type == "heal":
-            healed = caster.heal(skill.effect_value)
-            messages.append(f"{caster.name} 恢复了 {healed} 点生命。")
-
-        elif skill.skill_type == "buff_self":
-            effect = self._create_status_effect(skill)
-            caster.add_status_effect(effect)
-            messages.append(f"{caster.name} 获得了 {effect.name} 效果！")
-
-        elif skill.skill_type == "debuff_enemy":
-            effect = self._create_status_effect(skill)
-            target.add_status_effect(effect)
-            messages.append(f"{target.name} 受到 {effect.name} 效果！")
-
-        # 附加状态效果（如燃烧）
-        if skill.status_effect_name and skill.skill_type in ("damage", "debuff_enemy"):
-            effect = self._create_status_effect(skill, caster)
-            target.add_status_effect(effect)
-            messages.append(f"{target.name} 陷入了 {effect.name} 状态！")
-
-        return messages, True
+
+    def select_target(self, index):
+        """战斗中选择攻击目标（一组敌人中的第 index 个）"""
+        if self.state == GameState.BATTLE:
+            self.battle.select_target(index)
+
+    def _sync_battle_outcome(self):
+        """根据战斗引擎的结果切换游戏状态"""
+        outcome = self.battle.outcome
+        if outcome == "victory":
+            self.state = GameState.BATTLE_REWARD
+        elif outcome == "defeat":
+            self.game_over()
+        elif outcome == "escaped":
+            self.state = GameState.EXPLORING
+            self.battle.end()
 
     def player_action(self, skill_idx=None, item_idx=None):
         if self.state != GameState.BATTLE or self.battle_turn != "player":
             return
 
         if skill_idx is not None and 0 <= skill_idx < len(self.player.skills):
-            skill = self.player.skills[skill_idx]
-            msgs, success = self._apply_skill_effect(self.player, self.current_enemy, skill)
-            for m in msgs: self.add_message(m)
-            if success:
-                if not self.current_enemy.is_alive():
-                    self.battle_victory()
-                else:
-                    self.end_player_turn_in_battle()
+            self.battle.player_use_skill(self.player.skills[skill_idx])
+            self._sync_battle_outcome()
             return
 
         if item_idx is not None and 0 <= item_idx < len(self.player.inventory):
@@ -201,10 +240,8 @@ class RPGGame:
             success, _ = self.use_item(item, self.player)
             if success:
                 self.show_item_popup = False
-                if not self.current_enemy.is_alive():
-                    self.battle_victory()
-                else:
-                    self.end_player_turn_in_battle()
+                self.battle.after_player_action()
+                self._sync_battle_outcome()
             return
 
     def end_player_turn_in_battle(self):
@@ -212,76 +249,24 @@ class RPGGame:
             self.battle_turn = "enemy"
 
     def enemy_action(self):
-        if self.state != GameState.BATTLE or self.battle_turn != "enemy":
-            return
-        if not self.current_enemy or not self.current_enemy.is_alive():
-            return
-
-        for msg in self.current_enemy.update_status_effects_at_turn_start():
-            self.add_message(msg)
-
-        if not self.current_enemy.is_alive():
-            self.battle_victory()
+        if self.state != GameState.BATTLE:
             return
-
-        skill = self.current_enemy.choose_action(self.player)
-        msgs, _ = self._apply_skill_effect(self.current_enemy, self.player, skill)
-        for m in msgs: self.add_message(m)
-
-        if not self.player.is_alive():
-            self.game_over()
-        else:
-            self.battle_turn = "player"
-            for msg in self.player.update_status_effects_at_turn_start():
-                self.add_message(msg)
-            if not self.player.is_alive():
-                self.game_over()
+        self.battle.enemy_turn()
+        self._sync_battle_outcome()
 
     def battle_victory(self):
-        self.add_message(f"你击败了 {self.current_enemy.name}！")
-
-        exp_reward = self.current_enemy.exp_reward
-        gold_reward = self.current_enemy.gold_reward
-
-        self.battle_rewards["exp"] = exp_reward
-        self.battle_rewards["gold"] = gold_reward
-        self.battle_rewards["items"] = []
-
-        for drop_info in self.current_enemy.drop_table:
-            if random.random() < drop_info["chance"]:
-                dropped_item = drop_info["item_obj"]
-                self.battle_rewards["items"].append(dropped_item)
-
-        self.state = GameState.BATTLE_REWARD
+        self.battle.victory()
+        self._sync_battle_outcome()
 
     def display_battle_rewards(self):
-        rewards = self.battle_rewards
-        msgs = []
-
-        if rewards["exp"]:
-            leveled_up, times, level_up_infos = self.player.gain_exp(rewards["exp"])
-            msgs.append(f"获得了 {rewards['exp']} 经验值。")
-            if leveled_up:
-                for i, info in enumerate(level_up_infos):
-                    msgs.append(f"恭喜！你升到了 {self.player.level - len(level_up_infos) + i + 1} 级！")
-                    msgs.append(f"  生命上限 +{info['hp_increase']}, 法力上限 +{info['mp_increase']}")
-                    msgs.append(f"  攻击 +{info['attack_increase']}, 防御 +{info['defense_increase']}")
-                    msgs.extend([f"  学会了新技能: {s}!" for s in info["learned_skills"]])
-
-        if rewards["gold"]:
-            self.gold += rewards["gold"]
-            msgs.append(f"获得了 {rewards['gold']} 金币。")
-
-        for item in rewards["items"]:
-            self.player.add_item_to_inventory(item)
-            msgs.append(f"获得了物品: {item.name}!")
-
+        gold, msgs = self.battle.collect_rewards()
+        self.gold += gold
         for msg in msgs:
             self.add_message(msg)
 
     def process_battle_rewards(self):
         self.display_battle_rewards()
-        self.current_enemy = None
+        self.battle.end()
         self.state = GameState.EXPLORING
 
     def game_over(self):
@@ -296,33 +281,7 @@ class RPGGame:
         return None
 
     def apply_item_effect(self, item, target):
-        messages = []
-        used = False
-
-        effect_type = item.item_type
-        val = item.effect_value
-
-        if effect_type == "heal_hp":
-            healed = target.heal(val)
-            messages.append(f"{target.name} 恢复了 {healed} 点生命值！")
-            used = True
-        elif effect_type == "heal_mp":
-            restored = target.restore_mp(val)
-            messages.append(f"{target.name} 恢复了 {restored} 点法力值！")
-            used = True
-        elif effect_type in ("buff_attack", "buff_defense"):
-            status = StatusEffect(f"{item.name}", 
-                                  "attack_buff" if "attack" in effect_type else "defense_buff", 
-                                  val, item.duration, item.description)
-            target.add_status_effect(status)
-            messages.append(f"{target.name} 的{item.name}效果已激活！")
-            used = True
-        elif effect_type == "damage_enemy" and target == self.current_enemy:
-            damage = target.take_damage(val)
-            messages.append(f"{target.name} 受到 {damage} 点伤害！")
-            used = True
-
-        return used, messages
+        return self.battle.apply_item_effect(item, target)
 
     def use_item(self, item, target=None):
         if not item: return False, "无效物品。"
@@ -336,8 +295,7 @@ class RPGGame:
         used, effect_msgs = self.apply_item_effect(item, target_char)
 
         if used:
-            if item in self.player.inventory:
-                self.player.inventory.remove(item)
+            self.player.remove_item_from_inventory(item)
             for msg in effect_msgs:
                 self.add_message(msg)
             return True, ""
@@ -352,35 +310,35 @@ class RPGGame:
 
             self.item_page_inv = 0
             self.scroll_offset_inventory = 0
+            self.save_game()  # 每次移动地点自动存档
 
-            if loc["enemies"] and random.random() < 0.15:
+            if loc["enemies"] and self.rng.encounter.random() < 0.15:
                 self.start_battle()
 
     def attempt_escape_battle(self):
         if self.state != GameState.BATTLE:
             return
-        if random.random() < 0.75:
-            self.add_message("你成功逃离了战斗！")
-            self.state = GameState.EXPLORING
-            self.current_enemy = None
-        else:
-            self.add_message("逃跑失败！")
-            self.end_player_turn_in_battle()
+        self.battle.attempt_escape()
+        self._sync_battle_outcome()
 
     def rest_at_location(self):
         loc = self.get_current_location()
         if loc.get("can_rest"):
             self.player.hp = self.player.max_hp
             self.player.mp = self.player.max_mp
-            self.player.status_effects = []
+            self.player.clear_status_effects()
             self.add_message("你休息了一下，完全恢复了状态！")
 
+    def toggle_profiler(self):
+        """开关帧耗时 HUD"""
+        return self.profiler.toggle(self.ui, self)  # 关闭后 HUD 所在区域由界面在下一帧重画
+
     def mouse_in_rect(self, x, y, width, height):
-        mx, my = pygame.mouse.get_pos()
+        mx, my = self.mouse_pos
         return x <= mx <= x + width and y <= my <= y + height
 
-    def handle_events(self):
-        for event in pygame.event.get():
+    def handle_events(self, events=None):
+        for event in pygame.event.get() if events is None else events:
             if event.type == QUIT:
                 pygame.quit()
                 sys.exit()
@@ -389,52 +347,89 @@ class RPGGame:
             elif event.type == pygame.MOUSEWHEEL:
                 self.scroll_up = event.y > 0
                 self.scroll_down = event.y < 0
+            elif event.type == KEYDOWN and event.key == K_F3:
+                self.toggle_profiler()
+            elif event.type in (VIDEOEXPOSE, WINDOWEXPOSED, WINDOWRESTORED, WINDOWSIZECHANGED):
+                self.ui.invalidate()
 
     def run(self):
-        clock = pygame.time.Clock()
-        running = True
-        enemy_action_timer = 0
-        enemy_action_delay = 1000
-
-        while running:
-            self.clicked_this_frame = False
-            self.scroll_up = False
-            self.scroll_down = False
-
-            self.handle_events()
-
-            screen.fill(KURO)
-            if self.state == GameState.MAIN_MENU:
-                self.ui.draw_main_menu()
-            elif self.state == GameState.EXPLORING:
-                self.ui.draw_exploring()
-            elif self.state == GameState.BATTLE:
-                self.ui.draw_battle()
-                if self.battle_turn == "enemy" and self.current_enemy and self.current_enemy.is_alive() and self.player.is_alive():
-                    now = pygame.time.get_ticks()
-                    if not enemy_action_timer:
-                        enemy_action_timer = now
-                    elif now - enemy_action_timer >= enemy_action_delay:
-                        self.enemy_action()
-                        enemy_action_timer = 0
-            elif self.state == GameState.INVENTORY:
-                self.ui.draw_inventory()
-            elif self.state == GameState.GAME_OVER:
-                self.ui.draw_game_over()
-            elif self.state == GameState.BATTLE_REWARD:
-                self.ui.draw_battle_reward_screen()
-            elif self.state == GameState.SHOP:
-                self.ui.draw_shop_screen()
-            elif self.state == GameState.EQUIPMENT_SCREEN:
-                self.ui.draw_equipment_screen()
-            elif self.state == GameState.CHARACTER_INFO:
-                self.ui.draw_character_info_screen()
-
+        scheduler = self.scheduler
+        while True:
+            # 空闲时阻塞等待输入；敌人行动计时器到期时必须唤醒
+            wake_in_ms = None
+            if self.enemy_action_timer and self.state == GameState.BATTLE:
+                wake_in_ms = self.enemy_action_delay - (pygame.time.get_ticks() - self.enemy_action_timer)
+            events = scheduler.next_events(wake_in_ms)
+            now = pygame.time.get_ticks()
+            mouse_pos = pygame.mouse.get_pos()
+            if self.recorder:
+                self.recorder.record_frame(now, mouse_pos, events)
+            self.run_frame(events, now, mouse_pos)
+
+    def run_frame(self, events, now, mouse_pos):
+        """处理一帧的输入并绘制；除 events、now、mouse_pos 外不读取任何外部输入，
+        录像回放时用录下的参数逐帧调用即可复现整局游戏"""
+        scheduler = self.scheduler
+        self.clicked_this_frame = False
+        self.scroll_up = False
+        self.scroll_down = False
+        self.mouse_pos = mouse_pos
+
+        self.profiler.begin_frame()
+        self.handle_events(events)
+
+        if self.state != self.last_state:
+            self.ui.dirty.invalidate()  # 状态切换时整屏刷新
+            self.last_state = self.state
+
+        if self.state == GameState.MAIN_MENU:
+            self.ui.draw_main_menu()
+        elif self.state == GameState.EXPLORING:
+            self.ui.draw_exploring()
+        elif self.state == GameState.BATTLE:
+            self.ui.draw_battle()
+            if self.battle_turn == "enemy" and self.current_enemy and self.current_enemy.is_alive() and self.player.is_alive():
+                if not self.enemy_action_timer:
+                    self.enemy_action_timer = now
+                elif now - self.enemy_action_timer >= self.enemy_action_delay:
+                    self.enemy_action()
+                    self.enemy_action_timer = 0
+                    scheduler.keep_awake()
+                if self.enemy_action_timer and self.battle.ponder(self.ai_ponder_ms):
+                    scheduler.keep_awake()  # 思考未完成时保持逐帧运行，而不是一直睡到计时器到期
+        elif self.state == GameState.INVENTORY:
+            self.ui.draw_inventory()
+        elif self.state == GameState.GAME_OVER:
+            self.ui.draw_game_over()
+        elif self.state == GameState.BATTLE_REWARD:
+            self.ui.draw_battle_reward_screen()
+        elif self.state == GameState.SHOP:
+            self.ui.draw_shop_screen()
+        elif self.state == GameState.EQUIPMENT_SCREEN:
+            self.ui.draw_equipment_screen()
+        elif self.state == GameState.CHARACTER_INFO:
+            self.ui.draw_character_info_screen()
+
+        if self.profiler.enabled:
+            self.profiler.end_frame(self.state.name)
+            self.profiler.draw(self.ui, scheduler.get_fps(), self.state.name)
+            scheduler.keep_awake()  # HUD 需要持续刷新
+
+        dirty_rects = self.ui.dirty.end_frame()
+        if not self.use_dirty_rects or dirty_rects is None:
             pygame.display.flip()
-            clock.tick(30)
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        scheduler.frame_done(changed=dirty_rects is None or bool(dirty_rects))
+
+        if not self.all_skills:
+            self.load_game_data()  # 主菜单显示出来之后再加载游戏内容
 
 def main():
     game = RPGGame()
+    if debug.RECORD_REPLAY:
+        import replay
+        game.recorder = replay.ReplayRecorder.for_game(game)
     game.run()
 
 if __name__ == "__main__":
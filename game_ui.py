@@ -2,43 +2,84 @@ import debug
 
 import pygame
 import sys
-from collections import defaultdict
+from collections import Counter
 
 from constants import GameState
 from data import Equipment, Item
+from inventory import StackSequence
 from colors import *
-
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+from text_cache import TextSurfaceCache
+from text_layout import TextLayoutEngine
+from dirty_rects import DirtyRectTracker
+from message_log import MessageLogSurface
+from enemy_list import EnemyListSurface
+from widgets import Button, Column, GridList, Label, Panel, Screen, ScrollBar, SurfaceView, Widget
+
+screen = None  # 游戏窗口，由 init_display 创建
+
+SLOT_NAMES = {'weapon': "武器", 'armor': "护甲", 'helmet': "头盔", 'accessory': "饰品"}
+
+def init_display():
+    """第一次调用时才初始化显示模块并打开窗口"""
+    global screen
+    if screen is None:
+        if not pygame.display.get_init():
+            pygame.display.init()
+        pygame.display.set_caption("RPG 文字冒险游戏")
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    return screen
 
 class GameUI:
+    """游戏界面
+
+    每个界面是一棵保留模式的控件树（见 widgets），第一次显示时由 _build_* 构建，
+    控件通过 bind / visible_if 绑定游戏状态。draw_* 每帧调用一次，只同步绑定、
+    处理输入并重画变化了的区域。draw_text / draw_rect 为立即模式的绘制，
+    供 HUD 等覆盖在界面之上的内容使用，这些内容用 overlay 登记所占的区域。
+    """
     def __init__(self, game):
         self.game = game
+        self.screen = init_display()
         self.show_item_popup = False
+        self.text_cache = TextSurfaceCache()
+        self.text_layout = TextLayoutEngine()
+        self.dirty = DirtyRectTracker(screen.get_rect())
+        self.screens = {}   # 界面名 -> widgets.Screen
+        self._active = None
+        self._overlay = None  # 上一帧画在界面之上的区域（帧耗时 HUD）
+
+    def render_text(self, text, font, color, antialias=True):
+        """经由缓存渲染文字，相同参数的文字只会调用一次 font.render"""
+        return self.text_cache.render(font, text, antialias, color)
+
+    def invalidate(self):
+        """下一帧整屏重画（窗口重绘之后）"""
+        self.dirty.invalidate()
+        if self._active is not None:
+            self._active.invalidate_all()
+
+    def overlay(self, rect):
+        """登记本帧画在界面之上的区域，下一帧界面先重画该区域下的控件把它擦掉"""
+        self._overlay = pygame.Rect(rect)
+
+    def draw_rect(self, color, rect, width=0, border_radius=-1):
+        """绘制矩形并登记到脏矩形记录"""
+        drawn = pygame.draw.rect(screen, color, rect, width, border_radius=border_radius)
+        self.dirty.record(drawn, ("rect", color, width, border_radius))
+        return drawn
 
     def draw_text(self, text, font, color, x, y, align="left", max_width=None):
         """
         渲染文字，支持自动换行和对齐方式
         - align: "left", "center", "right"
-        - max_width: 设定最大行宽，超过则换行
+        - max_width: 设定最大行宽，超过则换行（按中日韩字符与标点禁则断行）
         """
         if max_width:
-            words = text.split(' ')
-            lines = []
-            current_line = ""
-
-            # 构建换行列表
-            for word in words:
-                test_line = current_line + word + " "
-                if font.size(test_line)[0] <= max_width:
-                    current_line = test_line
-                else:
-                    lines.append(current_line)
-                    current_line = word + " "
-            lines.append(current_line)
+            lines = self.text_layout.layout(text, font, max_width)
 
             total_height = 0
             for i, line_text in enumerate(lines):
-                text_surface = font.render(line_text.strip(), True, color)
+                text_surface = self.render_text(line_text, font, color)
                 text_rect = text_surface.get_rect()
 
                 if align == "center":
@@ -50,13 +91,14 @@ class GameUI:
                 text_rect.top = y + i * font.get_linesize()
 
                 screen.blit(text_surface, text_rect)
+                self.dirty.record(text_rect, ("text", line_text, font, color))
                 total_height += font.get_linesize()
 
             return total_height
 
         else:
             # 单行模式
-            text_surface = font.render(text, True, color)
+            text_surface = self.render_text(text, font, color)
             text_rect = text_surface.get_rect()
 
             if align == "center":
@@ -69,475 +111,365 @@ class GameUI:
                 text_rect.top = y
 
             screen.blit(text_surface, text_rect)
+            self.dirty.record(text_rect, ("text", text, font, color))
             return text_rect.height
 
-    def draw_button(self, text, x, y, width, height,
-                inactive_color, active_color,
-                text_color=KURO, font_to_use=None,
-                border_color=None, border_width=0):
-        """渲染按钮，并在鼠标悬停时改变颜色"""
+    def _show(self, name, build, background=BG_DARK):
+        """显示界面 name（第一次显示时用 build 构建控件树）"""
+        ui_screen = self.screens.get(name)
+        if ui_screen is None:
+            ui_screen = self.screens[name] = Screen(self, background, name)
+            build(ui_screen)
+        ui_screen.set_background(background)
+        if ui_screen is not self._active:
+            ui_screen.invalidate_all()  # 切换界面时整屏重画
+            self._active = ui_screen
+        if self._overlay is not None:
+            ui_screen.damage(self._overlay)
+            self._overlay = None
+        ui_screen.render(self.game)
+        return ui_screen
+
+    # ===================== 界面入口 =====================
 
-        font_to_use = font_to_use or FONT_MEDIUM
-        mouse_pos = pygame.mouse.get_pos()
-
-        is_hovered = x <= mouse_pos[0] <= x + width and y <= mouse_pos[1] <= y + height
-        color = active_color if is_hovered else inactive_color
+    def draw_main_menu(self):
+        self._show("main_menu", self._build_main_menu)
 
-        pygame.draw.rect(screen, color, (x, y, width, height), border_radius=6)  # 轻圆角风格
+    def draw_exploring(self):
+        self._show("exploring", self._build_exploring)
 
-        if border_color and border_width > 0:
-            pygame.draw.rect(screen, border_color, (x, y, width, height), border_width, border_radius=6)
+    def draw_inventory(self):
+        """绘制物品栏界面"""
+        self._show("inventory", self._build_inventory)
 
-        text_surf = font_to_use.render(text, True, text_color)
-        text_rect = text_surf.get_rect(center=(x + width / 2, y + height / 2))
-        screen.blit(text_surf, text_rect)
+    def draw_shop_screen(self):
+        """绘制商店界面"""
+        self._show("shop", self._build_shop)
 
-        return is_hovered
+    def draw_equipment_screen(self):
+        """绘制装备界面"""
+        self._show("equipment", self._build_equipment)
 
-    def draw_message_log(self, x, y, width, height):
-        # 背景与边框
-        pygame.draw.rect(screen, LIGHT_PANEL, (x, y, width, height))
-        pygame.draw.rect(screen, TEXT_LIGHT, (x, y, width, height), 1)
+    def draw_character_info_screen(self):
+        """绘制角色信息界面"""
+        self._show("character_info", self._build_character_info)
 
-        padding = 5
-        line_height = FONT_SMALL.get_linesize()
-        max_lines = (height - padding * 2) // line_height
-        total_lines = len(self.game.message_log)
+    def draw_battle(self):
+        self._show("battle", self._build_battle, BG_DARK if self.game.current_enemy else KURO)
 
-        # 限制滑动范围
-        max_offset = max(0, total_lines - max_lines)
-        self.game.scroll_offset_message_log = max(0, min(self.game.scroll_offset_message_log, max_offset))
+    def draw_battle_reward_screen(self): # 战斗胜利奖励界面
+        self._show("battle_reward", self._build_battle_reward)
 
-        # 取出当前要显示的日志行
-        start_idx = self.game.scroll_offset_message_log
-        end_idx = min(total_lines, start_idx + max_lines)
-        log_to_display = self.game.message_log[start_idx:end_idx]
+    def draw_game_over(self): # 游戏结束界面
+        self._show("game_over", self._build_game_over, SUMI)
 
-        current_y = y + padding
-        for message in log_to_display:
-            self.draw_text(message, FONT_SMALL, TEXT_FAINT, x + padding, current_y, max_width=width - 2 * padding)
-            current_y += line_height * (1 + message.count('\n'))
-            if current_y > y + height - line_height:
-                break
+    # ===================== 共用部件 =====================
 
+    def _build_message_log(self, parent, x, y, width, height):
+        """消息日志：可见的行缓存在 MessageLogSurface 上，日志或滚动位置变化时才更新"""
+        game = self.game
+        padding = 5
+        line_height = FONT_SMALL.get_linesize()
+        max_lines = (height - padding * 2) // line_height
+        log_surface = MessageLogSurface(self, width - 2 * padding, height - 2 * padding, FONT_SMALL, TEXT_FAINT, LIGHT_PANEL)
+
+        def max_offset():
+            # 限制滑动范围
+            limit = max(0, len(game.message_log) - max_lines)
+            game.scroll_offset_message_log = max(0, min(game.scroll_offset_message_log, limit))
+            return limit
+
+        def scroll(direction):
+            limit = max_offset()
+            if limit:
+                game.scroll_offset_message_log = max(0, min(limit, game.scroll_offset_message_log + direction))
+
+        def clear():
+            game.message_log.clear()
+            game.scroll_offset_message_log = 0
+
+        def log_revision():
+            max_offset()
+            log_surface.update(game.message_log, game.scroll_offset_message_log)
+            return log_surface.revision
+
+        box = parent.add(Panel((x, y, width, height), LIGHT_PANEL, TEXT_LIGHT, on_wheel=scroll))
+        box.add(SurfaceView((x + padding, y + padding, width - 2 * padding, height - 2 * padding),
+                            lambda revision: log_surface.surface, bind=log_revision))
         # --- 清除按钮 ---
-        clear_btn_w, clear_btn_h = 50, 24
-        if self.draw_button("清除", x + width - clear_btn_w - 24, y + height - clear_btn_h - 12,
-                            clear_btn_w, clear_btn_h, BTN_RED, BTN_RED_HOVER, font_to_use=FONT_SMALL):
-            if self.game.clicked_this_frame:
-                self.game.message_log.clear()
-                self.game.scroll_offset_message_log = 0
-
+        box.add(Button((x + width - 50 - 24, y + height - 24 - 12, 50, 24), "清除", (BTN_RED, BTN_RED_HOVER),
+                       clear, FONT_SMALL))
         # --- 滑动条 ---
-        if total_lines > max_lines:
-            scrollbar_width = 10
-            bar_x = x + width - scrollbar_width - 4
-            bar_y = y + padding
-            bar_height = height - 2 * padding
-            scroll_ratio = max_lines / total_lines
-            scroll_bar_h = max(int(bar_height * scroll_ratio), 20)
-            scroll_bar_y = bar_y + int((self.game.scroll_offset_message_log / max_offset) * (bar_height - scroll_bar_h))
-
-            pygame.draw.rect(screen, (80, 80, 80), (bar_x, bar_y, scrollbar_width, bar_height))  # 背景槽
-            pygame.draw.rect(screen, (180, 180, 180), (bar_x, scroll_bar_y, scrollbar_width, scroll_bar_h))  # 滑块
-
-            # 鼠标滚轮事件
-            if self.game.mouse_in_rect(x, y, width, height):
-                if self.game.scroll_up:
-                    self.game.scroll_offset_message_log = max(0, self.game.scroll_offset_message_log - 1)
-                elif self.game.scroll_down:
-                    self.game.scroll_offset_message_log = min(max_offset, self.game.scroll_offset_message_log + 1)
-
-    def draw_player_status_bar(self, x, y, width, height):
-        pygame.draw.rect(screen, LIGHT_PANEL, (x, y, width, height))
-        pygame.draw.rect(screen, TEXT_LIGHT, (x, y, width, height), 1)
-
-        self.draw_text(f"{self.game.player.name} | Lvl: {self.game.player.level}", FONT_MEDIUM, TEXT_LIGHT, x + 10, y + 10)
-        self.draw_text(f"HP: {self.game.player.hp}/{self.game.player.max_hp}", FONT_SMALL, BTN_GREEN if self.game.player.hp > self.game.player.max_hp * 0.3 else BTN_RED_DARK, x + 10, y + 40)
-        self.draw_text(f"MP: {self.game.player.mp}/{self.game.player.max_mp}", FONT_SMALL, BTN_BLUE, x + 170, y + 40)
-        self.draw_text(f"ATK: {self.game.player.attack} DEF: {self.game.player.defense}", FONT_SMALL, TEXT_FAINT, x + 10, y + 65)
-        self.draw_text(f"EXP: {self.game.player.exp}/{self.game.player.exp_to_next_level}", FONT_SMALL, BTN_PURPLE, x + 170, y + 65)
-        self.draw_text(f"金币: {self.game.gold}", FONT_SMALL, BTN_ORANGE, x + 170, y + 90)
-
-        for effect in self.game.player.status_effects[:2]:
-            self.draw_text(f"{effect.name}({effect.turns_remaining})", FONT_SMALL, BTN_PURPLE, x + 10, y + 80)
-            y += 15
-
-    def draw_main_menu(self):
-        screen.fill(BG_DARK)
-        self.draw_text("RPG 文字冒险游戏", FONT_TITLE, SHIRONERI, SCREEN_WIDTH//2, 150, "center")
+        box.add(ScrollBar((x + width - 10 - 4, y + padding, 10, height - 2 * padding),
+                          bind=lambda: (game.scroll_offset_message_log, max_offset(), max_lines, len(game.message_log))))
+
+    def _build_player_status(self, parent, x, y, width, height, visible_if=None):
+        """玩家状态栏；玩家的数值、金币或状态效果变化时才刷新其中的文字"""
+        game = self.game
+        p = lambda: game.player
+
+        def state():
+            player = game.player
+            return (player, player.name, player.level, player.hp, player.mp, player.stats_version, player.exp,
+                    game.gold, [(e.name, e.turns_remaining) for e in player.status_effects[:2]])
+
+        bar = parent.add(Panel((x, y, width, height), LIGHT_PANEL, TEXT_LIGHT, bind=state, visible_if=visible_if))
+        bar.add(Label((x + 10, y + 10), "", FONT_MEDIUM, TEXT_LIGHT, bind=lambda: f"{p().name} | Lvl: {p().level}"))
+        bar.add(Label((x + 10, y + 40), "", FONT_SMALL, BTN_GREEN,
+                      bind=lambda: (f"HP: {p().hp}/{p().max_hp}", BTN_GREEN if p().hp > p().max_hp * 0.3 else BTN_RED_DARK)))
+        bar.add(Label((x + 170, y + 40), "", FONT_SMALL, BTN_BLUE, bind=lambda: f"MP: {p().mp}/{p().max_mp}"))
+        bar.add(Label((x + 10, y + 65), "", FONT_SMALL, TEXT_FAINT, bind=lambda: f"ATK: {p().attack} DEF: {p().defense}"))
+        bar.add(Label((x + 170, y + 65), "", FONT_SMALL, BTN_PURPLE, bind=lambda: f"EXP: {p().exp}/{p().exp_to_next_level}"))
+        bar.add(Label((x + 170, y + 90), "", FONT_SMALL, BTN_ORANGE, bind=lambda: f"金币: {game.gold}"))
+        self._add_effect_labels(bar, p, x + 10, y + 80)
+        return bar
+
+    def _add_effect_labels(self, parent, character, x, y):
+        """角色的前两个状态效果（名称与剩余回合）"""
+        def effect_text(i):
+            effects = character().status_effects
+            if i >= len(effects):
+                return ""
+            effect = effects[i]
+            return f"{effect.name}({effect.turns_remaining})"
+
+        for i in range(2):
+            parent.add(Label((x, y + i * 15), "", FONT_SMALL, BTN_PURPLE, bind=lambda i=i: effect_text(i)))
+
+    def _build_info_button(self, parent, x, y, on_click):
+        """带边框的小 "i" 按钮"""
+        parent.add(Panel((x, y, 28, 28), border=BTN_GRAY_LIGHT))
+        parent.add(Button((x, y, 28, 28), "i", (LIGHT_PANEL, BTN_GRAY, BTN_ORANGE), on_click, FONT_SMALL))
+
+    def _build_pager(self, parent, get_page, set_page, page_count):
+        """翻页：页码与上一页 / 下一页按钮，只有一页时都不显示"""
+        parent.add(Label((SCREEN_WIDTH // 2, SCREEN_HEIGHT - 130), "", FONT_MEDIUM, TEXT_FAINT, "center",
+                         bind=lambda: f"页: {get_page() + 1}/{page_count()}" if page_count() > 1 else ""))
+        parent.add(Button((50, SCREEN_HEIGHT - 130, 100, 38), "上一页", (BTN_BLUE, BTN_BLUE_HOVER),
+                          lambda: set_page(get_page() - 1),
+                          visible_if=lambda: page_count() > 1 and get_page() > 0))
+        parent.add(Button((SCREEN_WIDTH - 150, SCREEN_HEIGHT - 130, 100, 38), "下一页", (BTN_BLUE, BTN_BLUE_HOVER),
+                          lambda: set_page(get_page() + 1),
+                          visible_if=lambda: page_count() > 1 and get_page() < page_count() - 1))
+
+    # ===================== 主菜单与探索 =====================
+
+    def _build_main_menu(self, root):
+        game = self.game
+
+        def quit_game():
+            pygame.quit()
+            sys.exit()
+
+        def toggle_debug():
+            debug.DEBUG = True
+            print(f"DEBUG: {debug.DEBUG}, HUD: {game.toggle_profiler()}")
+
+        root.add(Label((SCREEN_WIDTH//2, 150), "RPG 文字冒险游戏", FONT_TITLE, SHIRONERI, "center"))
+        root.add(Button((SCREEN_WIDTH//2 - 100, 300, 200, 50), "开始新游戏", (BTN_BLUE, BTN_BLUE_HOVER), game.start_new_game))
+        root.add(Button((SCREEN_WIDTH//2 - 100, 380, 200, 50), "读取存档", (BTN_GREEN, BTN_GREEN_HOVER), game.load_game,
+                        visible_if=lambda: game.has_autosave))
+        root.add(Label((SCREEN_WIDTH//2, 440), "", FONT_SMALL, BTN_RED, "center", bind=lambda: game.load_error or ""))
+        root.add(Button((SCREEN_WIDTH//2 - 100, 460, 200, 50), "退出游戏", (BTN_RED, BTN_RED_HOVER), quit_game))
+        root.add(Button((SCREEN_WIDTH - 70, SCREEN_HEIGHT - 34, 60, 24), "DEBUG", (BTN_RED, BTN_RED_HOVER),
+                        toggle_debug, FONT_SMALL))
+
+    def _build_exploring(self, root):
+        game = self.game
+        location = game.get_current_location
+
+        def go(state, **resets):
+            game.state = state
+            for attr, value in resets.items():
+                setattr(game, attr, value)
+
+        def explore():
+            if location()["enemies"]:
+                game.start_battle()
+            else:
+                game.add_message("这里很安全，你四处看了看，没什么发现。")
 
-        if self.draw_button("开始新游戏", SCREEN_WIDTH//2 - 100, 300, 200, 50, BTN_BLUE, BTN_BLUE_HOVER):
-            if self.game.clicked_this_frame: self.game.start_new_game()
-        # Add Load Game Button if implemented
-        if self.draw_button("退出游戏", SCREEN_WIDTH//2 - 100, 380, 200, 50, BTN_RED, BTN_RED_HOVER):
-            if self.game.clicked_this_frame: pygame.quit(); sys.exit()
-        if self.draw_button("DEBUG", SCREEN_WIDTH - 70, SCREEN_HEIGHT -34, 60, 24, BTN_RED, BTN_RED_HOVER, font_to_use=FONT_SMALL):
-            if self.game.clicked_this_frame: debug.DEBUG = True; print(f"DEBUG: {debug.DEBUG}")
+        def enter_shop():
+            game.current_shop_idx = location()["shop_idx"]
+            go(GameState.SHOP, item_page_shop=0, scroll_offset_shop=0)
 
-    def draw_exploring(self):
-        screen.fill(BG_DARK)
-        current_loc = self.game.get_current_location()
+        def rest():
+            if game.gold >= 20:
+                game.gold -= 20
+                game.message_log.clear()
+                game.scroll_offset_message_log = 0
+                game.rest_at_location()
 
         # 玩家状态栏
-        self.draw_player_status_bar(10, 10, 320, 120)
-        pygame.draw.rect(screen, BTN_GRAY_LIGHT, (292, 20, 28, 28), 1)
-        if self.draw_button("i", 292, 20, 28, 28, LIGHT_PANEL, BTN_GRAY, BTN_ORANGE, FONT_SMALL):
-            if self.game.clicked_this_frame:
-                self.game.state = GameState.CHARACTER_INFO
+        self._build_player_status(root, 10, 10, 320, 120)
+        self._build_info_button(root, 292, 20, lambda: go(GameState.CHARACTER_INFO))
 
         # 地点信息框
-        pygame.draw.rect(screen, LIGHT_PANEL, (SCREEN_WIDTH - 330, 10, 320, 120))
-        pygame.draw.rect(screen, TEXT_LIGHT, (SCREEN_WIDTH - 330, 10, 320, 120), 1)
-        self.draw_text(f"当前位置: {current_loc['name']}", FONT_MEDIUM, TEXT_LIGHT, SCREEN_WIDTH - 320, 20)
-        self.draw_text(current_loc['description'], FONT_SMALL, TEXT_FAINT, SCREEN_WIDTH - 320, 50, max_width=310)
+        loc_box = root.add(Panel((SCREEN_WIDTH - 330, 10, 320, 120), LIGHT_PANEL, TEXT_LIGHT,
+                                 bind=lambda: game.current_location_idx))
+        loc_box.add(Label((SCREEN_WIDTH - 320, 20), "", FONT_MEDIUM, TEXT_LIGHT, bind=lambda: f"当前位置: {location()['name']}"))
+        loc_box.add(Label((SCREEN_WIDTH - 320, 50), "", FONT_SMALL, TEXT_FAINT, max_width=310,
+                          bind=lambda: location()['description']))
 
         # 消息日志
         log_height = 200
-        self.draw_message_log(10, SCREEN_HEIGHT - log_height - 10, SCREEN_WIDTH - 20, log_height)
-
-        # 按钮统一属性
+        self._build_message_log(root, 10, SCREEN_HEIGHT - log_height - 10, SCREEN_WIDTH - 20, log_height)
+
+        # 按钮纵向排列，商店与休息按钮只在当前地点提供时出现
+        button_size = (0, 0, 160, 36)
+        buttons = root.add(Column((30, 150), spacing=16))
+        buttons.add(Button(button_size, "探索周围", (BTN_GREEN, BTN_GREEN_HOVER), explore))
+        buttons.add(Button(button_size, "物品栏", (BTN_BLUE, BTN_BLUE_HOVER),
+                           lambda: go(GameState.INVENTORY, item_page_inv=0, scroll_offset_inventory=0)))
+        buttons.add(Button(button_size, "装备", (BTN_ORANGE, BTN_ORANGE_HOVER),
+                           lambda: go(GameState.EQUIPMENT_SCREEN, scroll_offset_equipment=0)))
+        buttons.add(Button(button_size, "进入商店", (BTN_ORANGE, BTN_ORANGE_HOVER), enter_shop,
+                           visible_if=lambda: location().get("shop_idx") is not None))
+        buttons.add(Button(button_size, "休息-20G", (BTN_PURPLE, BTN_PURPLE_HOVER), rest,
+                           visible_if=lambda: location().get("can_rest", False),
+                           bind=lambda: ("休息-20G", (BTN_PURPLE, BTN_PURPLE_HOVER, KURO) if game.gold >= 20
+                                         else (SHEN_ZI_SE, SHEN_ZI_SE, TEXT_FAINT))))
+
+        # 地点跳转按钮（排除当前地点）
         button_width = 160
-        button_height = 36
-        button_spacing = 16
-        button_x_start = 30
-        button_y = 150
-
-        if self.draw_button("探索周围", button_x_start, button_y, button_width, button_height, BTN_GREEN, BTN_GREEN_HOVER):
-            if self.game.clicked_this_frame:
-                if current_loc["enemies"]:
-                    self.game.start_battle()
-                else:
-                    self.game.add_message("这里很安全，你四处看了看，没什么发现。")
-
-        button_y += button_height + button_spacing
-        if self.draw_button("物品栏", button_x_start, button_y, button_width, button_height, BTN_BLUE, BTN_BLUE_HOVER):
-            if self.game.clicked_this_frame:
-                self.game.state = GameState.INVENTORY
-                self.game.item_page_inv = 0
-                self.game.scroll_offset_inventory = 0
-
-        button_y += button_height + button_spacing
-        if self.draw_button("装备", button_x_start, button_y, button_width, button_height, BTN_ORANGE, BTN_ORANGE_HOVER):
-            if self.game.clicked_this_frame:
-                self.game.state = GameState.EQUIPMENT_SCREEN
-                self.game.scroll_offset_equipment = 0
-
-        if current_loc.get("shop_idx") is not None:
-            button_y += button_height + button_spacing
-            if self.draw_button("进入商店", button_x_start, button_y, button_width, button_height, BTN_ORANGE, BTN_ORANGE_HOVER):
-                if self.game.clicked_this_frame:
-                    self.game.current_shop_idx = current_loc["shop_idx"]
-                    self.game.state = GameState.SHOP
-                    self.game.item_page_shop = 0
-                    self.game.scroll_offset_shop = 0
-
-        if current_loc.get("can_rest", False):
-            button_y += button_height + button_spacing
-            if self.draw_button("休息-20G", button_x_start, button_y, button_width, button_height, 
-                                BTN_PURPLE if self.game.gold >= 20 else SHEN_ZI_SE, 
-                                BTN_PURPLE_HOVER if self.game.gold >= 20 else SHEN_ZI_SE,
-                                KURO if self.game.gold >= 20 else TEXT_FAINT):
-                if self.game.clicked_this_frame:
-                    if self.game.gold >= 20:
-                        self.game.gold -= 20
-                        self.game.message_log.clear()
-                        self.game.scroll_offset_message_log = 0
-                        self.game.rest_at_location()
-
-        # 排除当前地点
-        other_locations = [
-            (i, loc) for i, loc in enumerate(self.game.all_locations)
-            if i != self.game.current_location_idx
-        ]
-
-        # 地点跳转按钮
-        loc_btn_y_start = 180
         loc_btn_x = SCREEN_WIDTH - button_width - 30
-        self.draw_text("前往:", FONT_MEDIUM, TEXT_LIGHT, loc_btn_x + button_width // 2, loc_btn_y_start - 25, "center")
-        for i, loc_data in other_locations:
-            if self.draw_button(loc_data["name"], loc_btn_x, loc_btn_y_start, button_width, 35, BTN_GRAY, BTN_GRAY_LIGHT, KURO, FONT_SMALL):
-                if self.game.clicked_this_frame:
-                    self.game.change_location(i)
-            loc_btn_y_start += 35 + 10
 
-    def merge_similar_items(self, items):
-        grouped_items = defaultdict(list)
-        for item in items:
-            grouped_items[item.name].append(item)
-
-        merged_items = []
-        for name, group in grouped_items.items():
-            rep_item = group[0]
-            rep_item._quantity = len(group)
-            merged_items.append(rep_item)
-
-        return merged_items
-
-    def _draw_multicolumn(self, items, fixed, count, start_x, start_y, x_offset, y_offset, callback):
-        """通用多列布局函数"""
-        for idx, item in enumerate(items):
-            if fixed == 'columns':
-                col = idx % count
-                row = idx // count
-            elif fixed == 'rows':
-                col = idx // count
-                row = idx % count
-            x = start_x + col * x_offset
-            y = start_y + row * y_offset
-            callback(item, idx, x, y)
-
-    def _draw_generic_list_menu(self, title, items_to_display, item_handler_func, back_state, current_page,
-                                scroll_offset_attr_name, items_per_page=5, item_price_func=None, item_desc_func=None):
-        screen.fill(BG_DARK)
-        self.draw_text(title, FONT_LARGE, TEXT_LIGHT, SCREEN_WIDTH // 2, 30, "center")
-
-        merged_items = self.merge_similar_items(items_to_display)
-
-        # --- 分页 ---
-        start_idx = current_page * (items_per_page * 2)  # 每页两列
-        end_idx = start_idx + (items_per_page * 2)
-        visible_items = merged_items[start_idx:end_idx]
-
-        if not merged_items:
-            self.draw_text("空空如也。", FONT_MEDIUM, TEXT_LIGHT, SCREEN_WIDTH // 2, 120, "center")
-        else:
-            col_start_x = 60
-            col_width = SCREEN_WIDTH // 2 - 100
-            button_height = 44
-
-            def draw_callback(item, idx, x, y):
-                # 显示物品名及数量
-                item_count = getattr(item, '_quantity', 1)
-                item_text = f"{item.name} x{item_count}" if item_count > 1 else item.name
-                if item_price_func:
-                    item_text += f" ({item_price_func(item)}G)"
-                if self.draw_button(item_text, x, y, col_width, button_height, BTN_GREEN, BTN_GREEN_HOVER, KURO, FONT_MEDIUM):
-                    if self.game.clicked_this_frame:
-                        item_handler_func(item)
-                # 显示描述信息
-                desc = item_desc_func(item) if item_desc_func else getattr(item, 'description', None)
-                if desc:
-                    self.draw_text(desc, FONT_SMALL, TEXT_FAINT, x + 6, y + button_height + 2, max_width=col_width - 12)
-
-            self._draw_multicolumn(
-                items=visible_items,
-                fixed='columns',
-                count=2,
-                start_x=60,
-                start_y=100,
-                x_offset=(SCREEN_WIDTH // 2 + 20) - col_start_x,
-                y_offset=76,
-                callback=draw_callback
-                )
-
-        total_pages = (len(merged_items) - 1) // (items_per_page * 2) + 1
-        if total_pages > 1:
-            self.draw_text(f"页: {current_page + 1}/{total_pages}", FONT_MEDIUM, TEXT_FAINT, SCREEN_WIDTH // 2, SCREEN_HEIGHT - 130, "center")
-            if current_page > 0:
-                if self.draw_button("上一页", 50, SCREEN_HEIGHT - 130, 100, 38, BTN_BLUE, BTN_BLUE_HOVER):
-                    if self.game.clicked_this_frame:
-                        setattr(self.game, scroll_offset_attr_name, current_page - 1)
-            if current_page < total_pages - 1:
-                if self.draw_button("下一页", SCREEN_WIDTH - 150, SCREEN_HEIGHT - 130, 100, 38, BTN_BLUE, BTN_BLUE_HOVER):
-                    if self.game.clicked_this_frame:
-                        setattr(self.game, scroll_offset_attr_name, current_page + 1)
-
-        if self.draw_button("返回", SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 80, 150, 34, BTN_RED, BTN_RED_HOVER):
-            if self.game.clicked_this_frame:
-                self.game.state = back_state
-                if scroll_offset_attr_name == "item_page_inv":
-                    self.game.item_page_inv = 0
-                elif scroll_offset_attr_name == "item_page_shop":
-                    self.game.item_page_shop = 0
-
-    def draw_battle_reward_screen(self): # 战斗胜利奖励界面
-        screen.fill(BG_DARK)
-        self.draw_text("战斗胜利！", FONT_LARGE, BTN_ORANGE, SCREEN_WIDTH // 2, 100, "center")
-
-        y = 180
-        self.draw_text(f"获得经验: {self.game.battle_rewards['exp']}", FONT_MEDIUM, SHIRONEZUMI, SCREEN_WIDTH // 2, y, "center")
-        y += 40
-        self.draw_text(f"获得金币: {self.game.battle_rewards['gold']}", FONT_MEDIUM, BTN_ORANGE, SCREEN_WIDTH // 2, y, "center")
-        y += 40
-
-        if self.game.battle_rewards['items']:
-            self.draw_text("获得物品:", FONT_MEDIUM, SHIRONEZUMI, SCREEN_WIDTH // 2, y, "center")
-            y += 30
-            for item in self.game.battle_rewards['items']:
-                self.draw_text(f"- {item.name}", FONT_SMALL, BTN_CYAN, SCREEN_WIDTH // 2, y, "center")
-                y += 25
-
-        if self.draw_button("继续", SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 100, 150, 50, BTN_BLUE, BTN_BLUE_HOVER):
-            if self.game.clicked_this_frame:
-                self.game.process_battle_rewards()
-
-    def draw_game_over(self): # 游戏结束界面
-        screen.fill(SUMI)
-        self.draw_text("游戏结束", FONT_LARGE, BTN_RED, SCREEN_WIDTH // 2, 200, "center")
-        if self.game.player:
-            self.draw_text(f"你 {self.game.player.name} 倒下了。", FONT_MEDIUM, TEXT_LIGHT, SCREEN_WIDTH // 2, 250, "center")
-            self.draw_text(f"最终等级: {self.game.player.level}", FONT_MEDIUM, TEXT_LIGHT, SCREEN_WIDTH // 2, 280, "center")
-
-        if self.draw_button("返回主菜单", SCREEN_WIDTH // 2 - 100, 400, 200, 50, BTN_GRAY, BTN_GRAY_LIGHT):
-            if self.game.clicked_this_frame:
-                self.game.state = GameState.MAIN_MENU
+        def location_button(entry, x, y):
+            i, name = entry
+            return Button((x, y, button_width, 35), name, (BTN_GRAY, BTN_GRAY_LIGHT, KURO),
+                          lambda: game.change_location(i), FONT_SMALL)
 
-    def draw_equipment_screen(self):
-        """绘制装备界面"""
-        screen.fill(BG_DARK)
-        self.draw_text("装备栏", FONT_LARGE, TEXT_LIGHT, SCREEN_WIDTH // 2, 30, "center")
+        root.add(Label((loc_btn_x + button_width // 2, 180 - 25), "前往:", FONT_MEDIUM, TEXT_LIGHT, "center"))
+        root.add(GridList((loc_btn_x, 180), 1, 0, 35 + 10, location_button,
+                          bind=lambda: [(i, loc["name"]) for i, loc in enumerate(game.all_locations)
+                                        if i != game.current_location_idx]))
 
-        y = 80
-        self.draw_text("当前装备：", FONT_MEDIUM, TEXT_LIGHT, 150, y, "center")
-        for slot, item in self.game.player.equipment.items():
-            slot_name_map = {'weapon': "武器", 'armor': "护甲", 'helmet': "头盔", 'accessory': "饰品"}
-            text = f"{slot_name_map.get(slot, slot)}: {item if item else '无'}"
-            self.draw_text(text, FONT_SMALL, BTN_CYAN, 50, y + 40)
-            if item:
-                pygame.draw.rect(screen, BTN_GRAY_LIGHT, (10, y + 35, 28, 28), 1)
-                if self.draw_button("↓", 10, y + 35, 28, 28, BG_DARK, BTN_GRAY, BTN_RED, FONT_SMALL):
-                    if self.game.clicked_this_frame:
-                        _, msg = self.game.player.unequip(slot)
-                        self.game.add_message(msg)
-            y += 37
+    # ===================== 物品栏与商店 =====================
 
-        self.draw_player_status_bar(SCREEN_WIDTH - 330, 10, 320, 120)
+    def merge_similar_items(self, items):
+        """按名称合并同类物品，返回 [(代表物品, 数量), ...]"""
+        counts = {}
+        representatives = {}
+        for item in items:
+            if item.name in counts:
+                counts[item.name] += 1
+            else:
+                counts[item.name] = 1
+                representatives[item.name] = item
+        return [(representatives[name], count) for name, count in counts.items()]
 
-        equippable = [it for it in self.game.player.inventory if isinstance(it, Equipment)]
-        merged_items = self.merge_similar_items(equippable)
+    def _build_list_menu(self, parent, title, entries, item_handler_func, back_state, page_attr,
+                         item_price_func=None, visible_if=None):
+        """两列分页的物品列表（物品栏、商店共用）
 
-        # --- 多列显示 ---
+        title() 返回标题，entries() 返回 [(物品, 数量), ...] 或背包/背包视图，
+        back_state() 返回点击“返回”后的状态；当前页码保存在 game.<page_attr>。
+        """
+        game = self.game
+        page_size = game.items_per_page * 2  # 每页两列
         col_start_x = 60
         col_width = SCREEN_WIDTH // 2 - 100
         button_height = 44
-        items_per_col = 3  # 每列 3 个按钮
-        items_per_page = items_per_col * 2  # 每页两列
-        page = self.game.scroll_offset_equipment
-        start = page * items_per_page
-        end = start + items_per_page
-        visible_items = merged_items[start:end]
-
-        def equip_callback(item, idx, x, y):
-            count = getattr(item, '_quantity', 1)
-            btn_text = f"{item.name} x{count}" if count > 1 else item.name
-
-            pygame.draw.rect(screen, LIGHT_PANEL, (x, y, col_width, button_height))
-            pygame.draw.rect(screen, TEXT_LIGHT, (x, y, col_width, button_height), 1)
-            self.draw_text(btn_text, FONT_MEDIUM, TEXT_LIGHT, x + 20, y + 5, max_width=col_width)
 
-            if self.draw_button("装备", x + col_width - 60, y + button_height // 2 - 14, 50, 28, BTN_PURPLE, BTN_PURPLE_HOVER, KURO, FONT_SMALL):
-                if self.game.clicked_this_frame:
-                    _, msg = self.game.player.equip(item)
-                    self.game.add_message(msg)
-                    if len(merged_items) <= self.game.scroll_offset_equipment * items_per_page and self.game.scroll_offset_equipment > 0:
-                        self.game.scroll_offset_equipment -= 1
-
-            if getattr(item, "description", None):
-                self.draw_text(item.description, FONT_SMALL, TEXT_FAINT, x + 6, y + button_height + 2, max_width=col_width - 12)
-
-        self._draw_multicolumn(
-                items=visible_items,
-                fixed='columns',
-                count=2,
-                start_x=60,
-                start_y=y+60,
-                x_offset=(SCREEN_WIDTH // 2 + 20) - col_start_x,
-                y_offset=76,
-                callback=equip_callback
-                )
+        get_page = lambda: getattr(game, page_attr)
+        page_count = lambda: (len(entries()) - 1) // page_size + 1
+
+        def visible_entries():
+            merged_items = entries()
+            if isinstance(merged_items, StackSequence):
+                return merged_items.page(get_page(), page_size)
+            start_idx = get_page() * page_size
+            return merged_items[start_idx:start_idx + page_size]
+
+        def make_cell(entry, x, y):
+            # 显示物品名及数量
+            item, item_count = entry
+            item_text = f"{item.name} x{item_count}" if item_count > 1 else item.name
+            if item_price_func:
+                item_text += f" ({item_price_func(item)}G)"
+            cell = Widget()
+            cell.add(Button((x, y, col_width, button_height), item_text, (BTN_GREEN, BTN_GREEN_HOVER, KURO),
+                            lambda: item_handler_func(item), FONT_MEDIUM))
+            # 显示描述信息
+            desc = getattr(item, 'description', None)
+            if desc:
+                cell.add(Label((x + 6, y + button_height + 2), desc, FONT_SMALL, TEXT_FAINT, max_width=col_width - 12))
+            return cell
+
+        def back():
+            game.state = back_state()
+            setattr(game, page_attr, 0)
+
+        menu = parent.add(Widget(visible_if=visible_if))
+        menu.add(Label((SCREEN_WIDTH // 2, 30), "", FONT_LARGE, TEXT_LIGHT, "center", bind=title))
+        menu.add(Label((SCREEN_WIDTH // 2, 120), "空空如也。", FONT_MEDIUM, TEXT_LIGHT, "center",
+                       visible_if=lambda: not entries()))
+        menu.add(GridList((col_start_x, 100), 2, (SCREEN_WIDTH // 2 + 20) - col_start_x, 76, make_cell,
+                          bind=visible_entries))
+        self._build_pager(menu, get_page, lambda page: setattr(game, page_attr, page), page_count)
+        menu.add(Button((SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 80, 150, 34), "返回", (BTN_RED, BTN_RED_HOVER), back))
+        return menu
+
+    def _build_inventory(self, root):
+        game = self.game
+        self._build_list_menu(
+            root,
+            lambda: "物品栏",
+            lambda: game.player.inventory,
+            self._handle_item_use,
+            lambda: GameState.BATTLE if game.current_enemy and game.state != GameState.EXPLORING else GameState.EXPLORING,
+            "item_page_inv",
+        )
 
-        # --- 分页 ---
-        total_pages = (len(merged_items) - 1) // items_per_page + 1
-        if total_pages > 1:
-            self.draw_text(f"页: {page + 1}/{total_pages}", FONT_MEDIUM, TEXT_FAINT, SCREEN_WIDTH // 2, SCREEN_HEIGHT - 130, "center")
-            if page > 0:
-                if self.draw_button("上一页", 50, SCREEN_HEIGHT - 130, 100, 38, BTN_BLUE, BTN_BLUE_HOVER):
-                    if self.game.clicked_this_frame:
-                        self.game.scroll_offset_equipment -= 1
-            if page < total_pages - 1:
-                if self.draw_button("下一页", SCREEN_WIDTH - 150, SCREEN_HEIGHT - 130, 100, 38, BTN_BLUE, BTN_BLUE_HOVER):
-                    if self.game.clicked_this_frame:
-                        self.game.scroll_offset_equipment += 1
-
-        if self.draw_button("返回", SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 80, 150, 34, BTN_RED, BTN_RED_HOVER):
-            if self.game.clicked_this_frame:
-                self.game.state = GameState.EXPLORING
+    def _build_shop(self, root):
+        game = self.game
+        shop = lambda: game.all_shops[game.current_shop_idx]
+        sell_price = lambda item: item.price // 2 if hasattr(item, "price") else 1
 
-    def draw_shop_screen(self):
-        """绘制商店界面"""
-        shop = self.game.all_shops[self.game.current_shop_idx]
+        def handle_buy_item(item):
+            if game.gold >= item.price:
+                game.gold -= item.price
+                game.player.add_item_to_inventory(item)
+                game.add_message(f"购买了 {item.name}。")
+            else:
+                game.add_message("金币不足！")
+
+        def handle_sell_item(item):
+            price = sell_price(item)
+            game.gold += price
+            game.player.remove_item_from_inventory(item)
+            game.add_message(f"售出 {item.name}，获得 {price} 金币。")
+
+        def set_tab(tab):
+            game.shop_tab = tab
+
+        self._build_list_menu(
+            root,
+            lambda: f"{shop().name} (金币: {game.gold})",
+            lambda: self.merge_similar_items(shop().get_all_sellable_goods()),
+            handle_buy_item,
+            lambda: GameState.EXPLORING,
+            "item_page_shop",
+            item_price_func=lambda item: item.price,
+            visible_if=lambda: game.shop_tab == "buy",
+        )
+        self._build_list_menu(
+            root,
+            lambda: f"出售物品 (金币: {game.gold})",
+            lambda: game.player.inventory,
+            handle_sell_item,
+            lambda: GameState.EXPLORING,
+            "item_page_shop",
+            item_price_func=sell_price,
+            visible_if=lambda: game.shop_tab == "sell",
+        )
 
         # 页签按钮
         tab_x = SCREEN_WIDTH // 2 - 130
-
-        # 获取物品列表和处理逻辑
-        if self.game.shop_tab == "buy":
-            goods = shop.get_all_sellable_goods()
-
-            def handle_buy_item(item):
-                if self.game.gold >= item.price:
-                    self.game.gold -= item.price
-                    self.game.player.add_item_to_inventory(item)
-                    self.game.add_message(f"购买了 {item.name}。")
-                else:
-                    self.game.add_message("金币不足！")
-
-            self._draw_generic_list_menu(
-                f"{shop.name} (金币: {self.game.gold})",
-                goods,
-                handle_buy_item,
-                GameState.EXPLORING,
-                self.game.item_page_shop, "item_page_shop", self.game.items_per_page,
-                item_price_func=lambda item: item.price
-            )
-
-            if self.draw_button("出售", tab_x + 160, 60, 100, 30,
-                            BTN_ORANGE if self.game.shop_tab == "sell" else BTN_RED,
-                            BTN_ORANGE_HOVER if self.game.shop_tab == "sell" else BTN_RED_HOVER):
-                if self.game.clicked_this_frame:
-                    self.game.shop_tab = "sell"
-
-        elif self.game.shop_tab == "sell":
-            sellable = [item for item in self.game.player.inventory]
-            sell_price = lambda item: item.price // 2 if hasattr(item, "price") else 1
-
-            def handle_sell_item(item):
-                price = sell_price(item)
-                self.game.gold += price
-                self.game.player.remove_item_from_inventory(item)
-                self.game.add_message(f"售出 {item.name}，获得 {price} 金币。")
-
-            self._draw_generic_list_menu(
-                f"出售物品 (金币: {self.game.gold})",
-                sellable,
-                handle_sell_item,
-                GameState.EXPLORING,
-                self.game.item_page_shop, "item_page_shop", self.game.items_per_page,
-                item_price_func=sell_price
-            )
-
-            if self.draw_button("购买", tab_x - 20, 60, 100, 30,
-                            BTN_GREEN if self.game.shop_tab == "buy" else BTN_ORANGE,
-                            BTN_GREEN_HOVER if self.game.shop_tab == "buy" else BTN_ORANGE_HOVER):
-                if self.game.clicked_this_frame:
-                    self.game.shop_tab = "buy"
-
-    def draw_inventory(self):
-        """绘制物品栏界面"""
-        def handle_item_use_from_inv(item_obj):
-            self._handle_item_use(item_obj)
-
-        back_state = GameState.BATTLE if self.game.current_enemy and self.game.state != GameState.EXPLORING else GameState.EXPLORING
-        self._draw_generic_list_menu(
-                "物品栏",
-                self.game.player.inventory,
-                handle_item_use_from_inv,
-                back_state,
-                self.game.item_page_inv,
-                "item_page_inv",
-                self.game.items_per_page
-            )
+        root.add(Button((tab_x + 160, 60, 100, 30), "出售", (BTN_RED, BTN_RED_HOVER), lambda: set_tab("sell"),
+                        visible_if=lambda: game.shop_tab == "buy"))
+        root.add(Button((tab_x - 20, 60, 100, 30), "购买", (BTN_ORANGE, BTN_ORANGE_HOVER), lambda: set_tab("buy"),
+                        visible_if=lambda: game.shop_tab == "sell"))
 
     def _handle_item_use(self, item_obj):
         """统一处理物品使用逻辑"""
@@ -563,209 +495,313 @@ class GameUI:
         if len(inv) <= self.game.item_page_inv * self.game.items_per_page and self.game.item_page_inv > 0:
             self.game.item_page_inv -= 1
 
-    def draw_character_info_screen(self):
-        """绘制角色信息界面"""
-        screen.fill(BG_DARK)
-        self.draw_text("角色信息", FONT_LARGE, TEXT_LIGHT, SCREEN_WIDTH // 2, 30, "center")
-
-        self._draw_character_stats()
-        self._draw_equipment_info()
-        self._draw_skill_list()
+    # ===================== 装备与角色信息 =====================
 
-        if self.draw_button("返回", SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 80, 150, 40, BTN_RED, BTN_RED_HOVER):
-            if self.game.clicked_this_frame:
-                self.game.state = GameState.EXPLORING
+    def _build_equipment(self, root):
+        game = self.game
+        root.add(Label((SCREEN_WIDTH // 2, 30), "装备栏", FONT_LARGE, TEXT_LIGHT, "center"))
 
-    # ===================== 私有辅助方法_始 =====================
+        def unequip(slot):
+            _, msg = game.player.unequip(slot)
+            game.add_message(msg)
 
-    def _draw_character_stats(self):
-        """绘制玩家基本信息"""
         y = 80
-        x = 50
-        p = self.game.player
-        info = [
-            f"名字: {p.name}",
-            f"等级: {p.level}",
-            f"经验: {p.exp} / {p.exp_to_next_level}",
-            f"金币: {self.game.gold}",
-            f"生命值: {p.hp} / {p.max_hp}",
-            f"法力值: {p.mp} / {p.max_mp}",
-            f"攻击力: {p.attack} (基础: {p.base_attack})",
-            f"防御力: {p.defense} (基础: {p.base_defense})"
-        ]
-        colors = [
-            TEXT_LIGHT, SHIRONEZUMI, SHIRONEZUMI, BTN_ORANGE,
-            BTN_GREEN, BTN_BLUE, SHIRONEZUMI, SHIRONEZUMI
-        ]
+        root.add(Label((150, y), "当前装备：", FONT_MEDIUM, TEXT_LIGHT, "center"))
+        for slot, slot_name in SLOT_NAMES.items():
+            equipped = lambda slot=slot: game.player.equipment.get(slot)
+            root.add(Label((50, y + 40), "", FONT_SMALL, BTN_CYAN,
+                           bind=lambda slot_name=slot_name, equipped=equipped: f"{slot_name}: {equipped() if equipped() else '无'}"))
+            button = root.add(Widget(visible_if=lambda equipped=equipped: equipped() is not None))
+            button.add(Panel((10, y + 35, 28, 28), border=BTN_GRAY_LIGHT))
+            button.add(Button((10, y + 35, 28, 28), "↓", (BG_DARK, BTN_GRAY, BTN_RED), lambda slot=slot: unequip(slot), FONT_SMALL))
+            y += 37
 
-        for line, color in zip(info, colors):
-            self.draw_text(line, FONT_MEDIUM, color, x, y)
-            y += 35 if "金币" not in line else 50
+        self._build_player_status(root, SCREEN_WIDTH - 330, 10, 320, 120)
 
-    def _draw_equipment_info(self):
-        """绘制当前装备信息"""
-        y = 80
-        x = 400
-        self.draw_text("当前装备:", FONT_MEDIUM, TEXT_LIGHT, x, y)
-        y += 35
+        # --- 多列显示 ---
+        col_start_x = 60
+        col_width = SCREEN_WIDTH // 2 - 100
+        button_height = 44
+        items_per_col = 3  # 每列 3 个按钮
+        items_per_page = items_per_col * 2  # 每页两列
+        merged_items = lambda: game.player.inventory.select('class', Equipment)
 
-        slot_name_map = {'weapon': "武器", 'armor': "护甲", 'helmet': "头盔", 'accessory': "饰品"}
-        for slot, item in self.game.player.equipment.items():
-            name = item.name if item else "无"
-            label = slot_name_map.get(slot, slot)
-            self.draw_text(f"{label}: {name}", FONT_SMALL, TEXT_FAINT, x, y)
-            y += 25
+        def equip(item):
+            _, msg = game.player.equip(item)
+            game.add_message(msg)
+            if len(merged_items()) <= game.scroll_offset_equipment * items_per_page and game.scroll_offset_equipment > 0:
+                game.scroll_offset_equipment -= 1
+
+        def make_cell(entry, x, y):
+            item, count = entry
+            btn_text = f"{item.name} x{count}" if count > 1 else item.name
+            cell = Widget()
+            cell.add(Panel((x, y, col_width, button_height), LIGHT_PANEL, TEXT_LIGHT))
+            cell.add(Label((x + 20, y + 5), btn_text, FONT_MEDIUM, TEXT_LIGHT, max_width=col_width))
+            cell.add(Button((x + col_width - 60, y + button_height // 2 - 14, 50, 28), "装备",
+                            (BTN_PURPLE, BTN_PURPLE_HOVER, KURO), lambda: equip(item), FONT_SMALL))
+            if getattr(item, "description", None):
+                cell.add(Label((x + 6, y + button_height + 2), item.description, FONT_SMALL, TEXT_FAINT,
+                               max_width=col_width - 12))
+            return cell
 
-    def _draw_skill_list(self):
-        """绘制技能列表"""
-        y = 260
+        root.add(GridList((col_start_x, y + 60), 2, (SCREEN_WIDTH // 2 + 20) - col_start_x, 76, make_cell,
+                          bind=lambda: merged_items().page(game.scroll_offset_equipment, items_per_page)))
+
+        # --- 分页 ---
+        self._build_pager(root, lambda: game.scroll_offset_equipment,
+                          lambda page: setattr(game, "scroll_offset_equipment", page),
+                          lambda: (len(merged_items()) - 1) // items_per_page + 1)
+
+        root.add(Button((SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 80, 150, 34), "返回", (BTN_RED, BTN_RED_HOVER),
+                        lambda: setattr(game, "state", GameState.EXPLORING)))
+
+    def _build_character_info(self, root):
+        game = self.game
+        p = lambda: game.player
+        root.add(Label((SCREEN_WIDTH // 2, 30), "角色信息", FONT_LARGE, TEXT_LIGHT, "center"))
+
+        # 玩家基本信息
+        def state():
+            player = game.player
+            return (player, player.name, player.level, player.exp, player.hp, player.mp,
+                    player.stats_version, game.gold, dict(player.equipment))
+
+        stats = root.add(Widget(bind=state))
+        lines = [
+            (lambda: f"名字: {p().name}", TEXT_LIGHT),
+            (lambda: f"等级: {p().level}", SHIRONEZUMI),
+            (lambda: f"经验: {p().exp} / {p().exp_to_next_level}", SHIRONEZUMI),
+            (lambda: f"金币: {game.gold}", BTN_ORANGE),
+            (lambda: f"生命值: {p().hp} / {p().max_hp}", BTN_GREEN),
+            (lambda: f"法力值: {p().mp} / {p().max_mp}", BTN_BLUE),
+            (lambda: f"攻击力: {p().attack} (基础: {p().base_attack})", SHIRONEZUMI),
+            (lambda: f"防御力: {p().defense} (基础: {p().base_defense})", SHIRONEZUMI),
+        ]
+        y = 80
+        for text, color in lines:
+            stats.add(Label((50, y), "", FONT_MEDIUM, color, bind=text))
+            y += 35 if color != BTN_ORANGE else 50
+
+        # 当前装备信息
+        y = 80
         x = 400
-        self.draw_text("技能列表：", FONT_MEDIUM, TEXT_LIGHT, x, y)
+        stats.add(Label((x, y), "当前装备:", FONT_MEDIUM, TEXT_LIGHT))
         y += 35
+        for slot, label in SLOT_NAMES.items():
+            stats.add(Label((x, y), "", FONT_SMALL, TEXT_FAINT,
+                            bind=lambda slot=slot, label=label: f"{label}: {p().equipment[slot].name if p().equipment.get(slot) else '无'}"))
+            y += 25
 
-        for skill in self.game.player.skills[1:7]:
-            self.draw_text(f"- {skill.name} (MP: {skill.mp_cost})", FONT_SMALL, BTN_CYAN, x, y)
-            self.draw_text(
-                f"  {skill.description}",
-                FONT_SMALL,
-                TEXT_FAINT,
-                x + 10,
-                y + 20,
-                max_width=SCREEN_WIDTH - x - 20
-            )
-            y += 45
-            if y > SCREEN_HEIGHT - 100:
-                break
-
-    # ===================== 私有辅助方法_终 =====================
+        # 技能列表
+        def skill_cell(skill, x, y):
+            cell = Widget()
+            cell.add(Label((x, y), f"- {skill.name} (MP: {skill.mp_cost})", FONT_SMALL, BTN_CYAN))
+            cell.add(Label((x + 10, y + 20), f"  {skill.description}", FONT_SMALL, TEXT_FAINT,
+                           max_width=SCREEN_WIDTH - x - 20))
+            return cell
+
+        root.add(Label((400, 260), "技能列表：", FONT_MEDIUM, TEXT_LIGHT))
+        root.add(GridList((400, 295), 1, 0, 45, skill_cell, bind=lambda: list(p().skills[1:7])))
+
+        root.add(Button((SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 80, 150, 40), "返回", (BTN_RED, BTN_RED_HOVER),
+                        lambda: setattr(game, "state", GameState.EXPLORING)))
+
+    # ===================== 战斗 =====================
+
+    def _build_battle(self, root):
+        game = self.game
+        self._build_player_status(root, 10, 10, SCREEN_WIDTH // 2 - 20, 120, visible_if=lambda: game.player)
+        self._build_enemy_status_panel(root)
+        self._build_enemy_group_list(root, SCREEN_WIDTH // 2 + 10, 180, SCREEN_WIDTH // 2 - 20, 230)
+        self._build_message_log(root, 10, SCREEN_HEIGHT - 160, SCREEN_WIDTH - 20, 150)
+
+        def turn_text():
+            if game.battle_turn == "player":
+                return "你的回合！"
+            if len(game.current_enemies) > 1:
+                return "敌方的回合..."
+            return f"{game.current_enemy.name} 的回合..." if game.current_enemy else ""
+
+        root.add(Label((SCREEN_WIDTH // 2, 160), "", FONT_MEDIUM, TEXT_LIGHT, "center", bind=turn_text))
+        self._build_player_actions_panel(root)
+
+    def _build_enemy_status_panel(self, root):
+        game = self.game
+        e = lambda: game.current_enemy
+        panel_rect = pygame.Rect(SCREEN_WIDTH // 2 + 10, 10, SCREEN_WIDTH // 2 - 20, 120)
 
-    def draw_battle(self):
-        screen.fill(BG_DARK if self.game.current_enemy else KURO)
-        if self.game.player:
-            self.draw_player_status_bar(10, 10, SCREEN_WIDTH // 2 - 20, 120)
-        if self.game.current_enemy:
-            self.draw_enemy_status_panel()
+        def state():
+            enemy = game.current_enemy
+            return (enemy, enemy.name, enemy.level, enemy.hp, enemy.mp, enemy.stats_version, enemy.exp_reward,
+                    enemy.gold_reward, [(effect.name, effect.turns_remaining) for effect in enemy.status_effects[:2]])
+
+        def show_details():
+            from test.print_details import print_enemy_details
+            print_enemy_details(game.current_enemy)
+
+        panel = root.add(Panel(panel_rect, LIGHT_PANEL, TEXT_LIGHT, bind=state, visible_if=lambda: game.current_enemy))
+        panel.add(Label((panel_rect.x + 10, 20), "", FONT_MEDIUM, TEXT_LIGHT, bind=lambda: f"{e().name} | Lv.{e().level}"))
+        panel.add(Label((panel_rect.x + 10, 50), "", FONT_SMALL, BTN_GREEN,
+                        bind=lambda: (f"HP: {e().hp}/{e().max_hp}", BTN_GREEN if e().hp > e().max_hp * 0.3 else BTN_RED_DARK)))
+        panel.add(Label((panel_rect.x + 160, 50), "", FONT_SMALL, BTN_BLUE, bind=lambda: f"MP: {e().mp}/{e().max_mp}"))
+        panel.add(Label((panel_rect.x + 10, 75), "", FONT_SMALL, TEXT_FAINT, bind=lambda: f"ATK: {e().attack} DEF: {e().defense}"))
+        panel.add(Label((panel_rect.x + 160, 75), "", FONT_SMALL, BTN_PURPLE, bind=lambda: f"EXP: {e().exp_reward}"))
+        panel.add(Label((panel_rect.x + 160, 100), "", FONT_SMALL, BTN_ORANGE, bind=lambda: f"金币: {e().gold_reward}"))
+        # 显示敌人状态效果（最多2个）
+        self._add_effect_labels(panel, e, panel_rect.x + 10, 90)
+        self._build_info_button(panel, panel_rect.right - 38, panel_rect.y + 10, show_details)
 
-        self.draw_message_log(10, SCREEN_HEIGHT - 160, SCREEN_WIDTH - 20, 150)
+    def _build_enemy_group_list(self, root, x, y, width, height):
+        """一组敌人的列表：点击一行选为目标，滚轮翻看"""
+        game = self.game
+        padding = 5
+        top = y + 30
+        list_surface = EnemyListSurface(self, width - 2 * padding, height - 30 - padding, FONT_SMALL, LIGHT_PANEL)
+
+        def max_offset():
+            limit = max(0, len(game.current_enemies) - list_surface.rows)
+            game.scroll_offset_enemy_list = max(0, min(game.scroll_offset_enemy_list, limit))
+            return limit
+
+        def scroll(direction):
+            limit = max_offset()
+            game.scroll_offset_enemy_list = max(0, min(limit, game.scroll_offset_enemy_list + direction))
+
+        def list_revision():
+            max_offset()
+            list_surface.update(game.current_enemies, game.scroll_offset_enemy_list, game.current_enemy)
+            return list_surface.revision
+
+        def range_text():
+            enemies = game.current_enemies
+            offset = game.scroll_offset_enemy_list
+            if not max_offset():
+                return ""
+            return f"{offset + 1}-{min(len(enemies), offset + list_surface.rows)} (滚轮翻看)"
+
+        def select():
+            game.select_target(list_surface.index_at(game.mouse_pos[1] - top, game.scroll_offset_enemy_list))
+
+        group = root.add(Panel((x, y, width, height), LIGHT_PANEL, TEXT_LIGHT, on_wheel=scroll,
+                               visible_if=lambda: len(game.current_enemies) > 1))
+        group.add(Label((x + 10, y + 6), "", FONT_SMALL, TEXT_LIGHT,
+                        bind=lambda: f"敌人 {sum(1 for enemy in game.current_enemies if enemy.hp > 0)}/{len(game.current_enemies)}"))
+        group.add(Label((x + width - 10, y + 6), "", FONT_SMALL, TEXT_FAINT, "right", bind=range_text))
+        group.add(SurfaceView((x + padding, top, width - 2 * padding, height - 30 - padding),
+                              lambda revision: list_surface.surface, bind=list_revision, on_click=select))
+
+    def _build_player_actions_panel(self, root):
+        game = self.game
+        skill_x, skill_y = 20, SCREEN_HEIGHT - 300
+        actions = root.add(Widget(visible_if=lambda: game.battle_turn == "player" and game.player.is_alive()))
+        actions.add(Label((skill_x + 75, skill_y - 25), "技能:", FONT_MEDIUM, TEXT_LIGHT, "center"))
+        self._build_skill_buttons(actions, skill_x, skill_y)
+        self._build_action_buttons(actions, SCREEN_WIDTH - 220, skill_y)
+        self._build_item_popup(actions)
+
+    def _build_skill_buttons(self, parent, x, y):
+        game = self.game
+        skills_per_page = 3
+        filtered_skills = lambda: game.player.skills[1:]
+        total_pages = lambda: (len(filtered_skills()) - 1) // skills_per_page + 1
 
-        turn_text = "你的回合！" if self.game.battle_turn == "player" else f"{self.game.current_enemy.name} 的回合..."
-        self.draw_text(turn_text, FONT_MEDIUM, TEXT_LIGHT, SCREEN_WIDTH // 2, 160, "center")
+        def visible_skills():
+            start = game.scroll_offset_skills * skills_per_page
+            return [(skill, game.player.mp >= skill.mp_cost) for skill in filtered_skills()[start:start + skills_per_page]]
 
-        if self.game.battle_turn == "player" and self.game.player.is_alive():
-            self.draw_player_actions_panel()
+        def use_skill(skill):
+            if game.player.mp >= skill.mp_cost:
+                game.player_action(skill_idx=game.player.skills.index(skill))
+                self.show_item_popup = False
 
-    def draw_enemy_status_panel(self):
-        enemy = self.game.current_enemy
-        panel_rect = pygame.Rect(SCREEN_WIDTH // 2 + 10, 10, SCREEN_WIDTH // 2 - 20, 120)
-        pygame.draw.rect(screen, LIGHT_PANEL, panel_rect)
-        pygame.draw.rect(screen, TEXT_LIGHT, panel_rect, 1)
+        def skill_button(entry, bx, by):
+            skill, enough_mp = entry
+            label = f"{skill.name}" + (f"-MP:{skill.mp_cost}" if skill.mp_cost else '')
+            colors = (BTN_CYAN, BTN_CYAN_HOVER, KURO) if enough_mp else (SHEN_LAN_SE, SHEN_LAN_SE, TEXT_FAINT)
+            return Button((bx, by, 200, 40), label, colors, lambda: use_skill(skill))
 
-        self.draw_text(f"{enemy.name} | Lv.{enemy.level}", FONT_MEDIUM, TEXT_LIGHT, panel_rect.x + 10, 20)
-        self.draw_text(f"HP: {enemy.hp}/{enemy.max_hp}", FONT_SMALL,
-                       BTN_GREEN if enemy.hp > enemy.max_hp * 0.3 else BTN_RED_DARK, panel_rect.x + 10, 50)
-        self.draw_text(f"MP: {enemy.mp}/{enemy.max_mp}", FONT_SMALL, BTN_BLUE, panel_rect.x + 160, 50)
-        self.draw_text(f"ATK: {enemy.attack} DEF: {enemy.defense}", FONT_SMALL, TEXT_FAINT, panel_rect.x + 10, 75)
-        self.draw_text(f"EXP: {enemy.exp_reward}", FONT_SMALL, BTN_PURPLE, panel_rect.x + 160, 75)
-        self.draw_text(f"金币: {enemy.gold_reward}", FONT_SMALL, BTN_ORANGE, panel_rect.x + 160, 100)
+        def page_by(delta):
+            game.scroll_offset_skills += delta
 
-        # 显示敌人状态效果（最多2个）
-        y_offset = 100
-        for effect in enemy.status_effects[:2]:
-            self.draw_text(f"{effect.name}({effect.turns_remaining})", FONT_SMALL, BTN_PURPLE, panel_rect.x + 10, y_offset - 10)
-            y_offset += 15
-
-        pygame.draw.rect(screen, BTN_GRAY_LIGHT, (panel_rect.right - 38, panel_rect.y + 10, 28, 28), 1)
-        if self.draw_button("i", panel_rect.right - 38, panel_rect.y + 10, 28, 28, LIGHT_PANEL, BTN_GRAY, BTN_ORANGE, FONT_SMALL):
-            if self.game.clicked_this_frame:
-                from test.print_details import print_enemy_details
-                print_enemy_details(enemy)
-
-    def draw_player_actions_panel(self):
-        skill_x, skill_y = 20, SCREEN_HEIGHT - 300
-        self.draw_text("技能:", FONT_MEDIUM, TEXT_LIGHT, skill_x + 75, skill_y - 25, "center")
-        self.draw_skill_buttons(skill_x, skill_y)
-        self.draw_action_buttons(SCREEN_WIDTH - 220, skill_y)
+        parent.add(GridList((x, y), 1, 0, 45, skill_button, bind=visible_skills))
+        parent.add(Button((x + 125, y - 35, 28, 28), "↑", (BTN_BLUE, BTN_BLUE_HOVER), lambda: page_by(-1),
+                          visible_if=lambda: total_pages() > 1 and game.scroll_offset_skills > 0))
+        parent.add(Button((x + 160, y - 35, 28, 28), "↓", (BTN_BLUE, BTN_BLUE_HOVER), lambda: page_by(1),
+                          visible_if=lambda: total_pages() > 1 and game.scroll_offset_skills < total_pages() - 1))
 
-    def draw_skill_buttons(self, x, y):
-        filtered_skills = self.game.player.skills[1:]
-        skills_per_page = 3
-        start = self.game.scroll_offset_skills * skills_per_page
-        visible_skills = filtered_skills[start:start + skills_per_page]
+    def _build_action_buttons(self, parent, x, y):
+        game = self.game
 
-        for i, skill in enumerate(visible_skills):
-            true_idx = self.game.player.skills.index(skill)
-            label = f"{skill.name}" + (f"-MP:{skill.mp_cost}" if skill.mp_cost else '')
-            enough_mp = self.game.player.mp >= skill.mp_cost
-            btn_color = BTN_CYAN if enough_mp else SHEN_LAN_SE
-            hover_color = BTN_CYAN_HOVER if enough_mp else SHEN_LAN_SE
-            font_color = KURO if enough_mp else TEXT_FAINT
-
-            if self.draw_button(label, x, y + i * 45, 200, 40, btn_color, hover_color, font_color):
-                if self.game.clicked_this_frame and enough_mp:
-                    self.game.player_action(skill_idx=true_idx)
-                    self.show_item_popup = False
-
-        total_pages = (len(filtered_skills) - 1) // skills_per_page + 1
-        if total_pages > 1:
-            if self.game.scroll_offset_skills > 0 and self.draw_button("↑", x + 125, y - 35, 28, 28, BTN_BLUE, BTN_BLUE_HOVER):
-                if self.game.clicked_this_frame:
-                    self.game.scroll_offset_skills -= 1
-            if self.game.scroll_offset_skills < total_pages - 1 and self.draw_button("↓", x + 160, y - 35, 28, 28, BTN_BLUE, BTN_BLUE_HOVER):
-                if self.game.clicked_this_frame:
-                    self.game.scroll_offset_skills += 1
-
-    def draw_action_buttons(self, x, y):
-        if self.draw_button("攻击", x, y, 200, 40, BTN_RED, BTN_RED_HOVER):
-            if self.game.clicked_this_frame:
-                self.game.player_action(skill_idx=0)
-                self.show_item_popup = False
+        def attack():
+            game.player_action(skill_idx=0)
+            self.show_item_popup = False
 
-        if self.draw_button("物品", x, y + 45, 200, 40,
-                            BTN_ORANGE if not self.show_item_popup else SHEN_ZONG_SE,
-                            BTN_ORANGE_HOVER if not self.show_item_popup else SHEN_ZONG_SE,
-                            KURO if not self.show_item_popup else TEXT_FAINT):
-            if self.game.clicked_this_frame:
-                self.show_item_popup = True
+        def open_items():
+            self.show_item_popup = True
 
-        if self.draw_button("逃跑", x, y + 90, 200, 40, BTN_GREEN, BTN_GREEN_HOVER):
-            if self.game.clicked_this_frame:
-                self.game.attempt_escape_battle()
-                self.show_item_popup = False
+        def escape():
+            game.attempt_escape_battle()
+            self.show_item_popup = False
 
-        if self.show_item_popup:
-            self.draw_item_popup()
+        parent.add(Button((x, y, 200, 40), "攻击", (BTN_RED, BTN_RED_HOVER), attack))
+        parent.add(Button((x, y + 45, 200, 40), "物品", (BTN_ORANGE, BTN_ORANGE_HOVER, KURO), open_items,
+                          bind=lambda: ("物品", (SHEN_ZONG_SE, SHEN_ZONG_SE, TEXT_FAINT) if self.show_item_popup
+                                        else (BTN_ORANGE, BTN_ORANGE_HOVER, KURO))))
+        parent.add(Button((x, y + 90, 200, 40), "逃跑", (BTN_GREEN, BTN_GREEN_HOVER), escape))
 
-    def draw_item_popup(self):
+    def _build_item_popup(self, parent):
+        game = self.game
         popup_rect = pygame.Rect(250, 200, 400, 300)
-        pygame.draw.rect(screen, ONE_DARK, popup_rect)
-        pygame.draw.rect(screen, TEXT_FAINT, popup_rect, 1)
+        items = lambda: game.player.inventory.select('class', Item).page(0, 14)  # 7 行 × 2 列
 
-        items_to_display = [item for item in self.game.player.inventory if isinstance(item, Item)]
-        merged_items = self.merge_similar_items(items_to_display)
+        def use(item):
+            game.player_action(item_idx=game.player.inventory.index(item))
+            self.show_item_popup = False
 
-        if not merged_items:
-            self.draw_text("空空如也。", FONT_MEDIUM, TEXT_LIGHT, popup_rect.centerx, popup_rect.centery, "center")
-        else:
-            def popup_callback(item, idx, x, y):
-                label = f"{item.name} x{getattr(item, '_quantity', 1)}"
-                if self.draw_button(label, x, y, 160, 28, BTN_ORANGE, BTN_ORANGE_DARK, KURO, FONT_SMALL):
-                    if self.game.clicked_this_frame:
-                        real_idx = next((i for i, it in enumerate(self.game.player.inventory) if it.name == item.name), None)
-                        if real_idx is not None:
-                            self.game.player_action(item_idx=real_idx)
-                            self.show_item_popup = False
-
-            self._draw_multicolumn(
-                items=merged_items,
-                fixed='rows',
-                count=7,
-                start_x=popup_rect.left + 30,
-                start_y=popup_rect.top + 20,
-                x_offset=180,
-                y_offset=34,
-                callback=popup_callback
-                )
-
-        if self.draw_button("返回", popup_rect.centerx - 25, popup_rect.bottom - 34, 50, 24, BTN_RED, BTN_RED_HOVER, KURO, FONT_SMALL):
-            if self.game.clicked_this_frame:
-                self.show_item_popup = False
+        def item_button(entry, x, y):
+            item, count = entry
+            return Button((x, y, 160, 28), f"{item.name} x{count}", (BTN_ORANGE, BTN_ORANGE_DARK, KURO),
+                          lambda: use(item), FONT_SMALL)
+
+        def close():
+            self.show_item_popup = False
+
+        popup = parent.add(Panel(popup_rect, ONE_DARK, TEXT_FAINT, opaque=True, visible_if=lambda: self.show_item_popup))
+        popup.add(Label(popup_rect.center, "空空如也。", FONT_MEDIUM, TEXT_LIGHT, "center", visible_if=lambda: not items()))
+        popup.add(GridList((popup_rect.left + 30, popup_rect.top + 20), 7, 180, 34, item_button, fixed="rows", bind=items))
+        popup.add(Button((popup_rect.centerx - 25, popup_rect.bottom - 34, 50, 24), "返回", (BTN_RED, BTN_RED_HOVER, KURO),
+                         close, FONT_SMALL))
+
+    def _build_battle_reward(self, root):
+        game = self.game
+        rewards = lambda: game.battle_rewards
+        root.add(Label((SCREEN_WIDTH // 2, 100), "战斗胜利！", FONT_LARGE, BTN_ORANGE, "center"))
+
+        y = 180
+        root.add(Label((SCREEN_WIDTH // 2, y), "", FONT_MEDIUM, SHIRONEZUMI, "center", bind=lambda: f"获得经验: {rewards()['exp']}"))
+        y += 40
+        root.add(Label((SCREEN_WIDTH // 2, y), "", FONT_MEDIUM, BTN_ORANGE, "center", bind=lambda: f"获得金币: {rewards()['gold']}"))
+        y += 40
+
+        def item_line(entry, x, y):
+            item, count = entry
+            label = f"- {item.name}" if count == 1 else f"- {item.name} ×{count}"
+            return Label((x, y), label, FONT_SMALL, BTN_CYAN, "center")
+
+        root.add(Label((SCREEN_WIDTH // 2, y), "获得物品:", FONT_MEDIUM, SHIRONEZUMI, "center",
+                       visible_if=lambda: rewards()['items']))
+        root.add(GridList((SCREEN_WIDTH // 2, y + 30), 1, 0, 25, item_line,
+                          bind=lambda: list(Counter(rewards()['items']).items())))
+
+        root.add(Button((SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 100, 150, 50), "继续", (BTN_BLUE, BTN_BLUE_HOVER),
+                        game.process_battle_rewards))
+
+    def _build_game_over(self, root):
+        game = self.game
+        root.add(Label((SCREEN_WIDTH // 2, 200), "游戏结束", FONT_LARGE, BTN_RED, "center"))
+        info = root.add(Widget(visible_if=lambda: game.player, bind=lambda: (game.player.name, game.player.level)))
+        info.add(Label((SCREEN_WIDTH // 2, 250), "", FONT_MEDIUM, TEXT_LIGHT, "center", bind=lambda: f"你 {game.player.name} 倒下了。"))
+        info.add(Label((SCREEN_WIDTH // 2, 280), "", FONT_MEDIUM, TEXT_LIGHT, "center", bind=lambda: f"最终等级: {game.player.level}"))
+        root.add(Button((SCREEN_WIDTH // 2 - 100, 400, 200, 50), "返回主菜单", (BTN_GRAY, BTN_GRAY_LIGHT),
+                        lambda: setattr(game, "state", GameState.MAIN_MENU)))
@@ -1,11 +1,11 @@
-import toml
+import sys
 
-def load_skills_from_toml(path: str):
-    from data import Skill
-    data = toml.load(path)
-    skills = []
-    for s in data.get("skills", []):
-        skill = Skill(
+# ----- TOML 文档 -> 构造参数 -----
+
+def skill_records(doc):
+    """skills.toml 文档 -> Skill 构造参数列表"""
+    return [
+        dict(
             name=s["name"],
             damage_multiplier=s["power_multiplier"],
             mp_cost=s["mp_cost"],
@@ -17,42 +17,141 @@ def load_skills_from_toml(path: str):
             status_effect=s.get("status_effect"),
             effect_duration=s.get("effect_duration"),
         )
+        for s in doc.get("skills", [])
+    ]
+
+def item_records(doc):
+    """items.toml 文档 -> Item 构造参数列表"""
+    return [
+        dict(
+            name=s["name"],
+            item_type=s["type"],
+            effect_value=s.get("value"),
+            description=s["description"],
+            price=s.get("price"),
+            duration=s.get("duration"),
+            target=s.get("target"),
+        )
+        for _, its in doc.get("items", {}).items()
+        for s in its
+    ]
+
+def equipment_records(doc):
+    """equipments.toml 文档 -> Equipment 构造参数列表（类型缺省时取自分类名）"""
+    return [
+        dict(
+            name=s["name"],
+            equip_type=s.get("type", category.rstrip('s')),
+            attack_bonus=s.get("atk", 0),
+            defense_bonus=s.get("def", 0),
+            hp_bonus=s.get("hp", 0),
+            mp_bonus=s.get("mp", 0),
+            description=s.get("description", ""),
+            price=s.get("price", 0),
+        )
+        for category, items in doc.get("equipments", {}).items()
+        for s in items
+    ]
+
+def _refs(entries, chance_default=None):
+    """[{item = 名称, chance = 概率}, ...] -> [{"item": 名称, "chance": 概率}, ...]，省略的 chance 不补"""
+    refs = []
+    for entry in entries:
+        ref = {"item": entry["item"]}
+        chance = entry.get("chance", chance_default)
+        if chance is not None:
+            ref["chance"] = chance
+        refs.append(ref)
+    return refs
+
+def enemy_records(doc):
+    """enemies.toml 文档 -> 敌人参数列表（技能、掉落、装备仍为名称）"""
+    return [
+        dict(
+            name=s["name"],
+            max_hp=s["hp"],
+            max_mp=s.get("mp", 0),
+            attack=s["atk"],
+            defense=s.get("def", 0),
+            level=s.get("level", 1),
+            exp_reward=s.get("exp", 0),
+            gold_reward=s.get("gold", 0),
+            skills=list(s.get("skills", [])),
+            ai=s.get("ai", "random"),
+            drops=_refs(s.get("drops", []), chance_default=1.0),
+            equips=_refs(s.get("equips", [])),
+            description=s.get("description", ""),
+        )
+        for s in doc.get("enemies", [])
+    ]
+
+def location_records(doc):
+    """locations.toml 文档 -> 地点参数列表（敌人、商店仍为名称）"""
+    return [
+        dict(
+            name=s["name"],
+            description=s.get("description", ""),
+            enemies=list(s.get("enemies", [])),
+            shop=s.get("shop"),
+            can_rest=s.get("can_rest", False),
+            elite_chance=s.get("elite_chance", 0.0),
+            group_size=list(s.get("group_size", [1, 1])),
+        )
+        for s in doc.get("locations", [])
+    ]
+
+def shop_records(doc):
+    """shops.toml 文档 -> 商店参数列表（商品仍为名称）"""
+    return [
+        dict(
+            name=s["name"],
+            items=list(s.get("items", [])),
+            equipments=list(s.get("equipments", [])),
+            sell_modifier=s.get("sell_modifier", 0.5),
+        )
+        for s in doc.get("shops", [])
+    ]
+
+RECORD_BUILDERS = {
+    "skills": skill_records,
+    "items": item_records,
+    "equipments": equipment_records,
+    "enemies": enemy_records,
+    "locations": location_records,
+    "shops": shop_records,
+}
+
+def load_records(path, kind):
+    """读取构造参数：内容包（见 content_bundle）与源文件一致时直接使用，否则解析 TOML"""
+    import content_bundle
+    records = content_bundle.load_records(path, kind)
+    if records is None:
+        import toml  # 只在没有可用内容包时才需要
+        records = RECORD_BUILDERS[kind](toml.load(path))
+    return records
+
+# ----- 加载 -----
+
+def load_skills_from_toml(path: str):
+    from data import Skill
+    skills = []
+    for r in load_records(path, "skills"):
+        skill = Skill(**dict(r, name=sys.intern(r["name"]), skill_type=sys.intern(r["skill_type"])))
         skills.append(skill)
     return skills
 
 def load_items_from_toml(path: str):
     from data import Item
-    data = toml.load(path)
     items = []
-    for _, its in data.get("items", {}).items():
-        for s in its:
-            item = Item(
-                name=s["name"],
-                item_type=s["type"],
-                effect_value=s.get("value", ),
-                description=s["description"],
-                price=s.get("price"),
-                duration=s.get("duration"),
-                target=s.get("target"),
-            )
-            items.append(item)
+    for r in load_records(path, "items"):
+        item = Item(**dict(r, name=sys.intern(r["name"]), item_type=sys.intern(r["item_type"])))
+        items.append(item)
     return items
 
 def load_equipment_from_toml(path: str):
     from data import Equipment
-    data = toml.load(path)
     equipments = []
-    for category, items in data.get("equipments", {}).items():
-        for s in items:
-            equipment = Equipment(
-                name=s["name"],
-                equip_type=s.get("type", category.rstrip('s')),
-                attack_bonus=s.get("atk", 0),
-                defense_bonus=s.get("def", 0),
-                hp_bonus=s.get("hp", 0),
-                mp_bonus=s.get("mp", 0),
-                description=s.get("description", ""),
-                price=s.get("price", 0),
-            )
-            equipments.append(equipment)
+    for r in load_records(path, "equipments"):
+        equipment = Equipment(**dict(r, name=sys.intern(r["name"]), equip_type=sys.intern(r["equip_type"])))
+        equipments.append(equipment)
     return equipments
@@ -0,0 +1,130 @@
+from collections import deque
+from itertools import islice
+
+import pygame
+
+class MessageLog:
+    """定长环形缓冲的消息日志
+
+    超出容量时自动丢弃最旧的消息（deque(maxlen)，追加与丢弃都是 O(1)）。
+    每条消息有一个递增的序号，清空后也不会复用，绘制端据此判断哪些消息
+    已经画过；version 在内容变化时递增。
+    """
+    def __init__(self, capacity=100, messages=()):
+        self._messages = deque(maxlen=capacity)
+        self.first_seq = 0  # 最旧一条消息的序号
+        self.version = 0
+        self.extend(messages)
+
+    @property
+    def capacity(self):
+        return self._messages.maxlen
+
+    def append(self, message):
+        if len(self._messages) == self._messages.maxlen:
+            self.first_seq += 1
+        self._messages.append(message)
+        self.version += 1
+
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+
+    def clear(self):
+        self.first_seq += len(self._messages)
+        self._messages.clear()
+        self.version += 1
+
+    def seq_of(self, index):
+        return self.first_seq + index
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        return iter(self._messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._messages))
+            return list(islice(self._messages, start, stop, step))
+        return self._messages[index]
+
+class MessageLogSurface:
+    """消息日志可见区域的离屏缓存
+
+    按消息序号记录缓存面上每条消息的位置。追加消息或滚动时，只把仍然可见的
+    消息整体平移（Surface.scroll），再补画新露出来的消息；内容不变时什么也不做，
+    每帧只需 blit 一次。
+    """
+    def __init__(self, ui, width, height, font, color, background):
+        self.ui = ui
+        self.font = font
+        self.color = color
+        self.background = background
+        self.surface = pygame.Surface((width, height))
+        self.surface.fill(background)
+        self.revision = 0  # 缓存面内容每改变一次加一，用作脏矩形签名
+        self._entries = []  # [(序号, 顶端 y, 高度), ...]
+        self._state = None  # (日志, 日志版本, 起始下标)，未变化时跳过一切计算
+
+    def _message_height(self, text):
+        lines = self.ui.text_layout.layout(text, self.font, self.surface.get_width())
+        return len(lines) * self.font.get_linesize()
+
+    def _plan(self, log, start_idx):
+        """从 start_idx 开始可见的消息及其位置（与原先逐条绘制时的截断规则相同）"""
+        limit = self.surface.get_height() - self.font.get_linesize()
+        entries = []
+        y = 0
+        for idx in range(start_idx, len(log)):
+            height = self._message_height(log[idx])
+            entries.append((log.seq_of(idx), y, height))
+            y += height
+            if y > limit:
+                break
+        return entries
+
+    def _draw_message(self, text, top):
+        line_height = self.font.get_linesize()
+        width = self.surface.get_width()
+        for i, line in enumerate(self.ui.text_layout.layout(text, self.font, width)):
+            self.surface.blit(self.ui.render_text(line, self.font, self.color), (0, top + i * line_height))
+
+    def update(self, log, start_idx):
+        """使缓存面显示 log 从 start_idx 开始的消息，返回是否有改动"""
+        state = (id(log), log.version, start_idx)
+        if state == self._state:
+            return False
+        self._state = state
+
+        entries = self._plan(log, start_idx)
+        if entries == self._entries:
+            return False
+
+        # 只有完整画在缓存面上的消息可以平移复用（最后一条可能被底边截断）
+        surface_height = self.surface.get_height()
+        old = {seq: top for seq, top, height in self._entries if top + height <= surface_height}
+        kept = [(seq, top, height) for seq, top, height in entries if seq in old]
+        surface = self.surface
+        if kept:
+            # 保留的消息是连续的一段，整体平移同样的距离
+            dy = kept[0][1] - old[kept[0][0]]
+            if dy:
+                surface.scroll(0, dy)
+            span_top = kept[0][1]
+            span_bottom = kept[-1][1] + kept[-1][2]
+        else:
+            span_top = span_bottom = 0
+
+        width, height = surface.get_size()
+        surface.fill(self.background, (0, 0, width, span_top))
+        surface.fill(self.background, (0, span_bottom, width, height - span_bottom))
+        first = log.first_seq
+        for seq, top, _ in entries:
+            if seq not in old:
+                self._draw_message(log[seq - first], top)
+
+        self._entries = entries
+        self.revision += 1
+        return True
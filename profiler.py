@@ -0,0 +1,191 @@
+import time
+from collections import deque
+
+from colors import *
+from widgets import Screen
+
+# 帧耗时直方图的分桶上限（毫秒），最后一桶收纳更慢的帧
+HISTOGRAM_BUCKETS = (2, 4, 8, 16, 33, 66)
+
+# 按界面分别计时的 Screen 方法
+SCREEN_METHODS = ("render", "sync", "repaint")
+
+class FrameProfiler:
+    """帧耗时 HUD 与逐函数计时
+
+    开启时给每个界面（widgets.Screen）的 render、sync、repaint 和
+    RPGGame.enemy_action 套上计时包装，界面的耗时按 "界面名.方法" 分别统计
+    （如 battle.render、battle.repaint）。界面是第一次显示时才创建的，所以
+    界面方法的包装挂在 Screen 类上，enemy_action 的包装挂在实例属性上；关闭时
+    全部恢复为原方法，因此关闭状态下没有任何额外开销。
+
+    每帧的耗时为 begin_frame 到 end_frame 之间的处理与绘制时间，
+    各函数的耗时为含子调用的累计时间（battle.render 包含其中的 battle.sync
+    与 battle.repaint）。HUD 画在界面之上，每帧只重画它自己和它下面的区域。
+    """
+    def __init__(self, history=120, smoothing=0.1):
+        self.enabled = False
+        self.history = deque(maxlen=history)  # 最近若干帧的耗时（毫秒）
+        self.smoothing = smoothing
+        self.timings = {}        # 函数名 -> [平滑后的每帧毫秒, 平滑后的每帧调用次数]
+        self.screen_times = {}   # 界面名 -> 平滑后的帧耗时
+        self._frame = {}         # 本帧累计：函数名 -> [秒, 次数]
+        self._frame_start = None
+        self._wrapped = []       # [(对象, 方法名, 原先在对象上的属性或 None), ...]
+
+    # ----- 开关 -----
+
+    def enable(self, ui, game):
+        if self.enabled:
+            return
+        self.enabled = True
+        for name in SCREEN_METHODS:
+            self._wrap_screen_method(name)
+        self._wrap(game, "enemy_action")
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for obj, name, original in reversed(self._wrapped):
+            if original is None:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, original)
+        self._wrapped.clear()
+        self._frame.clear()
+        self._frame_start = None
+
+    def toggle(self, ui, game):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable(ui, game)
+        return self.enabled
+
+    def _record(self, name, seconds):
+        entry = self._frame.get(name)
+        if entry is None:
+            entry = self._frame[name] = [0.0, 0]
+        entry[0] += seconds
+        entry[1] += 1
+
+    def _wrap(self, obj, name):
+        method = getattr(obj, name)
+        if not callable(method):
+            return
+        record = self._record
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start)
+
+        self._wrapped.append((obj, name, vars(obj).get(name)))
+        setattr(obj, name, timed)
+
+    def _wrap_screen_method(self, name):
+        """包装 Screen 类上的方法，耗时记在 "界面名.方法名" 下"""
+        method = getattr(Screen, name)
+        record = self._record
+        perf_counter = time.perf_counter
+
+        def timed(screen, *args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(screen, *args, **kwargs)
+            finally:
+                record(f"{screen.name}.{name}", perf_counter() - start)
+
+        self._wrapped.append((Screen, name, vars(Screen).get(name)))
+        setattr(Screen, name, timed)
+
+    # ----- 每帧记录 -----
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter()
+
+    def end_frame(self, screen_name=""):
+        """结束本帧计时并更新统计；须在绘制 HUD 之前调用，HUD 本身不计入"""
+        if not self.enabled or self._frame_start is None:
+            return
+        frame_ms = (time.perf_counter() - self._frame_start) * 1000
+        self._frame_start = None
+        self.history.append(frame_ms)
+
+        alpha = self.smoothing
+        previous = self.screen_times.get(screen_name)
+        self.screen_times[screen_name] = frame_ms if previous is None else previous + alpha * (frame_ms - previous)
+
+        for name, timing in self.timings.items():
+            if name not in self._frame:
+                timing[0] -= alpha * timing[0]
+                timing[1] -= alpha * timing[1]
+        for name, (seconds, calls) in self._frame.items():
+            timing = self.timings.get(name)
+            if timing is None:
+                self.timings[name] = [seconds * 1000, calls]
+            else:
+                timing[0] += alpha * (seconds * 1000 - timing[0])
+                timing[1] += alpha * (calls - timing[1])
+        self._frame.clear()
+
+    def histogram(self):
+        """最近若干帧耗时按 HISTOGRAM_BUCKETS 分桶的计数"""
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for ms in self.history:
+            for i, limit in enumerate(HISTOGRAM_BUCKETS):
+                if ms < limit:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    # ----- HUD -----
+
+    def draw(self, ui, fps, screen_name="", x=SCREEN_WIDTH - 330, y=10, width=320, max_rows=12):
+        """在屏幕右上角绘制 HUD（直接调用类上的方法，不计入逐函数计时）"""
+        if not self.enabled:
+            return
+        cls = type(ui)
+        line_h = FONT_SMALL.get_linesize()
+        rows = sorted(self.timings.items(), key=lambda kv: kv[1][0], reverse=True)[:max_rows]
+        bar_h = 40
+        height = 10 + line_h * 2 + bar_h + line_h + 10 + line_h * len(rows)
+        cls.draw_rect(ui, ONE_DARK, (x, y, width, height))
+        cls.draw_rect(ui, BTN_GRAY, (x, y, width, height), 1)
+
+        last = self.history[-1] if self.history else 0.0
+        worst = max(self.history) if self.history else 0.0
+        cy = y + 6
+        cls.draw_text(ui, f"帧 {last:5.1f} ms  最慢 {worst:5.1f} ms  FPS {fps:4.1f}", FONT_SMALL, TEXT_LIGHT, x + 8, cy)
+        cy += line_h
+        screen_ms = self.screen_times.get(screen_name, 0.0)
+        cls.draw_text(ui, f"界面 {screen_name}  平均 {screen_ms:5.1f} ms", FONT_SMALL, TEXT_FAINT, x + 8, cy)
+        cy += line_h + 4
+
+        # 帧耗时直方图
+        counts = self.histogram()
+        peak = max(counts) or 1
+        slot_w = (width - 16) // len(counts)
+        for i, count in enumerate(counts):
+            h = int(bar_h * count / peak)
+            color = BTN_GREEN if i < 4 else BTN_ORANGE if i < 5 else BTN_RED
+            if h:
+                cls.draw_rect(ui, color, (x + 8 + i * slot_w, cy + bar_h - h, slot_w - 4, h))
+        cy += bar_h + 2
+        labels = [f"<{limit}" for limit in HISTOGRAM_BUCKETS] + [f"{HISTOGRAM_BUCKETS[-1]}+"]
+        for i, label in enumerate(labels):
+            cls.draw_text(ui, label, FONT_SMALL, GINNEZUMI, x + 8 + i * slot_w, cy)
+        cy += line_h + 6
+
+        for name, (ms, calls) in rows:
+            cls.draw_text(ui, f"{name[:24]:<24}", FONT_SMALL, TEXT_FAINT, x + 8, cy)
+            cls.draw_text(ui, f"{ms:6.2f} ms ×{calls:5.1f}", FONT_SMALL, TEXT_LIGHT, x + width - 8, cy, "right")
+            cy += line_h
+        ui.overlay((x, y, width, height))
@@ -0,0 +1,99 @@
+"""等级成长的预计算表
+
+升级规则（与原先逐级 level_up 完全一致，升到第 L 级时）：
+    生命上限 += int(生命上限 * 0.05) + 10 + L
+    法力上限 += int(法力上限 * 0.05) + 5 + L // 2
+    攻击     += 2 + L // 4
+    防御     += 1 + L // 5
+第 L 级升到 L+1 级所需经验为 int(L * 100 * (1 + (L - 1) * 0.1))。
+
+经验、攻击、防御只与等级有关，用前缀和表 O(1) 求跨越多级的总量；生命与法力
+的增长取决于当前数值，按 (起始数值, 起始等级) 缓存整条曲线，同样起点的角色
+（如所有新玩家）共享同一条曲线。表都按需延长。
+"""
+from bisect import bisect_right
+
+class _PrefixTable:
+    """f(1), f(2), ... 的前缀和，按需延长；total(a, b) = f(a+1) + ... + f(b)"""
+    __slots__ = ('func', 'sums')
+
+    def __init__(self, func):
+        self.func = func
+        self.sums = [0, 0]  # sums[L] = f(1) + ... + f(L-1)，即从 1 级累计到 L 级
+
+    def extend_to(self, level):
+        sums = self.sums
+        while len(sums) <= level:
+            sums.append(sums[-1] + self.func(len(sums) - 1))
+
+    def cumulative(self, level):
+        self.extend_to(level)
+        return self.sums[level]
+
+    def total(self, from_level, to_level):
+        """从 from_level 升到 to_level 的累计增量（第 from_level+1 级到第 to_level 级的增量之和）"""
+        self.extend_to(to_level + 1)
+        return self.sums[to_level + 1] - self.sums[from_level + 1]
+
+def exp_to_next_level(level):
+    return int(level * 100 * (1 + (level - 1) * 0.1))
+
+def _attack_gain(level):
+    return 2 + level // 4
+
+def _defense_gain(level):
+    return 1 + level // 5
+
+# EXP_TABLE.cumulative(L) 为从 1 级升到 L 级所需的总经验
+EXP_TABLE = _PrefixTable(exp_to_next_level)
+ATTACK_GAINS = _PrefixTable(_attack_gain)
+DEFENSE_GAINS = _PrefixTable(_defense_gain)
+
+class _GrowthCurves:
+    """value += int(value * 0.05) + flat + per_level(L) 形式的成长曲线缓存"""
+    __slots__ = ('flat', 'per_level', 'curves')
+
+    def __init__(self, flat, per_level):
+        self.flat = flat
+        self.per_level = per_level
+        self.curves = {}  # (起始数值, 起始等级) -> [起始等级时的数值, 下一级的数值, ...]
+
+    def curve(self, value, level, levels):
+        """从 level 级的 value 开始的曲线，curve[k] 为升 k 级后的数值（至少算到 levels 级）"""
+        curve = self.curves.get((value, level))
+        if curve is None:
+            if len(self.curves) >= 1024:  # 起点五花八门时（如大量不同的存档）不无限增长
+                self.curves.clear()
+            curve = self.curves[(value, level)] = [value]
+        while len(curve) <= levels:
+            current = curve[-1]
+            next_level = level + len(curve)
+            curve.append(current + int(current * 0.05) + self.flat + self.per_level(next_level))
+        return curve
+
+HP_CURVES = _GrowthCurves(10, lambda level: level)
+MP_CURVES = _GrowthCurves(5, lambda level: level // 2)
+
+def level_after_exp(level, exp):
+    """持有 exp 点经验的 level 级角色连续升级后的等级，以及剩余经验"""
+    target = level
+    base = EXP_TABLE.cumulative(level)
+    # 先按倍增扩展表，再二分查找
+    while EXP_TABLE.cumulative(target + 1) - base <= exp:
+        target = level + max(1, (target - level) * 2)
+    target = bisect_right(EXP_TABLE.sums, base + exp, level, target + 1) - 1
+    return target, exp - (EXP_TABLE.sums[target] - base)
+
+# ----- 技能解锁索引 -----
+
+_unlock_indexes = {}  # id(技能列表) -> (技能列表, 列表长度, {需求等级: [技能, ...]})
+
+def skill_unlock_index(skills):
+    """按 required_level 分组的技能索引，同一个技能列表只建一次（列表长度变化时重建）"""
+    entry = _unlock_indexes.get(id(skills))
+    if entry is None or entry[0] is not skills or entry[1] != len(skills):
+        index = {}
+        for skill in skills:
+            index.setdefault(skill.required_level, []).append(skill)
+        entry = _unlock_indexes[id(skills)] = (skills, len(skills), index)
+    return entry[2]
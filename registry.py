@@ -0,0 +1,151 @@
+import os
+import sys
+
+import load_datas
+from content_bundle import ContentError
+
+class Registry:
+    """同一类内容的登记表
+
+    按登记顺序分配从 0 开始的整数 ID，按 ID 或名称查找都是 O(1)。
+    内容文件只在末尾追加条目时，已有条目的 ID 保持不变。
+    """
+    __slots__ = ('kind', '_by_id', '_by_name', '_ids')
+
+    def __init__(self, kind):
+        self.kind = kind
+        self._by_id = []
+        self._by_name = {}
+        self._ids = {}  # 名称 -> ID
+
+    def add(self, name, obj):
+        if name in self._by_name:
+            raise ContentError(f"{self.kind} 名称重复: {name!r}")
+        content_id = len(self._by_id)
+        self._by_id.append(obj)
+        self._by_name[name] = obj
+        self._ids[name] = content_id
+        return content_id
+
+    def get(self, key):
+        """按 ID（int）或名称（str）取内容"""
+        try:
+            return self._by_id[key] if isinstance(key, int) else self._by_name[key]
+        except (IndexError, KeyError):
+            raise KeyError(f"{self.kind} 中没有 {key!r}") from None
+
+    __getitem__ = get
+
+    def resolve(self, name, referrer):
+        """解析引用，找不到时指出是谁引用的"""
+        obj = self._by_name.get(name)
+        if obj is None:
+            raise ContentError(f"{referrer} 引用了不存在的 {self.kind} {name!r}")
+        return obj
+
+    def id_of(self, name):
+        return self._ids[name]
+
+    @property
+    def by_name(self):
+        """名称 -> 内容（只读使用）"""
+        return self._by_name
+
+    def __contains__(self, key):
+        if isinstance(key, int):
+            return 0 <= key < len(self._by_id)
+        return key in self._by_name
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id)
+
+    def __repr__(self):
+        return f"<Registry {self.kind}: {len(self)}>"
+
+class GameContent:
+    """全部游戏内容的登记表，内容之间的引用在加载时解析为对象"""
+    def __init__(self):
+        self.skills = Registry("技能")
+        self.items = Registry("物品")
+        self.equipments = Registry("装备")
+        self.goods = Registry("物品或装备")  # 物品与装备共用一个名称空间（掉落、商店、背包）
+        self.enemies = Registry("敌人")
+        self.locations = Registry("地点")
+        self.shops = Registry("商店")
+
+def _path(data_dir, kind):
+    return os.path.join(data_dir, f"{kind}.toml")
+
+def _resolve_refs(refs, registry, obj_key, referrer):
+    """[{"item": 名称, ...}, ...] -> [{obj_key: 对象, ...}, ...]"""
+    resolved = []
+    for ref in refs:
+        entry = {key: value for key, value in ref.items() if key != "item"}
+        entry[obj_key] = registry.resolve(ref["item"], referrer)
+        resolved.append(entry)
+    return resolved
+
+def load_content(data_dir="Data"):
+    """加载 data_dir 下的全部内容并解析引用；引用不存在时抛出 ContentError"""
+    from data import Shop
+    from enemies import EnemyTemplate
+
+    content = GameContent()
+
+    for skill in load_datas.load_skills_from_toml(_path(data_dir, "skills")):
+        content.skills.add(skill.name, skill)
+    for item in load_datas.load_items_from_toml(_path(data_dir, "items")):
+        content.items.add(item.name, item)
+        content.goods.add(item.name, item)
+    for equip in load_datas.load_equipment_from_toml(_path(data_dir, "equipments")):
+        content.equipments.add(equip.name, equip)
+        content.goods.add(equip.name, equip)
+
+    # 商店先于地点加载，地点按名称引用商店
+    for r in load_datas.load_records(_path(data_dir, "shops"), "shops"):
+        referrer = f"商店 {r['name']}"
+        shop = Shop(
+            sys.intern(r["name"]),
+            items_for_sale=[content.items.resolve(name, referrer) for name in r["items"]],
+            equipments_for_sale=[content.equipments.resolve(name, referrer) for name in r["equipments"]],
+            sell_modifier=r["sell_modifier"],
+        )
+        content.shops.add(shop.name, shop)
+
+    for r in load_datas.load_records(_path(data_dir, "enemies"), "enemies"):
+        referrer = f"敌人 {r['name']}"
+        drops = _resolve_refs(r["drops"], content.goods, "item_obj", referrer)
+        equips = _resolve_refs(r["equips"], content.equipments, "equip_obj", referrer)
+        enemy = EnemyTemplate(
+            sys.intern(r["name"]), r["max_hp"], r["max_mp"], r["attack"], r["defense"], r["level"],
+            r["exp_reward"], r["gold_reward"],
+            [content.skills.resolve(name, referrer) for name in r["skills"]],
+            drops,
+            description=r["description"],
+            potential_equips=equips,
+            ai=r["ai"],
+        )
+        content.enemies.add(enemy.name, enemy)
+
+    for r in load_datas.load_records(_path(data_dir, "locations"), "locations"):
+        referrer = f"地点 {r['name']}"
+        for name in r["enemies"]:
+            content.enemies.resolve(name, referrer)
+        shop = r["shop"]
+        if shop is not None:
+            content.shops.resolve(shop, referrer)
+        location = {
+            "name": sys.intern(r["name"]),
+            "description": r["description"],
+            "enemies": [sys.intern(name) for name in r["enemies"]],
+            "shop_idx": None if shop is None else content.shops.id_of(shop),  # 商店 ID 即其在 shops 中的下标
+            "can_rest": r["can_rest"],
+            "elite_chance": r["elite_chance"],
+            "group_size": tuple(r["group_size"]),  # (最少, 最多) 个敌人
+        }
+        location["id"] = content.locations.add(location["name"], location)
+
+    return content
@@ -0,0 +1,221 @@
+"""录像：逐帧记录玩家输入，之后无界面、全速地重新运行整局游戏
+
+录像文件为 JSON Lines：第一行是头部（格式版本、随机种子、DEBUG 开关、录制开始时
+的自动存档），其后每行一帧：[时刻毫秒, 鼠标 x, 鼠标 y, [[事件类型, 属性], ...]]。
+RPGGame.run_frame 只依赖这三项输入和 rng 中的随机数流，用同样的种子逐帧重放即可
+得到完全相同的游戏过程。每帧写完立即 flush，游戏中途崩溃也能留下可回放的录像。
+
+首领的搜索推演到固定深度，与机器快慢无关；只有触发了时间上限的决策会另写一行
+{"search_capped": [决策序号, 完成的深度]}，回放时按记录的深度搜索（见 enemy_ai.SearchLog）。
+
+回放时所有绘制照常进行（使用 SDL dummy 驱动，不开窗口），因此录像可以直接作为
+性能回归的真实负载，或用来复现、剖析玩家报告的卡顿。
+
+录制：把 debug.RECORD_REPLAY 设为 True 后正常游戏，录像路径会写进消息记录。
+回放（在项目根目录运行）：
+    python replay.py replays/xxx.replay
+    python replay.py replays/xxx.replay --json result.json --cprofile replay.prof
+"""
+import argparse
+import base64
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pygame
+
+import debug
+import savegame
+from enemy_ai import SearchLog
+
+REPLAY_VERSION = 2
+READABLE_VERSIONS = (1, 2)  # 版本 1 没有 search_capped 行
+REPLAY_DIR = "replays"
+
+# 会影响游戏逻辑的事件；鼠标移动不必记录，每帧的鼠标位置单独保存
+RECORDED_EVENTS = {
+    pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL, pygame.KEYDOWN,
+    pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED,
+}
+
+def _event_attrs(event):
+    return {key: value for key, value in event.dict.items()
+            if isinstance(value, (bool, int, float, str, tuple))}
+
+def _make_event(event_type, attrs):
+    attrs = {key: tuple(value) if isinstance(value, list) else value for key, value in attrs.items()}
+    return pygame.event.Event(event_type, attrs)
+
+# ----- 录制 -----
+
+class ReplayRecorder:
+    def __init__(self, path, seed, debug_mode=False, save_data=None):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.stream = open(path, "w", encoding="utf-8")
+        self.frames = 0
+        header = {
+            "version": REPLAY_VERSION,
+            "seed": seed,
+            "debug": debug_mode,
+            "save": base64.b64encode(save_data).decode("ascii") if save_data is not None else None,
+        }
+        self._write(header)
+
+    @classmethod
+    def for_game(cls, game, path=None):
+        """为尚未开始运行的 game 开始录制，默认写到 replays/ 下"""
+        if path is None:
+            path = os.path.join(REPLAY_DIR, time.strftime("%Y%m%d-%H%M%S") + f"-{game.rng.seed}.replay")
+        save_data = None
+        if savegame.exists(game.autosave_path):
+            with open(game.autosave_path, "rb") as f:
+                save_data = f.read()
+        recorder = cls(path, game.rng.seed, debug.DEBUG, save_data)
+        game.battle.search_log.on_capped = recorder.record_search_capped
+        game.add_message(f"录像: {path}")
+        return recorder
+
+    def _write(self, row):
+        self.stream.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.stream.flush()
+
+    def record_frame(self, now, mouse_pos, events):
+        recorded = [[event.type, _event_attrs(event)] for event in events if event.type in RECORDED_EVENTS]
+        self._write([now, mouse_pos[0], mouse_pos[1], recorded])
+        self.frames += 1
+
+    def record_search_capped(self, decision, depth):
+        self._write({"search_capped": [decision, depth]})
+
+    def close(self):
+        self.stream.close()
+
+# ----- 回放 -----
+
+def load_replay(path):
+    """返回 (头部, 帧列表, 被时间上限截断的搜索决策)
+
+    帧为 (时刻, 鼠标位置, 事件列表)，截断的决策为 {决策序号: 完成的深度}。
+    """
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") not in READABLE_VERSIONS:
+            raise ValueError(f"不支持的录像版本 {header.get('version')}")
+        frames = []
+        capped = {}
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if isinstance(row, dict):
+                decision, depth = row["search_capped"]
+                capped[decision] = depth
+                continue
+            now, x, y, events = row
+            frames.append((now, (x, y), [_make_event(t, attrs) for t, attrs in events]))
+    return header, frames, capped
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def replay(path, profile_hud=False):
+    """无界面回放录像，返回统计信息（帧耗时、各界面耗时与最终状态）"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from game import RPGGame
+
+    header, frames, capped = load_replay(path)
+    debug_before = debug.DEBUG
+    debug.DEBUG = header["debug"]
+    save_dir = tempfile.mkdtemp(prefix="z666-replay-")
+    try:
+        game = RPGGame(seed=header["seed"])
+        # 不设时间上限，录制时被截断的决策按记录的深度搜索
+        game.battle.search_log = SearchLog(capped, timed=False)
+        # 存档读写都放到临时目录，不碰玩家自己的存档；先写好存档再设路径，has_autosave 才是对的
+        autosave_path = os.path.join(save_dir, "autosave.sav")
+        if header["save"] is not None:
+            with open(autosave_path, "wb") as f:
+                f.write(base64.b64decode(header["save"]))
+        game.autosave_path = autosave_path
+        game.add_message(f"录像: {path}")  # 与 for_game 一致，消息数才对得上
+        if profile_hud:
+            game.profiler.enable(game.ui, game)
+
+        frame_ms = []
+        screen_ms = {}
+        start = time.perf_counter()
+        try:
+            for now, mouse_pos, events in frames:
+                screen = game.state.name
+                t0 = time.perf_counter()
+                game.run_frame(events, now, mouse_pos)
+                elapsed = (time.perf_counter() - t0) * 1000
+                frame_ms.append(elapsed)
+                screen_ms[screen] = screen_ms.get(screen, 0.0) + elapsed
+        except SystemExit:
+            pass  # 录像以退出游戏结束
+        total = time.perf_counter() - start
+    finally:
+        debug.DEBUG = debug_before
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+    ordered = sorted(frame_ms)
+    player = game.player
+    return {
+        "frames": len(frame_ms),
+        "seconds": total,
+        "fps": len(frame_ms) / total if total else 0.0,
+        "mean_ms": sum(frame_ms) / len(frame_ms) if frame_ms else 0.0,
+        "p50_ms": _percentile(ordered, 0.5),
+        "p95_ms": _percentile(ordered, 0.95),
+        "max_ms": ordered[-1] if ordered else 0.0,
+        "screen_ms": screen_ms,
+        "final_state": {
+            "state": game.state.name,
+            "gold": game.gold,
+            "location": game.current_location_idx,
+            "level": player.level if player else None,
+            "exp": player.exp if player else None,
+            "hp": player.hp if player else None,
+            "messages": len(game.message_log),
+        },
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面全速回放录像")
+    parser.add_argument("replay", help="录像文件")
+    parser.add_argument("--json", help="把统计结果写入 JSON 文件（便于与基线比较）")
+    parser.add_argument("--cprofile", help="用 cProfile 剖析回放，结果写入该文件")
+    parser.add_argument("--hud", action="store_true", help="回放时打开帧耗时 HUD 的逐函数计时")
+    args = parser.parse_args(argv)
+
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        result = profiler.runcall(replay, args.replay, args.hud)
+        profiler.dump_stats(args.cprofile)
+    else:
+        result = replay(args.replay, args.hud)
+
+    print(f"{result['frames']} 帧，用时 {result['seconds']:.2f} 秒（{result['fps']:.0f} 帧/秒）")
+    print(f"每帧 平均 {result['mean_ms']:.2f} ms，p50 {result['p50_ms']:.2f} ms，"
+          f"p95 {result['p95_ms']:.2f} ms，最长 {result['max_ms']:.2f} ms")
+    for screen, ms in sorted(result["screen_ms"].items(), key=lambda kv: -kv[1]):
+        print(f"  {screen:<18}{ms:10.1f} ms")
+    print("最终状态:", json.dumps(result["final_state"], ensure_ascii=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""按子系统划分、可复现的随机数流
+
+每个子系统各用一个 random.Random，都由同一个会话种子派生：
+    encounter  遭遇：进入地点时是否遇敌、遇到哪个敌人
+    battle     战斗结算：敌人随机装备、逃跑、战利品掉落
+    enemy_ai   敌人出招
+某个子系统多抽或少抽一次随机数不会打乱其他子系统的序列；种子与玩家输入
+相同时整局游戏的结果完全一致（录像回放依赖这一点，见 replay.py）。
+"""
+import random
+
+STREAMS = ("encounter", "battle", "enemy_ai")
+
+class RandomStreams:
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(63)
+        self.seed = seed
+        for name in STREAMS:
+            # 字符串种子经 SHA-512 派生，与 PYTHONHASHSEED 无关，跨进程、跨平台一致
+            setattr(self, name, random.Random(f"{seed}/{name}"))
+
+    def __repr__(self):
+        return f"RandomStreams(seed={self.seed})"
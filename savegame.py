@@ -0,0 +1,196 @@
+"""存档：RPGGame 状态的紧凑二进制快照
+
+文件格式（小端）：
+    头部  4s 魔数 b"Z6SV" | H 格式版本 | I 正文长度 | I 正文 CRC32
+    正文  依次写入的定长整数/浮点数，字符串为 H 长度 + UTF-8 字节
+
+技能、物品、装备、地点都只写它们在 registry 中的整数 ID，不写对象本身；
+内容文件只在末尾追加条目时 ID 不变，旧存档仍可读取。
+写入时先写临时文件再 os.replace，中途退出不会留下损坏的存档。
+"""
+import os
+import struct
+import zlib
+
+from character import Character, StatusEffect
+
+MAGIC = b"Z6SV"
+SAVE_VERSION = 1
+SAVE_DIR = "saves"
+AUTOSAVE_PATH = os.path.join(SAVE_DIR, "autosave.sav")
+
+_HEADER = struct.Struct("<4sHII")
+_NO_ID = 0xFFFF
+EQUIP_SLOTS = ('weapon', 'armor', 'helmet', 'accessory')
+
+class SaveError(Exception):
+    """存档缺失、损坏或与当前内容不兼容"""
+
+class _Writer:
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, fmt, *values):
+        self.parts.append(struct.pack(fmt, *values))
+
+    def string(self, text):
+        data = text.encode("utf-8")
+        self.parts.append(struct.pack("<H", len(data)))
+        self.parts.append(data)
+
+    def number(self, value):
+        """整数与浮点数分别保存，读回时类型不变"""
+        if isinstance(value, int):
+            self.parts.append(struct.pack("<Bq", 0, value))
+        else:
+            self.parts.append(struct.pack("<Bd", 1, value))
+
+    def getvalue(self):
+        return b"".join(self.parts)
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        if self.pos + size > len(self.data):
+            raise SaveError("存档数据不完整")
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += size
+        return values
+
+    def string(self):
+        (length,) = self.unpack("<H")
+        data = self.data[self.pos:self.pos + length]
+        self.pos += length
+        return data.decode("utf-8")
+
+    def number(self):
+        (tag,) = self.unpack("<B")
+        return self.unpack("<q" if tag == 0 else "<d")[0]
+
+def _lookup(registry, content_id):
+    if content_id not in registry:
+        raise SaveError(f"存档引用了不存在的{registry.kind} ID {content_id}")
+    return registry[content_id]
+
+# ----- 快照 -----
+
+def snapshot(game):
+    """把游戏状态编码为存档字节串"""
+    content = game.content
+    player = game.player
+    w = _Writer()
+
+    w.pack("<qHq", game.gold, game.current_location_idx, len(game.message_log))
+    w.string(player.name)
+    w.pack("<IqqqIIqq", player.level, player.exp, player.hp, player.mp,
+           player.base_max_hp, player.base_max_mp, player.base_attack, player.base_defense)
+
+    w.pack("<H", len(player.skills))
+    for skill in player.skills:
+        w.pack("<H", content.skills.id_of(skill.name))
+
+    stacks = player.inventory.stacks()
+    w.pack("<I", len(stacks))
+    for item, count in stacks:
+        w.pack("<HI", content.goods.id_of(item.name), count)
+
+    for slot in EQUIP_SLOTS:
+        equip = player.equipment.get(slot)
+        w.pack("<H", _NO_ID if equip is None else content.goods.id_of(equip.name))
+
+    w.pack("<H", len(player.status_effects))
+    for effect in player.status_effects:
+        w.string(effect.name)
+        w.string(effect.effect_type)
+        w.number(effect.value)
+        w.pack("<ii", effect.duration, effect.turns_remaining)
+        w.string(effect.description or "")
+
+    for message in game.message_log:
+        w.string(message)
+
+    body = w.getvalue()
+    return _HEADER.pack(MAGIC, SAVE_VERSION, len(body), zlib.crc32(body)) + body
+
+def restore(game, data):
+    """把存档字节串还原到 game 上（先完整解析，解析失败时不改动 game）"""
+    if len(data) < _HEADER.size:
+        raise SaveError("存档数据不完整")
+    magic, version, length, crc = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SaveError("不是存档文件")
+    if version != SAVE_VERSION:
+        raise SaveError(f"不支持的存档版本 {version}")
+    body = data[_HEADER.size:_HEADER.size + length]
+    if len(body) != length or zlib.crc32(body) != crc:
+        raise SaveError("存档已损坏")
+
+    content = game.content
+    r = _Reader(body)
+    gold, location_idx, message_count = r.unpack("<qHq")
+    _lookup(content.locations, location_idx)
+    name = r.string()
+    level, exp, hp, mp, max_hp, max_mp, attack, defense = r.unpack("<IqqqIIqq")
+
+    player = Character(name, max_hp, max_mp, attack, defense, level=level, exp=exp,
+                       game_skills_ref=game.all_skills)
+    (count,) = r.unpack("<H")
+    for _ in range(count):
+        player.skills.append(_lookup(content.skills, r.unpack("<H")[0]))
+
+    (count,) = r.unpack("<I")
+    for _ in range(count):
+        goods_id, quantity = r.unpack("<HI")
+        player.inventory.add(_lookup(content.goods, goods_id), quantity)
+
+    for slot in EQUIP_SLOTS:
+        (goods_id,) = r.unpack("<H")
+        if goods_id != _NO_ID:
+            player.equipment[slot] = _lookup(content.goods, goods_id)
+
+    (count,) = r.unpack("<H")
+    for _ in range(count):
+        effect_name, effect_type = r.string(), r.string()
+        value = r.number()
+        duration, turns_remaining = r.unpack("<ii")
+        effect = StatusEffect(effect_name, effect_type, value, duration, r.string())
+        player.status_effects.add(effect, turns_remaining)
+    player.invalidate_stats()
+    player.hp, player.mp = hp, mp
+
+    messages = [r.string() for _ in range(message_count)]
+
+    game.player = player
+    game.battle.player = player
+    game.gold = gold
+    game.current_location_idx = location_idx
+    game.message_log.clear()
+    game.message_log.extend(messages[-game.message_log.capacity:])
+
+# ----- 文件 -----
+
+def save(game, path=AUTOSAVE_PATH):
+    data = snapshot(game)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+def load(game, path=AUTOSAVE_PATH):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        raise SaveError("没有找到存档") from None
+    restore(game, data)
+
+def exists(path=AUTOSAVE_PATH):
+    return os.path.exists(path)
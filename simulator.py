@@ -0,0 +1,354 @@
+"""批量蒙特卡洛战斗模拟器（平衡性调优用）
+
+把 N 场同时进行的战斗表示为 NumPy 数组（生命、法力、攻防、状态效果计时），
+每回合对所有战斗做向量化推进，规则与 battle.BattleEngine 保持一致：
+take_damage 的减伤、技能倍率与附带状态、Enemy.choose_action 的选择概率、
+敌人随机装备和掉落表。敌人一律按默认出招策略（enemy_ai.RandomPolicy）模拟，
+指定了搜索策略的首领在游戏中会更难对付。
+
+依赖 numpy，仅供工具与测试使用，游戏本体不导入本模块。
+"""
+import numpy as np
+
+from battle import STATUS_EFFECT_TYPES
+from enemy_ai import FALLBACK_SKILL
+
+# 技能类型编码
+KIND_DAMAGE, KIND_LIFESTEAL, KIND_HEAL, KIND_BUFF_SELF, KIND_DEBUFF_ENEMY, KIND_OTHER = range(6)
+_KINDS = {
+    "damage": KIND_DAMAGE,
+    "lifesteal": KIND_LIFESTEAL,
+    "heal": KIND_HEAL,
+    "buff_self": KIND_BUFF_SELF,
+    "debuff_enemy": KIND_DEBUFF_ENEMY,
+}
+
+def _effect_type_for(skill):
+    name = skill.status_effect_name or skill.name
+    return name, STATUS_EFFECT_TYPES.get(name, "attack_debuff" if "攻击" in skill.name else "defense_debuff")
+
+class _SkillTable:
+    """一方可用技能的数组化描述，以及技能施加的状态效果规格"""
+    def __init__(self, skills):
+        self.skills = list(skills)
+        self.mp_cost = np.array([s.mp_cost or 0 for s in self.skills], dtype=np.int64)
+        self.mult = np.array([s.damage_multiplier or 0 for s in self.skills], dtype=np.float64)
+        self.kind = np.array([_KINDS.get(s.skill_type, KIND_OTHER) for s in self.skills], dtype=np.int64)
+        self.effect_value = np.array([s.effect_value or 0 for s in self.skills], dtype=np.float64)
+        self.is_heal_self = np.array([s.skill_type == "heal" and s.target == "self" for s in self.skills])
+        self.is_offensive = np.array([s.skill_type != "heal" for s in self.skills])
+
+        # (技能下标, 是否作用于施法者, 效果名, 效果类型, 持续回合, 固定数值或 None)
+        # None 表示数值取 effect_value 或施法者攻击力的 20%（与 BattleEngine.create_status_effect 相同）
+        self.effect_specs = []
+        for idx, s in enumerate(self.skills):
+            name, effect_type = _effect_type_for(s)
+            if s.skill_type == "buff_self":
+                self.effect_specs.append((idx, True, name, effect_type, s.effect_duration, 5))
+            elif s.skill_type == "debuff_enemy":
+                self.effect_specs.append((idx, False, name, effect_type, s.effect_duration, 5))
+            if s.status_effect_name and s.skill_type in ("damage", "debuff_enemy"):
+                self.effect_specs.append((idx, False, name, effect_type, s.effect_duration, s.effect_value or None))
+
+    def effect_types(self):
+        return {(spec[2], spec[3]) for spec in self.effect_specs}
+
+class _Side:
+    """一方在 N 场战斗中的状态"""
+    def __init__(self, n, max_hp, max_mp, attack, defense, hp=None, mp=None):
+        self.max_hp = np.broadcast_to(np.asarray(max_hp, dtype=np.int64), (n,)).copy()
+        self.max_mp = np.broadcast_to(np.asarray(max_mp, dtype=np.int64), (n,)).copy()
+        self.base_attack = np.broadcast_to(np.asarray(attack, dtype=np.int64), (n,)).copy()
+        self.base_defense = np.broadcast_to(np.asarray(defense, dtype=np.int64), (n,)).copy()
+        self.hp = self.max_hp.copy() if hp is None else np.full(n, hp, dtype=np.int64)
+        self.mp = self.max_mp.copy() if mp is None else np.full(n, mp, dtype=np.int64)
+        self.effects = {}  # 效果名 -> [类型, 剩余回合(-1 表示无效), 数值]
+
+    def register_effect(self, name, effect_type):
+        if name not in self.effects:
+            n = self.hp.shape[0]
+            self.effects[name] = [effect_type, np.full(n, -1, dtype=np.int64), np.zeros(n, dtype=np.int64)]
+
+    def _effect_total(self, effect_type):
+        total = 0
+        for etype, remaining, value in self.effects.values():
+            if etype == effect_type:
+                total = total + np.where(remaining >= 0, value, 0)
+        return total
+
+    def attack(self):
+        return np.maximum(0, self.base_attack + self._effect_total("attack_buff") - self._effect_total("attack_debuff"))
+
+    def defense(self):
+        return np.maximum(0, self.base_defense + self._effect_total("defense_buff") - self._effect_total("defense_debuff"))
+
+    def add_effect(self, mask, name, duration, value):
+        """同名效果已存在时只刷新持续回合（与 Character.add_status_effect 相同）"""
+        _, remaining, values = self.effects[name]
+        new = mask & (remaining < 0)
+        values[new] = np.broadcast_to(value, mask.shape)[new]
+        remaining[mask] = duration
+
+    def compact(self, keep):
+        """只保留 keep 为 True 的战斗"""
+        for attr in ("max_hp", "max_mp", "base_attack", "base_defense", "hp", "mp"):
+            setattr(self, attr, getattr(self, attr)[keep])
+        for effect in self.effects.values():
+            effect[1] = effect[1][keep]
+            effect[2] = effect[2][keep]
+
+    def heal(self, mask, amount):
+        self.hp = np.where(mask, np.minimum(self.max_hp, self.hp + amount), self.hp)
+
+    def tick_effects(self, mask):
+        """回合开始：结算持续伤害/治疗并减少剩余回合"""
+        for effect_type, remaining, value in self.effects.values():
+            active = mask & (remaining >= 0)
+            if effect_type == "damage_over_time":
+                self.hp = np.where(active, np.maximum(0, self.hp - value), self.hp)
+            elif effect_type == "heal_over_time":
+                self.heal(active, value)
+            remaining[active] -= 1
+
+def _random_pick(mask, rng):
+    """每行在为 True 的列中均匀随机选一个，返回列下标"""
+    counts = mask.sum(axis=1)
+    k = np.floor(rng.random(mask.shape[0]) * counts).astype(np.int64)
+    return np.argmax(np.cumsum(mask, axis=1) > k[:, None], axis=1)
+
+def _act(caster, target, table, choice, acting):
+    """施法者按 choice 使用技能（BattleEngine.apply_skill_effect 的向量化版本）"""
+    cost = table.mp_cost[choice]
+    can = acting & (caster.mp >= cost)
+    caster.mp = np.where(can, caster.mp - cost, caster.mp)
+    caster_attack = caster.attack()
+    kind = table.kind[choice]
+
+    hits = can & ((kind == KIND_DAMAGE) | (kind == KIND_LIFESTEAL))
+    raw = np.floor(caster_attack * table.mult[choice]).astype(np.int64)
+    dealt = np.maximum(1, raw - target.defense())
+    target.hp = np.where(hits, np.maximum(0, target.hp - dealt), target.hp)
+
+    lifesteal = can & (kind == KIND_LIFESTEAL)
+    caster.heal(lifesteal, np.floor(dealt * table.effect_value[choice]).astype(np.int64))
+    caster.heal(can & (kind == KIND_HEAL), table.effect_value[choice].astype(np.int64))
+
+    for skill_idx, on_caster, name, _, duration, value in table.effect_specs:
+        mask = can & (choice == skill_idx)
+        if not mask.any():
+            continue
+        if value is None:
+            value = np.floor(caster_attack * 0.2).astype(np.int64)
+        (caster if on_caster else target).add_effect(mask, name, duration, value)
+    return can
+
+def _choose_enemy_actions(enemy, table, fallback_idx, acting, rng):
+    """Enemy.choose_action 的向量化版本"""
+    n = acting.shape[0]
+    affordable = enemy.mp[:, None] >= table.mp_cost[None, :]
+    heal_mask = affordable & table.is_heal_self[None, :]
+    offensive_mask = affordable & table.is_offensive[None, :]
+
+    choice = np.full(n, fallback_idx, dtype=np.int64)
+    pick_heal = (enemy.hp < enemy.max_hp * 0.3) & heal_mask.any(axis=1)
+    pick_offensive = ~pick_heal & offensive_mask.any(axis=1) & (rng.random(n) < 0.7)
+
+    if pick_offensive.any():
+        choice[pick_offensive] = _random_pick(offensive_mask[pick_offensive], rng)
+    if pick_heal.any():
+        choice[pick_heal] = _random_pick(heal_mask[pick_heal], rng)
+    return choice
+
+def _choose_player_actions(player, table, policy, acting):
+    """玩家策略：basic 总是普通攻击；greedy 血量低时优先治疗，否则用可负担的最高倍率伤害技能"""
+    n = acting.shape[0]
+    if policy == "basic":
+        return np.zeros(n, dtype=np.int64)
+
+    affordable = player.mp[:, None] >= table.mp_cost[None, :]
+    damaging = (table.kind == KIND_DAMAGE) | (table.kind == KIND_LIFESTEAL)
+    score = np.where(affordable & damaging[None, :], table.mult[None, :], -np.inf)
+    choice = np.argmax(score, axis=1)
+    choice[~np.isfinite(score.max(axis=1))] = 0
+
+    heal_mask = affordable & (table.kind == KIND_HEAL)[None, :]
+    low = (player.hp < player.max_hp * 0.3) & heal_mask.any(axis=1)
+    if low.any():
+        choice[low] = np.argmax(heal_mask[low], axis=1)
+    return choice
+
+def _roll_enemy_equipment(enemy, n, rng):
+    """BattleEngine.try_equip_enemy：按概率为每场战斗的敌人穿戴装备，返回各项加成与奖励"""
+    bonus = {attr: np.zeros(n, dtype=np.int64) for attr in ("hp_bonus", "mp_bonus", "attack_bonus", "defense_bonus")}
+    exp_reward = np.full(n, enemy.exp_reward, dtype=np.int64)
+    gold_reward = np.full(n, enemy.gold_reward, dtype=np.int64)
+
+    slot_choice = {}
+    entries = list(getattr(enemy, "potential_equips", []))
+    for idx, entry in enumerate(entries):
+        rolled = rng.random(n) < entry.get("chance", 0.2)
+        equip = entry["equip_obj"]
+        slot = equip.equip_type
+        slot_choice[slot] = np.where(rolled, idx, slot_choice.get(slot, np.full(n, -1, dtype=np.int64)))
+        gold_reward += np.where(rolled, equip.price, 0)
+        exp_reward += np.where(rolled, 25 * enemy.level, 0)
+
+    for chosen in slot_choice.values():
+        for idx, entry in enumerate(entries):
+            worn = chosen == idx
+            for attr, total in bonus.items():
+                total += np.where(worn, getattr(entry["equip_obj"], attr, 0), 0)
+    return bonus, exp_reward, gold_reward
+
+def simulate(player, enemy, n=10000, seed=None, max_rounds=200, player_policy="greedy", rng=None):
+    """模拟 n 场 player 对 enemy 的战斗，返回统计结果字典
+
+    player: Character（使用其当前属性、装备与技能，忽略已有状态效果）
+    enemy: Enemy 模板（与 RPGGame 遭遇时一样会随机穿戴 potential_equips）
+    """
+    rng = rng or np.random.default_rng(seed)
+
+    player_table = _SkillTable(player.skills or [FALLBACK_SKILL])
+    enemy_skills = list(enemy.skills)
+    fallback_idx = next((i for i, s in enumerate(enemy_skills) if s.mp_cost == 0), None)
+    if fallback_idx is None:
+        fallback_idx = len(enemy_skills)
+        enemy_skills.append(FALLBACK_SKILL)
+    enemy_table = _SkillTable(enemy_skills)
+
+    p = _Side(n, player.max_hp, player.max_mp, player.attack, player.defense, hp=player.hp, mp=player.mp)
+    bonus, exp_reward, gold_reward = _roll_enemy_equipment(enemy, n, rng)
+    e = _Side(n,
+              enemy.base_max_hp + bonus["hp_bonus"],
+              enemy.base_max_mp + bonus["mp_bonus"],
+              enemy.base_attack + bonus["attack_bonus"],
+              enemy.base_defense + bonus["defense_bonus"])
+
+    # 双方都要登记对方可能施加的效果
+    for name, effect_type in player_table.effect_types() | enemy_table.effect_types():
+        p.register_effect(name, effect_type)
+        e.register_effect(name, effect_type)
+
+    running = np.ones(n, dtype=bool)
+    won = np.zeros(n, dtype=bool)
+    lost = np.zeros(n, dtype=bool)
+    rounds = np.zeros(n, dtype=np.int64)
+
+    totals = {"wins": 0, "losses": 0, "kill_rounds": 0, "rounds": 0, "hp_left": 0, "exp": 0, "gold": 0}
+    drops = {drop["item_obj"].name: 0 for drop in enemy.drop_table}
+
+    def collect(done):
+        """把已结束的战斗计入统计"""
+        done_won = done & won
+        totals["wins"] += int(done_won.sum())
+        totals["losses"] += int((done & lost).sum())
+        totals["kill_rounds"] += int(rounds[done_won].sum())
+        totals["rounds"] += int(rounds[done].sum())
+        totals["hp_left"] += int(p.hp[done_won].sum())
+        totals["exp"] += int(exp_reward[done_won].sum())
+        totals["gold"] += int(gold_reward[done_won].sum())
+        for drop in enemy.drop_table:
+            drops[drop["item_obj"].name] += int((rng.random(int(done_won.sum())) < drop["chance"]).sum())
+
+    for _ in range(max_rounds):
+        size = running.shape[0]
+        alive = int(running.sum())
+        if not alive:
+            break
+        if alive < size // 2:
+            # 过半战斗已结束：结算后压缩数组，只保留进行中的战斗
+            collect(~running)
+            keep = running
+            for side in (p, e):
+                side.compact(keep)
+            won, lost, rounds = won[keep], lost[keep], rounds[keep]
+            exp_reward, gold_reward = exp_reward[keep], gold_reward[keep]
+            running = running[keep]
+
+        # 玩家回合
+        choice = _choose_player_actions(p, player_table, player_policy, running)
+        acted = _act(p, e, player_table, choice, running)
+        if not acted.all():
+            # 法力不足时改用普通攻击（与 BattleEngine.run 相同）
+            retry = running & ~acted
+            _act(p, e, player_table, np.zeros(running.shape[0], dtype=np.int64), retry)
+        rounds += running
+        dead = running & (e.hp <= 0)
+        won |= dead
+        running &= ~dead
+
+        # 敌人回合：先结算敌人身上的状态
+        e.tick_effects(running)
+        dead = running & (e.hp <= 0)
+        won |= dead
+        running &= ~dead
+
+        choice = _choose_enemy_actions(e, enemy_table, fallback_idx, running, rng)
+        _act(e, p, enemy_table, choice, running)
+        dead = running & (p.hp <= 0)
+        lost |= dead
+        running &= ~dead
+
+        # 回到玩家回合：结算玩家身上的状态
+        p.tick_effects(running)
+        dead = running & (p.hp <= 0)
+        lost |= dead
+        running &= ~dead
+
+    collect(np.ones(running.shape[0], dtype=bool))
+    wins = totals["wins"]
+
+    return {
+        "enemy": enemy.name,
+        "battles": n,
+        "wins": wins,
+        "losses": totals["losses"],
+        "timeouts": n - wins - totals["losses"],
+        "win_rate": wins / n,
+        "mean_rounds_to_kill": totals["kill_rounds"] / wins if wins else None,
+        "mean_rounds": totals["rounds"] / n,
+        "mean_hp_left": totals["hp_left"] / wins if wins else 0.0,
+        "expected_exp": totals["exp"] / n,
+        "expected_gold": totals["gold"] / n,
+        "drop_rates": {name: count / n for name, count in drops.items()},
+    }
+
+def simulate_batched(player, enemy, n, batch_size=250000, seed=None, **kwargs):
+    """分批模拟大量战斗以控制内存占用，合并统计结果"""
+    rng = np.random.default_rng(seed)
+    results = []
+    remaining = n
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        results.append(simulate(player, enemy, n=size, rng=rng, **kwargs))
+        remaining -= size
+    return merge_results(results)
+
+def merge_results(results):
+    total = sum(r["battles"] for r in results)
+    wins = sum(r["wins"] for r in results)
+
+    def weighted(key, weight_key="battles"):
+        pairs = [(r[key], r[weight_key]) for r in results if r[key] is not None and r[weight_key]]
+        weight = sum(w for _, w in pairs)
+        return sum(v * w for v, w in pairs) / weight if weight else None
+
+    drops = {}
+    for r in results:
+        for name, rate in r["drop_rates"].items():
+            drops[name] = drops.get(name, 0.0) + rate * r["battles"] / total
+
+    return {
+        "enemy": results[0]["enemy"],
+        "battles": total,
+        "wins": wins,
+        "losses": sum(r["losses"] for r in results),
+        "timeouts": sum(r["timeouts"] for r in results),
+        "win_rate": wins / total,
+        "mean_rounds_to_kill": weighted("mean_rounds_to_kill", "wins"),
+        "mean_rounds": weighted("mean_rounds"),
+        "mean_hp_left": weighted("mean_hp_left", "wins") or 0.0,
+        "expected_exp": weighted("expected_exp"),
+        "expected_gold": weighted("expected_gold"),
+        "drop_rates": drops,
+    }
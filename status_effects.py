@@ -0,0 +1,178 @@
+import heapq
+from itertools import islice
+
+# 技能附带状态名 -> 状态效果类型
+STATUS_EFFECT_TYPES = {
+    "燃烧": "damage_over_time",
+    "破甲": "defense_debuff",
+    "冰冻": "attack_debuff",
+}
+
+# 每回合开始时要结算的持续效果类型；其余类型只影响属性，到期前不必逐回合处理
+TICKING_TYPES = frozenset(('damage_over_time', 'heal_over_time'))
+
+class StatusEffect:
+    __slots__ = ('name', 'effect_type', 'value', 'duration', 'description', 'expires_at', 'seq', '_owner')
+
+    def __init__(self, name, effect_type, value, duration, description):
+        self.name = name
+        self.effect_type = effect_type  # 'attack_buff', 'damage_over_time', 等
+        self.value = value
+        self.duration = duration
+        self.description = description
+        self.expires_at = None  # 在第几次回合开始时移除（永久效果为 None）
+        self.seq = 0            # 加入顺序，回合结算按此顺序进行
+        self._owner = None
+
+    @property
+    def turns_remaining(self):
+        """剩余回合数，由到期回合与持有者的当前回合推算；未加到角色身上时为 duration"""
+        if self._owner is None or self.expires_at is None:
+            return self.duration
+        return self.expires_at - self._owner.turn - 1
+
+    def apply_effect_on_turn(self, character):
+        """应用每回合的持续效果"""
+        if self.effect_type == 'damage_over_time':
+            character.hp = max(0, character.hp - self.value)
+            return f"{character.name} 受到 {self.name} 效果，损失 {self.value} 点生命值！"
+        elif self.effect_type == 'heal_over_time':
+            old_hp = character.hp
+            character.heal(self.value)
+            return f"{character.name} 受到 {self.name} 效果，恢复 {character.hp - old_hp} 点生命值！"
+        return ""
+
+def effect_for_skill(skill, caster=None):
+    """技能施加的状态效果（战斗结算与敌人 AI 的推演共用）"""
+    name = skill.status_effect_name or skill.name
+    effect_type = STATUS_EFFECT_TYPES.get(name, "attack_debuff" if "攻击" in skill.name else "defense_debuff")
+
+    value = skill.effect_value or int(caster.attack * 0.2) if caster else 5
+    return StatusEffect(name, effect_type, value, skill.effect_duration, f"{name}效果")
+
+class StatusEffects:
+    """角色身上的状态效果
+
+    按名称索引（保持加入顺序），并维护：
+        各 effect_type 的数值合计，属性计算 O(1) 取用；
+        持续效果（TICKING_TYPES）的名称集合，每回合只结算它们；
+        到期回合的小根堆，每回合只弹出到期的效果。
+    效果刷新时旧的堆条目留在堆里，弹出时与效果当前的到期回合比对后丢弃。
+    """
+    __slots__ = ('_effects', '_totals', '_counts', '_ticking', '_expiry', '_seq', 'turn')
+
+    def __init__(self):
+        self._effects = {}   # 名称 -> StatusEffect
+        self._totals = {}    # effect_type -> 数值合计
+        self._counts = {}    # effect_type -> 效果个数
+        self._ticking = {}   # 名称 -> StatusEffect，仅持续效果
+        self._expiry = []    # [(到期回合, 加入顺序, 效果), ...]
+        self._seq = 0
+        self.turn = 0        # 已经结算过的回合开始次数
+
+    def __len__(self):
+        return len(self._effects)
+
+    def __iter__(self):
+        return iter(self._effects.values())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._effects))
+            return list(islice(self._effects.values(), start, stop, step))
+        return list(self._effects.values())[index]
+
+    def __contains__(self, name):
+        return name in self._effects
+
+    def get(self, name):
+        return self._effects.get(name)
+
+    def total(self, effect_type):
+        """某类效果的数值合计"""
+        return self._totals.get(effect_type, 0)
+
+    def _schedule(self, effect, turns_remaining):
+        effect.expires_at = self.turn + turns_remaining + 1
+        heapq.heappush(self._expiry, (effect.expires_at, effect.seq, effect))
+        if len(self._expiry) > 2 * len(self._effects) + 16:
+            # 反复刷新留下的过期条目太多时重建
+            self._expiry = [(e.expires_at, e.seq, e) for e in self._effects.values() if e.expires_at is not None]
+            heapq.heapify(self._expiry)
+
+    def add(self, template, turns_remaining=None):
+        """按模板加上效果，返回是否为新效果
+
+        同名效果已存在时只把剩余回合重置为模板的 duration（数值不变）。
+        turns_remaining 用于读档时恢复剩余回合。
+        """
+        remaining = template.duration if turns_remaining is None else turns_remaining
+        existing = self._effects.get(template.name)
+        if existing:
+            if existing.duration != -1:
+                self._schedule(existing, remaining)
+            return False
+
+        effect = StatusEffect(template.name, template.effect_type, template.value,
+                              template.duration, template.description)
+        effect._owner = self
+        self._seq += 1
+        effect.seq = self._seq
+        self._effects[effect.name] = effect
+        kind = effect.effect_type
+        self._totals[kind] = self._totals.get(kind, 0) + effect.value
+        self._counts[kind] = self._counts.get(kind, 0) + 1
+        if kind in TICKING_TYPES:
+            self._ticking[effect.name] = effect
+        if effect.duration != -1:  # -1 为永久效果，直到被驱散
+            self._schedule(effect, remaining)
+        return True
+
+    def _remove(self, effect):
+        del self._effects[effect.name]
+        self._ticking.pop(effect.name, None)
+        kind = effect.effect_type
+        self._counts[kind] -= 1
+        if not self._counts[kind]:
+            del self._counts[kind]
+            del self._totals[kind]
+        elif isinstance(effect.value, float):
+            # 浮点数值减回去会留下误差（以及 int 变 float），重新求和
+            self._totals[kind] = sum(e.value for e in self._effects.values() if e.effect_type == kind)
+        else:
+            self._totals[kind] -= effect.value
+        effect._owner = None
+
+    def start_turn(self, character):
+        """回合开始：结算持续效果并移除到期效果，返回 (消息列表, 是否有效果被移除)"""
+        self.turn += 1
+        expiry = self._expiry
+        expired = []
+        while expiry and expiry[0][0] <= self.turn:
+            expires_at, _, effect = heapq.heappop(expiry)
+            if effect._owner is self and effect.expires_at == expires_at:
+                expired.append(effect)
+
+        due = self._ticking.values()
+        if expired:
+            # 与逐个效果依次“结算、到期”的顺序保持一致
+            due = sorted({e.seq: e for e in (*due, *expired)}.values(), key=lambda e: e.seq)
+        expired = set(expired)
+
+        messages = []
+        for effect in due:
+            if effect.effect_type in TICKING_TYPES:
+                messages.append(effect.apply_effect_on_turn(character))
+            if effect in expired:
+                self._remove(effect)
+                messages.append(f"{character.name}的 {effect.name} 效果结束了。")
+        return messages, bool(expired)
+
+    def clear(self):
+        for effect in self._effects.values():
+            effect._owner = None
+        self._effects.clear()
+        self._totals.clear()
+        self._counts.clear()
+        self._ticking.clear()
+        self._expiry.clear()
@@ -0,0 +1,339 @@
+"""游戏核心热点路径的微基准
+
+在项目根目录运行：
+    python -m test.bench_core                   # 打印 JSON 结果
+    python -m test.bench_core -o before.json    # 保存结果
+    python -m test.bench_core --compare before.json -o after.json
+    python -m test.bench_core -k inventory      # 只跑名称包含 inventory 的基准
+
+每个基准报告 ops_per_sec（多轮取最好的一轮），以及用 tracemalloc 统计的
+每次操作后仍存活的内存块数、字节数和运行期间的内存峰值增量。
+输出的 JSON 键有序、数值固定精度，不同版本的结果可以直接 diff。
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import load_datas
+from battle import BattleEngine
+from character import Character, Enemy, StatusEffect
+from data import Item, Equipment
+from enemies import EnemyPool, EnemyTemplate
+
+SKILLS_PATH = "Data/skills.toml"
+ITEMS_PATH = "Data/items.toml"
+EQUIPMENTS_PATH = "Data/equipments.toml"
+
+BENCHMARKS = {}
+
+def bench(name):
+    """登记基准：被装饰的函数接收操作次数 n，完成准备工作后返回执行 n 次操作的函数"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def make_player(level=1):
+    skills = load_datas.load_skills_from_toml(SKILLS_PATH)
+    player = Character("冒险者", 100, 30, 10, 5, game_skills_ref=skills)
+    player.skills.extend(skills[:2])
+    for _ in range(level - 1):
+        player.level_up()
+    for equip in load_datas.load_equipment_from_toml(EQUIPMENTS_PATH)[::3]:
+        player.equip(equip)
+    return player
+
+def make_enemy(cls=Enemy):
+    skills = {s.name: s for s in load_datas.load_skills_from_toml(SKILLS_PATH)}
+    items = load_datas.load_items_from_toml(ITEMS_PATH)
+    equips = load_datas.load_equipment_from_toml(EQUIPMENTS_PATH)
+    return cls("森林妖精", 100, 50, 15, 10, 5, 60, 50,
+               [skills["普通攻击"], skills["火球术"], skills["治疗术"]],
+               [{"item_obj": items[0], "chance": 0.15}],
+               potential_equips=[{"equip_obj": equips[0], "chance": 0.3}])
+
+def make_items(count):
+    """count 种互不相同的物品与装备"""
+    items = []
+    for i in range(count):
+        if i % 2:
+            items.append(Item(f"药水{i:05d}", "heal_hp", 10, "基准用物品", price=i))
+        else:
+            items.append(Equipment(f"装备{i:05d}", ("weapon", "armor", "helmet", "accessory")[i % 4],
+                                   1, 1, 0, 0, "基准用装备", price=i))
+    return items
+
+# ----- 角色属性与战斗 -----
+
+@bench("character.stats_cached")
+def bench_stats_cached(n):
+    player = make_player(level=5)
+    def run():
+        for _ in range(n):
+            player.max_hp; player.max_mp; player.attack; player.defense
+    return run
+
+@bench("character.stats_invalidated")
+def bench_stats_invalidated(n):
+    player = make_player(level=5)
+    for i in range(4):
+        player.add_status_effect(StatusEffect(f"效果{i}", ("attack_buff", "defense_debuff")[i % 2], 3, -1, ""))
+    def run():
+        for _ in range(n):
+            player.invalidate_stats()
+            player.max_hp; player.max_mp; player.attack; player.defense
+    return run
+
+@bench("character.take_damage")
+def bench_take_damage(n):
+    player = make_player(level=5)
+    def run():
+        for _ in range(n):
+            player.hp = player.max_hp
+            player.take_damage(30)
+    return run
+
+@bench("character.gain_exp_50_levels")
+def bench_gain_exp(n):
+    skills = load_datas.load_skills_from_toml(SKILLS_PATH)
+    exp = sum(int(level * 100 * (1 + (level - 1) * 0.1)) for level in range(1, 51))
+    def run():
+        for _ in range(n):
+            Character("冒险者", 100, 30, 10, 5, game_skills_ref=skills).gain_exp(exp)
+    return run
+
+@bench("character.status_effects_tick_64")
+def bench_status_effects(n):
+    player = make_player(level=5)
+    for i in range(64):
+        effect_type = ("damage_over_time", "heal_over_time", "attack_buff", "defense_debuff")[i % 4]
+        player.add_status_effect(StatusEffect(f"效果{i}", effect_type, 1, n + 1, ""))
+    def run():
+        for _ in range(n):
+            player.hp = player.max_hp
+            player.update_status_effects_at_turn_start()
+    return run
+
+@bench("character.status_effects_buffs_64")
+def bench_status_effect_buffs(n):
+    """只影响属性的效果叠满时，每回合结算加一次属性读取"""
+    player = make_player(level=5)
+    for i in range(64):
+        player.add_status_effect(StatusEffect(f"增益{i}", "attack_buff", 1, n + 1, ""))
+    def run():
+        for _ in range(n):
+            player.update_status_effects_at_turn_start()
+            player.attack
+    return run
+
+# ----- 背包 -----
+
+@bench("inventory.add_remove_5000_stacks")
+def bench_inventory_add_remove(n):
+    player = make_player()
+    items = make_items(5000)
+    for item in items:
+        player.add_item_to_inventory(item, quantity=2)
+    picks = [random.Random(0).choice(items) for _ in range(64)]
+    def run():
+        for i in range(n):
+            item = picks[i % 64]
+            player.remove_item_from_inventory(item, quantity=2)  # 堆叠消失
+            player.add_item_to_inventory(item, quantity=2)       # 重新插入堆叠
+    return run
+
+@bench("inventory.add_existing_stack")
+def bench_inventory_add_existing(n):
+    player = make_player()
+    items = make_items(5000)
+    for item in items:
+        player.add_item_to_inventory(item)
+    item = items[2500]
+    def run():
+        for _ in range(n):
+            player.add_item_to_inventory(item)
+            player.remove_item_from_inventory(item)
+    return run
+
+# ----- 敌人 -----
+
+@bench("enemy.clone")
+def bench_enemy_clone(n):
+    enemy = make_enemy()
+    def run():
+        for _ in range(n):
+            enemy.clone()
+    return run
+
+@bench("enemy.pool_acquire_release")
+def bench_enemy_pool(n):
+    """每场战斗从对象池取实例、战斗结束归还（对照 enemy.clone）"""
+    template = make_enemy(EnemyTemplate)
+    pool = EnemyPool()
+    def run():
+        for _ in range(n):
+            enemy = pool.acquire(template)
+            enemy.hp -= 10
+            pool.release(enemy)
+    return run
+
+@bench("battle.area_skill_40_enemies")
+def bench_area_skill(n):
+    """范围技能一次结算 40 个敌人的伤害与燃烧效果"""
+    skills = {s.name: s for s in load_datas.load_skills_from_toml(SKILLS_PATH)}
+    storm = skills["烈焰风暴"]
+    player = make_player(level=5)
+    engine = BattleEngine(player, rng=random.Random(0))
+    enemies = [engine.enemy_pool.acquire(make_enemy(EnemyTemplate)) for _ in range(40)]
+    def run():
+        for _ in range(n):
+            for enemy in enemies:
+                enemy.hp = 10 ** 6
+            player.mp = storm.mp_cost
+            engine.apply_area_skill(player, enemies, storm)
+    return run
+
+@bench("enemy.choose_action")
+def bench_choose_action(n):
+    enemy = make_enemy()
+    player = make_player()
+    random.seed(0)
+    def run():
+        for i in range(n):
+            enemy.hp = enemy.max_hp if i % 2 else 10
+            enemy.choose_action(player)
+    return run
+
+@bench("enemy.choose_action_lookahead")
+def bench_choose_action_lookahead(n):
+    """首领搜索策略；生命值在几个取值间轮换，置换表在决策之间复用"""
+    enemy = make_enemy()
+    enemy.ai = "lookahead"
+    player = make_player(level=5)
+    def run():
+        for i in range(n):
+            enemy.hp = (10, 40, 70, 100)[i % 4]
+            player.hp = player.max_hp - i % 3 * 20
+            enemy.choose_action(player)
+    return run
+
+# ----- 数据加载 -----
+
+@bench("load_datas.skills")
+def bench_load_skills(n):
+    def run():
+        for _ in range(n):
+            load_datas.load_skills_from_toml(SKILLS_PATH)
+    return run
+
+@bench("load_datas.items")
+def bench_load_items(n):
+    def run():
+        for _ in range(n):
+            load_datas.load_items_from_toml(ITEMS_PATH)
+    return run
+
+@bench("load_datas.equipments")
+def bench_load_equipments(n):
+    def run():
+        for _ in range(n):
+            load_datas.load_equipment_from_toml(EQUIPMENTS_PATH)
+    return run
+
+# ----- 运行 -----
+
+def calibrate(factory, min_time):
+    """找到单轮耗时不少于 min_time 秒的操作次数"""
+    n = 1
+    while True:
+        run = factory(n)
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or n >= 1 << 24:
+            return n
+        n = max(n * 2, int(n * min_time / max(elapsed, 1e-9) * 1.2))
+
+def measure_allocations(factory, n):
+    """执行 n 次操作后仍存活的内存块数与字节数（每次操作平均），以及运行期间的峰值增量"""
+    run = factory(n)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = [s for s in after.compare_to(before, "filename") if "tracemalloc" not in s.traceback[0].filename]
+    blocks = sum(max(0, s.count_diff) for s in stats)
+    size = sum(max(0, s.size_diff) for s in stats)
+    return {
+        "retained_blocks_per_op": round(blocks / n, 3),
+        "retained_bytes_per_op": round(size / n, 1),
+        "peak_bytes": peak - base,
+    }
+
+def run_benchmark(factory, min_time=0.2, repeat=5, alloc_ops=200):
+    n = calibrate(factory, min_time)
+    best = None
+    for _ in range(repeat):
+        run = factory(n)
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    result = {"ops": n, "ops_per_sec": round(n / best, 1), "ns_per_op": round(best / n * 1e9, 1)}
+    result.update(measure_allocations(factory, min(n, alloc_ops)))
+    return result
+
+def compare(old, new):
+    """打印每个基准 ops_per_sec 的变化比例"""
+    for name in sorted(new["benchmarks"]):
+        if name not in old.get("benchmarks", {}):
+            continue
+        before = old["benchmarks"][name]["ops_per_sec"]
+        after = new["benchmarks"][name]["ops_per_sec"]
+        print(f"{name:40s} {before:>14,.1f} -> {after:>14,.1f}  x{after / before:.2f}", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="游戏核心热点路径的微基准")
+    parser.add_argument("-k", "--filter", help="只运行名称包含该字符串的基准")
+    parser.add_argument("-o", "--output", help="把 JSON 结果写入文件（默认标准输出）")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮最少运行秒数")
+    parser.add_argument("--repeat", type=int, default=5, help="计时轮数（取最快一轮）")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, factory in sorted(BENCHMARKS.items()):
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = run_benchmark(factory, args.min_time, args.repeat)
+        print(f"{name:40s} {results[name]['ops_per_sec']:>14,.1f} ops/s", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "benchmarks": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
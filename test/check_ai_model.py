@@ -0,0 +1,78 @@
+"""核对首领搜索的推演模型与 BattleEngine 的真实结算是否一致
+
+enemy_ai 的 _apply / _turn_start 在紧凑的 (生命, 法力, 状态效果) 元组上重写了
+技能与状态效果的结算规则。本脚本用固定的随机种子生成战斗局面：随机等级与装备的
+玩家、随机的敌人，双方轮流随机出招，每一步都把推演结果与 BattleEngine 实际结算后
+的状态比较。改动伤害公式、技能或状态效果的规则后运行，不一致时打印第一处差异。
+
+在项目根目录运行：
+    python -m test.check_ai_model
+    python -m test.check_ai_model --cases 10000 --seed 1
+"""
+import argparse
+import random
+import sys
+
+import constants
+import enemy_ai
+from battle import BattleEngine
+from character import Character
+
+def make_case(rng, data):
+    player = Character("冒险者", 100, 30, 10, 5, game_skills_ref=data["skills"])
+    player.skills.extend(data["skills"])
+    player.advance_levels(rng.randrange(0, 5), details=False)
+    if rng.random() < 0.5:
+        player.equip(rng.choice(data["equipments"]))
+    enemy = rng.choice(list(data["enemy_map"].values())).spawn()
+    return player, enemy
+
+def check_case(rng, data, steps=12):
+    """返回第一处不一致的描述，全部一致时返回 None"""
+    player, enemy = make_case(rng, data)
+    engine = BattleEngine(player, rng=random.Random(rng.random()))
+    engine.enemies = [enemy]
+    engine.enemy = enemy
+    sides = {player: enemy_ai._Side(player, player.skills), enemy: enemy_ai._Side(enemy, enemy.skills)}
+
+    for _ in range(steps):
+        caster, target = (enemy, player) if rng.random() < 0.5 else (player, enemy)
+        skill = rng.choice(caster.skills)
+        if caster.mp < skill.mp_cost:
+            continue
+        before = enemy_ai.battle_state(caster), enemy_ai.battle_state(target)
+        predicted = enemy_ai._apply(enemy_ai._Move(skill), *before, sides[caster], sides[target])
+        engine.apply_skill_effect(caster, target, skill)
+        actual = enemy_ai.battle_state(caster), enemy_ai.battle_state(target)
+        if predicted != actual:
+            return f"{caster.name} 对 {target.name} 使用 {skill.name}: {before} -> 推演 {predicted}，实际 {actual}"
+
+        ticking = rng.choice((player, enemy))
+        predicted = enemy_ai._turn_start(enemy_ai.battle_state(ticking), ticking.max_hp)
+        ticking.update_status_effects_at_turn_start()
+        actual = enemy_ai.battle_state(ticking)
+        if predicted != actual:
+            return f"{ticking.name} 回合开始结算: 推演 {predicted}，实际 {actual}"
+        if not player.is_alive() or not enemy.is_alive():
+            break
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="核对首领搜索的推演模型")
+    parser.add_argument("--cases", type=int, default=3000, help="随机局面数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    data = constants.get_game_data()
+    failures = 0
+    for case in range(args.cases):
+        problem = check_case(random.Random(args.seed * 1_000_003 + case), data)
+        if problem:
+            failures += 1
+            if failures == 1:
+                print(f"第 {case} 个局面不一致: {problem}", file=sys.stderr)
+    print(f"{args.cases} 个局面，{failures} 个不一致")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
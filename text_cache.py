@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+class TextSurfaceCache:
+    """已渲染文字 Surface 的 LRU 缓存
+
+    键为 (文本, 字体, 颜色, 抗锯齿)，超出容量时淘汰最久未使用的条目。
+    返回的 Surface 为共享对象，只可用于 blit，不要修改。
+    """
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, antialias, color):
+        key = (text, font, color, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._surfaces),
+            "capacity": self.capacity,
+        }
+
+    def __len__(self):
+        return len(self._surfaces)
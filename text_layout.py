@@ -0,0 +1,143 @@
+from collections import OrderedDict
+
+# 禁则：不能出现在行首的标点（会被并入前一个字）
+NO_LINE_START = frozenset("，。！？、；：,.!?;:)]}）】」』》〉”’…—～%")
+# 禁则：不能出现在行尾的标点（会被并入后一个字）
+NO_LINE_END = frozenset("([{（【「『《〈“‘")
+
+def is_cjk(ch):
+    """判断字符是否可以在任意字间断行（中日韩文字及全角符号）"""
+    code = ord(ch)
+    return (
+        0x3000 <= code <= 0x30FF      # CJK 标点、平假名、片假名
+        or 0x3400 <= code <= 0x4DBF   # 扩展 A
+        or 0x4E00 <= code <= 0x9FFF   # 基本汉字
+        or 0xAC00 <= code <= 0xD7AF   # 谚文
+        or 0xF900 <= code <= 0xFAFF   # 兼容汉字
+        or 0xFF00 <= code <= 0xFFEF   # 全角 ASCII 与标点
+    )
+
+def split_units(text):
+    """把一段文字切成不可再分的断行单元
+
+    汉字逐字成单元，连续的西文字符成一个单词，空格单独成单元；
+    再按禁则把行首/行尾标点与相邻单元粘在一起。
+    """
+    units = []
+    word = ""
+    for ch in text:
+        if ch == " ":
+            if word:
+                units.append(word)
+                word = ""
+            units.append(ch)
+        elif is_cjk(ch) or ch in NO_LINE_START or ch in NO_LINE_END:
+            if word:
+                units.append(word)
+                word = ""
+            units.append(ch)
+        else:
+            word += ch
+    if word:
+        units.append(word)
+
+    merged = []
+    carry = ""
+    for unit in units:
+        if carry:
+            unit = carry + unit
+            carry = ""
+        if unit[-1] in NO_LINE_END:
+            carry = unit
+            continue
+        if merged and unit[0] in NO_LINE_START and merged[-1] != " ":
+            merged[-1] += unit
+        else:
+            merged.append(unit)
+    if carry:
+        merged.append(carry)
+    return merged
+
+class TextLayoutEngine:
+    """支持中日韩文字的断行排版器
+
+    字宽按字体逐字缓存，排版结果按 (文本, 字体, 行宽) 缓存，
+    同一段文字只需排版一次。
+    """
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._advances = {}
+        self._layouts = OrderedDict()
+
+    def char_width(self, font, ch):
+        advances = self._advances.get(font)
+        if advances is None:
+            advances = self._advances[font] = {}
+        width = advances.get(ch)
+        if width is None:
+            width = advances[ch] = font.size(ch)[0]
+        return width
+
+    def text_width(self, font, text):
+        return sum(self.char_width(font, ch) for ch in text)
+
+    def layout(self, text, font, max_width):
+        """返回换行后的各行文字（元组）"""
+        key = (text, font, max_width)
+        lines = self._layouts.get(key)
+        if lines is not None:
+            self._layouts.move_to_end(key)
+            self.hits += 1
+            return lines
+
+        self.misses += 1
+        lines = []
+        for paragraph in text.split("\n"):
+            lines.extend(self._layout_paragraph(paragraph, font, max_width))
+        lines = tuple(lines)
+
+        self._layouts[key] = lines
+        if len(self._layouts) > self.capacity:
+            self._layouts.popitem(last=False)
+        return lines
+
+    def _layout_paragraph(self, paragraph, font, max_width):
+        lines = []
+        current = []
+        current_width = 0
+        for unit in split_units(paragraph):
+            if unit == " " and not current:
+                continue  # 行首空格丢弃
+            width = self.text_width(font, unit)
+            if current_width + width <= max_width:
+                current.append(unit)
+                current_width += width
+                continue
+
+            if current:
+                lines.append("".join(current).rstrip())
+                current, current_width = [], 0
+                if unit == " ":
+                    continue
+
+            if width <= max_width:
+                current.append(unit)
+                current_width = width
+            else:
+                # 单元本身超宽（如很长的西文单词），只能逐字硬断
+                for ch in unit:
+                    ch_width = self.char_width(font, ch)
+                    if current and current_width + ch_width > max_width:
+                        lines.append("".join(current))
+                        current, current_width = [], 0
+                    current.append(ch)
+                    current_width += ch_width
+
+        lines.append("".join(current).rstrip())
+        return lines
+
+    def clear(self):
+        self._advances.clear()
+        self._layouts.clear()
@@ -0,0 +1,517 @@
+"""保留模式的界面控件树
+
+每个界面（Screen）第一次显示时构建一次控件树，之后每帧只做三件事：
+    同步 —— 对控件绑定的游戏状态求值，值没有变化的控件什么也不做；
+    输入 —— 在空间网格中查找鼠标下的控件，处理悬停、点击与滚轮；
+    重画 —— 只重画本帧变化过的矩形，按控件树的先后顺序叠画其中的控件。
+控件的位置只在绑定值变化时重新计算（文字变化、列表换页等），
+因此每帧的开销取决于变化了多少，而不是界面上有多少控件。
+"""
+import pygame
+
+from colors import FONT_MEDIUM, KURO
+
+_UNSET = object()
+
+class SpatialGrid:
+    """把控件矩形按固定大小的格子登记，用于命中测试和查找与重画区域相交的控件"""
+    def __init__(self, cell=64):
+        self.cell = cell
+        self._cells = {}  # (列, 行) -> {控件, ...}
+        self._where = {}  # 控件 -> 登记过的格子
+
+    def _keys(self, rect):
+        c = self.cell
+        return [(cx, cy)
+                for cx in range(rect.left // c, (rect.right - 1) // c + 1)
+                for cy in range(rect.top // c, (rect.bottom - 1) // c + 1)]
+
+    def insert(self, widget):
+        self.remove(widget)
+        if widget.rect.width <= 0 or widget.rect.height <= 0:
+            return
+        keys = self._keys(widget.rect)
+        for key in keys:
+            self._cells.setdefault(key, set()).add(widget)
+        self._where[widget] = keys
+
+    def remove(self, widget):
+        for key in self._where.pop(widget, ()):
+            bucket = self._cells[key]
+            bucket.discard(widget)
+            if not bucket:
+                del self._cells[key]
+
+    def at(self, pos):
+        """包含点 pos 的控件"""
+        bucket = self._cells.get((pos[0] // self.cell, pos[1] // self.cell), ())
+        return [widget for widget in bucket if widget.rect.collidepoint(pos)]
+
+    def overlapping(self, rect):
+        """与 rect 相交的控件"""
+        found = set()
+        for key in self._keys(rect):
+            found.update(self._cells.get(key, ()))
+        return [widget for widget in found if widget.rect.colliderect(rect)]
+
+    def __len__(self):
+        return len(self._where)
+
+def _merge_rects(rects, bounds):
+    """裁剪到 bounds 并合并相交的矩形，减少重画的次数"""
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect.width or not rect.height:
+            continue
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+class Widget:
+    """控件基类，也可直接用作分组
+
+    rect 为屏幕坐标。bind 是无参函数，返回控件关心的游戏状态；每帧同步时与
+    上次的值比较，变化了才调用 refresh(值)。子控件只在父控件没有绑定或绑定值
+    变化时才同步，所以父控件的绑定值须涵盖子控件依赖的全部状态。
+    visible_if 在同步本控件时求值，决定本控件及其子控件是否显示。
+    on_click() / on_wheel(方向) 为输入处理函数；opaque 的控件会挡住下层控件的输入。
+    """
+    indexed = True  # 是否登记到空间网格
+
+    def __init__(self, rect=(0, 0, 0, 0), bind=None, visible_if=None, on_click=None, on_wheel=None, opaque=False):
+        self.rect = pygame.Rect(rect)
+        self.bind = bind
+        self.visible_if = visible_if
+        self.on_click = on_click
+        self.on_wheel = on_wheel
+        self.opaque = opaque
+        self.visible = True
+        self.shown = False  # 已挂到界面上，且自身与祖先都可见
+        self.children = []
+        self.parent = None
+        self.screen = None
+        self.order = 0      # 控件树先序遍历的序号，越大越靠上
+        self._bound = _UNSET
+
+    # ----- 树结构 -----
+
+    def add(self, child):
+        child.parent = self
+        self.children.append(child)
+        if self.screen is not None:
+            child._set_screen(self.screen)
+            child._update_shown()
+            self.screen.structure_changed()
+        return child
+
+    def clear(self):
+        for child in self.children:
+            child._detach()
+        self.children = []
+        if self.screen is not None:
+            self.screen.structure_changed()
+
+    def _set_screen(self, screen):
+        self.screen = screen
+        self.attached()
+        for child in self.children:
+            child._set_screen(screen)
+
+    def _detach(self):
+        for child in self.children:
+            child._detach()
+        screen = self.screen
+        if screen is not None:
+            if self.shown:
+                screen.damage(self.rect)
+                screen.grid.remove(self)
+            if screen.hovered is self:
+                screen.hovered = None
+        self.shown = False
+        self.screen = None
+
+    def _update_shown(self):
+        shown = self.visible and self.screen is not None and (self.parent is None or self.parent.shown)
+        if shown != self.shown:
+            self.shown = shown
+            if self.indexed:
+                if shown:
+                    self.screen.grid.insert(self)
+                else:
+                    self.screen.grid.remove(self)
+            self.screen.damage(self.rect)
+        for child in self.children:
+            child._update_shown()
+
+    # ----- 位置与显隐 -----
+
+    def set_rect(self, rect):
+        rect = pygame.Rect(rect)
+        if rect == self.rect:
+            return
+        if self.shown:
+            self.screen.damage(self.rect)
+        self.rect = rect
+        if self.shown:
+            if self.indexed:
+                self.screen.grid.insert(self)
+            self.screen.damage(rect)
+
+    def move(self, dx, dy):
+        """连同子控件一起平移"""
+        if dx or dy:
+            self.set_rect(self.rect.move(dx, dy))
+            self.moved(dx, dy)
+            for child in self.children:
+                child.move(dx, dy)
+
+    def set_visible(self, visible):
+        if visible != self.visible:
+            self.visible = visible
+            self._update_shown()
+            if self.parent is not None:
+                self.parent.child_visibility_changed(self)
+
+    def invalidate(self):
+        """内容变化，下一次重画时重画本控件所在的区域"""
+        if self.shown:
+            self.screen.damage(self.rect)
+
+    # ----- 同步 -----
+
+    def sync(self):
+        if self.visible_if is not None:
+            self.set_visible(bool(self.visible_if()))
+        if not self.visible:
+            return
+        if self.bind is not None:
+            value = self.bind()
+            if value == self._bound:
+                return
+            self._bound = value
+            self.refresh(value)
+        for child in self.children:
+            child.sync()
+
+    def rebind(self):
+        """忘记上次的绑定值，下一次同步时一定刷新"""
+        self._bound = _UNSET
+
+    # ----- 子类可覆盖 -----
+
+    def attached(self):
+        """挂到界面上时调用（此时可以使用 self.screen.ui 排版文字）"""
+
+    def refresh(self, value):
+        """绑定值变化时调用"""
+
+    def moved(self, dx, dy):
+        """move 之后调用，供自行保存坐标的控件更新"""
+
+    def child_visibility_changed(self, child):
+        """子控件显隐变化时调用"""
+
+    def draw(self, ui, surface):
+        """画出本控件自身（不含子控件，子控件由界面按顺序叠画）"""
+
+class Panel(Widget):
+    """矩形面板：填充色与边框，任一可为 None"""
+    def __init__(self, rect, fill=None, border=None, border_width=1, border_radius=-1, **kwargs):
+        super().__init__(rect, **kwargs)
+        self.fill = fill
+        self.border = border
+        self.border_width = border_width
+        self.border_radius = border_radius
+
+    def draw(self, ui, surface):
+        if self.fill is not None:
+            pygame.draw.rect(surface, self.fill, self.rect, border_radius=self.border_radius)
+        if self.border is not None:
+            pygame.draw.rect(surface, self.border, self.rect, self.border_width, border_radius=self.border_radius)
+
+class Label(Widget):
+    """文字；bind 返回文字，或 (文字, 颜色)
+
+    对齐方式与 GameUI.draw_text 相同：单行时 "center" 以 (x, y) 为中心，
+    "right" 以 x 为右边缘；给出 max_width 时自动换行，每行按 align 水平对齐。
+    文字或颜色变化时才重新排版。
+    """
+    def __init__(self, pos, text, font, color, align="left", max_width=None, **kwargs):
+        super().__init__((pos[0], pos[1], 0, 0), **kwargs)
+        self.pos = pos
+        self.text = text
+        self.font = font
+        self.color = color
+        self.align = align
+        self.max_width = max_width
+        self._lines = []  # [(Surface, 矩形), ...]
+
+    def attached(self):
+        self._relayout()
+
+    def refresh(self, value):
+        text, color = value if isinstance(value, tuple) else (value, self.color)
+        if text != self.text or color != self.color:
+            self.text, self.color = text, color
+            self._relayout()
+
+    def moved(self, dx, dy):
+        self.pos = (self.pos[0] + dx, self.pos[1] + dy)
+        self._lines = [(surf, rect.move(dx, dy)) for surf, rect in self._lines]
+
+    def _relayout(self):
+        ui = self.screen.ui
+        x, y = self.pos
+        font = self.font
+        if self.max_width:
+            lines = ui.text_layout.layout(self.text, font, self.max_width)
+        else:
+            lines = [self.text]
+
+        placed = []
+        for i, line in enumerate(lines):
+            surf = ui.render_text(line, font, self.color)
+            rect = surf.get_rect()
+            if self.max_width:
+                setattr(rect, {"center": "centerx", "right": "right"}.get(self.align, "left"), x)
+                rect.top = y + i * font.get_linesize()
+            elif self.align == "center":
+                rect.center = (x, y)
+            else:
+                setattr(rect, "right" if self.align == "right" else "left", x)
+                rect.top = y
+            placed.append((surf, rect))
+
+        self.invalidate()
+        self._lines = placed
+        bounds = placed[0][1].unionall([rect for _, rect in placed[1:]]) if placed else pygame.Rect(x, y, 0, 0)
+        self.set_rect(bounds)
+        self.invalidate()
+
+    def draw(self, ui, surface):
+        for surf, rect in self._lines:
+            surface.blit(surf, rect)
+
+class Button(Widget):
+    """按钮：鼠标悬停时换色，点击时调用 on_click()
+
+    bind 返回文字，或 (文字, (常态色, 悬停色[, 文字色]))。
+    """
+    def __init__(self, rect, text, colors, on_click=None, font=None, border=None, border_width=0, **kwargs):
+        super().__init__(rect, on_click=on_click, **kwargs)
+        self.text = text
+        self.colors = colors if len(colors) == 3 else (*colors, KURO)
+        self.font = font or FONT_MEDIUM
+        self.border = border
+        self.border_width = border_width
+
+    def refresh(self, value):
+        text, colors = value if isinstance(value, tuple) else (value, self.colors)
+        colors = colors if len(colors) == 3 else (*colors, KURO)
+        if text != self.text or colors != self.colors:
+            self.text, self.colors = text, colors
+            self.invalidate()
+
+    def draw(self, ui, surface):
+        inactive, active, text_color = self.colors
+        pygame.draw.rect(surface, active if self.screen.hovered is self else inactive, self.rect, border_radius=6)
+        if self.border is not None and self.border_width > 0:
+            pygame.draw.rect(surface, self.border, self.rect, self.border_width, border_radius=6)
+        text_surf = ui.render_text(self.text, self.font, text_color)
+        surface.blit(text_surf, text_surf.get_rect(center=(self.rect.x + self.rect.width / 2, self.rect.y + self.rect.height / 2)))
+
+class SurfaceView(Widget):
+    """把离屏缓存面贴到界面上；绑定值变化时调用 update(值) 更新缓存面并返回它"""
+    def __init__(self, rect, update, **kwargs):
+        super().__init__(rect, **kwargs)
+        self.update = update
+        self.surface = None
+
+    def refresh(self, value):
+        self.surface = self.update(value)
+        self.invalidate()
+
+    def draw(self, ui, surface):
+        if self.surface is not None:
+            surface.blit(self.surface, self.rect.topleft)
+
+class ScrollBar(Widget):
+    """竖直滚动条；bind 返回 (偏移, 最大偏移, 可见行数, 总行数)，不需要滚动时不画"""
+    def __init__(self, rect, track_color=(80, 80, 80), thumb_color=(180, 180, 180), **kwargs):
+        super().__init__(rect, **kwargs)
+        self.track_color = track_color
+        self.thumb_color = thumb_color
+        self.thumb = None
+
+    def refresh(self, value):
+        offset, max_offset, visible, total = value
+        if total <= visible:
+            self.thumb = None
+        else:
+            height = self.rect.height
+            thumb_h = max(int(height * visible / total), 20)
+            thumb_y = self.rect.y + int(offset / max_offset * (height - thumb_h))
+            self.thumb = pygame.Rect(self.rect.x, thumb_y, self.rect.width, thumb_h)
+        self.invalidate()
+
+    def moved(self, dx, dy):
+        if self.thumb is not None:
+            self.thumb.move_ip(dx, dy)
+
+    def draw(self, ui, surface):
+        if self.thumb is not None:
+            pygame.draw.rect(surface, self.track_color, self.rect)
+            pygame.draw.rect(surface, self.thumb_color, self.thumb)
+
+class Column(Widget):
+    """从 pos 开始纵向排列可见的子控件，子控件显隐变化时重新排列"""
+    indexed = False
+
+    def __init__(self, pos, spacing, **kwargs):
+        super().__init__((pos[0], pos[1], 0, 0), **kwargs)
+        self.spacing = spacing
+
+    def add(self, child):
+        super().add(child)
+        self.layout()
+        return child
+
+    def child_visibility_changed(self, child):
+        self.layout()
+
+    def layout(self):
+        x, y = self.rect.topleft
+        for child in self.children:
+            if child.visible:
+                child.move(x - child.rect.x, y - child.rect.y)
+                y += child.rect.height + self.spacing
+
+class GridList(Widget):
+    """按行列排列的单元格；bind 返回条目列表，条目变化时用 make_cell(条目, x, y) 重建全部单元格
+
+    fixed 为 "columns" 时每行 count 个（先横后竖），为 "rows" 时每列 count 个（先竖后横）。
+    """
+    indexed = False
+
+    def __init__(self, pos, count, x_offset, y_offset, make_cell, fixed="columns", **kwargs):
+        super().__init__((pos[0], pos[1], 0, 0), **kwargs)
+        self.count = count
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+        self.make_cell = make_cell
+        self.fixed = fixed
+
+    def refresh(self, entries):
+        self.clear()
+        x, y = self.rect.topleft
+        for idx, entry in enumerate(entries):
+            if self.fixed == "columns":
+                col, row = idx % self.count, idx // self.count
+            else:
+                col, row = idx // self.count, idx % self.count
+            self.add(self.make_cell(entry, x + col * self.x_offset, y + row * self.y_offset))
+
+class Screen(Widget):
+    """一个界面的控件树根节点：背景色、空间网格与本帧待重画的区域"""
+    indexed = False
+
+    def __init__(self, ui, background, name=""):
+        super().__init__(ui.screen.get_rect())
+        self.ui = ui
+        self.name = name  # 界面名，帧耗时 HUD 按它分别计时
+        self.background = background
+        self.grid = SpatialGrid()
+        self.hovered = None
+        self._damage = []
+        self._full = True
+        self._orders_stale = True
+        self.screen = self
+        self._update_shown()
+
+    def set_background(self, color):
+        if color != self.background:
+            self.background = color
+            self.invalidate_all()
+
+    def damage(self, rect):
+        if not self._full:
+            self._damage.append(pygame.Rect(rect))
+
+    def invalidate_all(self):
+        """下一次重画整个界面（切换界面、被其他内容覆盖之后）"""
+        self._full = True
+        self._damage = []
+
+    def structure_changed(self):
+        self._orders_stale = True
+
+    def _renumber(self):
+        order = 0
+        stack = [self]
+        while stack:
+            widget = stack.pop()
+            widget.order = order
+            order += 1
+            stack.extend(reversed(widget.children))
+        self._orders_stale = False
+
+    def widget_at(self, pos, handler):
+        """pos 处最上层的、设置了 handler（"on_click" 或 "on_wheel"）的控件；被不透明控件挡住时返回 None"""
+        if self._orders_stale:
+            self._renumber()
+        for widget in sorted(self.grid.at(pos), key=lambda w: w.order, reverse=True):
+            if getattr(widget, handler) is not None:
+                return widget
+            if widget.opaque:
+                return None
+        return None
+
+    def render(self, game):
+        """同步绑定、处理本帧输入，然后只重画变化了的区域"""
+        self.sync()
+        if game.clicked_this_frame or game.scroll_up or game.scroll_down:
+            if game.clicked_this_frame:
+                target = self.widget_at(game.mouse_pos, "on_click")
+                if target is not None:
+                    target.on_click()
+            if game.scroll_up or game.scroll_down:
+                target = self.widget_at(game.mouse_pos, "on_wheel")
+                if target is not None:
+                    target.on_wheel(-1 if game.scroll_up else 1)
+            self.sync()  # 输入造成的变化在本帧就显示出来
+
+        hovered = self.widget_at(game.mouse_pos, "on_click")
+        if hovered is not self.hovered:
+            for widget in (self.hovered, hovered):
+                if widget is not None:
+                    widget.invalidate()
+            self.hovered = hovered
+        self.repaint()
+
+    def repaint(self):
+        ui = self.ui
+        surface = ui.screen
+        if self._full:
+            rects = [self.rect]
+            ui.dirty.invalidate()
+        else:
+            rects = _merge_rects(self._damage, self.rect)
+            for rect in rects:
+                ui.dirty.add(rect)
+        self._full = False
+        self._damage = []
+        if not rects:
+            return
+
+        if self._orders_stale:
+            self._renumber()
+        for rect in rects:
+            surface.set_clip(rect)
+            surface.fill(self.background, rect)
+            for widget in sorted(self.grid.overlapping(rect), key=lambda w: w.order):
+                widget.draw(ui, surface)
+        surface.set_clip(None)